@@ -0,0 +1,350 @@
+"""
+Batch condition-monitoring analytics for received captures. Captures are stacked into one
+2-D array (captures x samples), scaled to engineering units and reduced to RMS / peak /
+crest factor and the interpolated top spectral peaks with a single batched rfft, then
+appended to a compact per-device feature table.
+수신 캡처에 대한 배치 상태 감시 분석. 캡처를 2차원 배열(캡처 x 샘플)로 쌓아 공학 단위로 환산하고,
+한 번의 rfft 로 RMS / 피크 / 크레스트 팩터 / 상위 스펙트럼 피크를 계산하여 장치별 특징 테이블에 추가합니다.
+
+    python analytics.py --config config.json [--device "Main FAN"] [--start 20250101] [--end 20250201]
+"""
+import os
+import sys
+import argparse
+import threading
+import logging
+from datetime import datetime
+
+import numpy as np
+
+from archive import CaptureIndex, channel_index, file_lock, DEFAULT_SAMPLE_RATE, UNKNOWN_CHANNEL
+from ingest import parse_device_csv, parse_upload_name
+from feature_store import FeatureStore, store_path_for
+from peaks import find_peaks
+
+
+root_logger = logging.getLogger()
+
+# --- Constants ---
+ADC_FULL_SCALE = 4095  # AD7490 12비트 ADC 코드 최대값
+DEFAULT_ADC_VREF = 2.5  # ADC 기준 전압 (V)
+CAL_RESISTOR = 230.9  # IEPE 툴(iepe_gui_with_calibration.py)과 동일한 전류 환산 저항 (ohm)
+DEFAULT_CURRENT_SCALE = {"offset": 4.0, "gain": 16.0, "range": 10.0}  # IEPE 툴의 ai3 환산과 동일
+VIBRATION_CHANNELS = (0,)  # 펌웨어: CH0 = Vibration, CH1~CH3 = Current R/S/T
+TOP_PEAK_COUNT = 5
+DEFAULT_BATCH_SIZE = 64
+FEATURE_EXTENSION = ".feat"
+
+# 특징 테이블 레코드 (고정 크기, 추가 전용 파일에 그대로 기록)
+FEATURE_DTYPE = np.dtype([
+    ("timestamp", "<f8"),  # epoch seconds
+    ("channel", "u1"),
+    ("n_samples", "<u4"),
+    ("sample_rate", "<f4"),
+    ("mean", "<f4"),
+    ("rms", "<f4"),
+    ("peak", "<f4"),
+    ("crest", "<f4"),
+    ("peak_freq", "<f4", (TOP_PEAK_COUNT,)),
+    ("peak_amp", "<f4", (TOP_PEAK_COUNT,)),
+])
+
+
+class ChannelScaling:
+    """
+    Converts ADC codes to engineering units per channel: vibration channels to g through
+    the sensor sensitivity (V/g), current channels through CAL_RESISTOR and the
+    offset/gain/range scale used for ai3 in the IEPE tool.
+    ADC 코드를 채널별 공학 단위로 환산합니다. 진동 채널은 센서 감도(V/g)로 g 단위,
+    전류 채널은 CAL_RESISTOR 와 IEPE 툴 ai3 의 offset/gain/range 환산을 적용합니다.
+    """
+    def __init__(self, vref=DEFAULT_ADC_VREF, sensitivity=None, current_scale=None):
+        self.volts_per_code = float(vref) / ADC_FULL_SCALE
+        self.current_scale = dict(DEFAULT_CURRENT_SCALE, **(current_scale or {}))
+        # 채널 번호 -> 감도 조회 테이블 (배치 전체를 한 번에 인덱싱)
+        self._sensitivity = np.ones(UNKNOWN_CHANNEL + 1)
+        for name, value in (sensitivity or {}).items():
+            self._sensitivity[channel_index(name)] = float(value)
+        self._vibration = np.zeros(UNKNOWN_CHANNEL + 1, dtype=bool)
+        self._vibration[list(VIBRATION_CHANNELS)] = True
+
+    def coefficients(self, channels):
+        """Returns per-row (gain, offset) so that value = code * gain + offset."""
+        channels = np.asarray(channels, dtype=np.intp)
+        scale = self.current_scale
+        current_gain = self.volts_per_code * 1000.0 / CAL_RESISTOR / scale["gain"] * scale["range"]
+        current_offset = -scale["offset"] / scale["gain"] * scale["range"]
+        vibration = self._vibration[channels]
+        gain = np.where(vibration, self.volts_per_code / self._sensitivity[channels], current_gain)
+        offset = np.where(vibration, 0.0, current_offset)
+        return gain, offset
+
+    def apply(self, codes, channels):
+        """Scales a (captures x samples) code array into a new float64 array."""
+        gain, offset = self.coefficients(channels)
+        values = np.multiply(codes, gain[:, None], dtype=np.float64)
+        values += offset[:, None]
+        return values
+
+
+class FeatureTable:
+    """
+    Append-only per-device feature files 'root/<device>/<device>.feat' of FEATURE_DTYPE records.
+    Like the FeatureStore, a row whose (timestamp, channel) is already in the file is ignored.
+    장치별 추가 전용 특징 파일. 레코드는 FEATURE_DTYPE 고정 크기이며,
+    FeatureStore 와 같이 이미 있는 (타임스탬프, 채널) 레코드는 다시 기록하지 않습니다.
+    """
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._keys = {}  # 경로 -> (이미 읽은 바이트 수, {(타임스탬프, 채널)})
+
+    def path_for(self, device):
+        return os.path.join(self.root_dir, device, device + FEATURE_EXTENSION)
+
+    def _lock_for(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _known_keys(self, path):
+        """
+        Keys already in ``path``. Only rows appended since the last call (by any process) are read.
+        Callers hold the path lock.
+        """
+        size, keys = self._keys.get(path, (0, set()))
+        current = os.path.getsize(path) if os.path.exists(path) else 0
+        if current < size:  # 파일이 교체/삭제됨
+            size, keys = 0, set()
+        count = (current - size) // FEATURE_DTYPE.itemsize  # 기록 중인 마지막 레코드는 다음에 읽음
+        if count:
+            rows = np.fromfile(path, dtype=FEATURE_DTYPE, count=count, offset=size)
+            keys.update(zip(rows["timestamp"].tolist(), rows["channel"].tolist()))
+            size += count * FEATURE_DTYPE.itemsize
+        self._keys[path] = (size, keys)
+        return keys
+
+    def append(self, device, rows):
+        """
+        Appends the rows not stored yet with a single write and returns how many were added.
+        아직 없는 특징 레코드만 한 번의 write 로 추가하고 추가한 개수를 반환합니다.
+        """
+        if len(rows) == 0:
+            return 0
+        path = self.path_for(device)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        rows = np.ascontiguousarray(rows, dtype=FEATURE_DTYPE)
+        with self._lock_for(path):
+            with open(path, "ab") as f, file_lock(f):
+                keys = self._known_keys(path)
+                keep = []
+                for i, key in enumerate(zip(rows["timestamp"].tolist(), rows["channel"].tolist())):
+                    if key not in keys:
+                        keys.add(key)
+                        keep.append(i)
+                if not keep:
+                    return 0
+                data = rows[keep].tobytes()
+                f.seek(0, os.SEEK_END)
+                f.write(data)
+                size, _ = self._keys[path]
+                self._keys[path] = (size + len(data), keys)
+        return len(keep)
+
+    def read(self, device):
+        """Returns every feature row of ``device`` (empty array if none)."""
+        path = self.path_for(device)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=FEATURE_DTYPE)
+        return np.fromfile(path, dtype=FEATURE_DTYPE)
+
+    def keys(self, device):
+        """(timestamp, channel) pairs already analysed for ``device`` (a copy)."""
+        path = self.path_for(device)
+        with self._lock_for(path):
+            return set(self._known_keys(path))
+
+
+class BatchAnalyzer:
+    """
+    Computes capture features in batches and stores them in a FeatureTable and, when given,
+    a FeatureStore for trending. An instance is also an ingest converter:
+    ``analyzer(capture, dest_path)`` analyses a capture as it lands.
+    캡처 특징을 배치 단위로 계산하여 FeatureTable (및 추세용 FeatureStore)에 저장합니다.
+    수신 파이프라인의 변환기로도 사용됩니다.
+    """
+    def __init__(self, root_dir, scaling=None, sample_rate=DEFAULT_SAMPLE_RATE, batch_size=DEFAULT_BATCH_SIZE,
+                 store=None):
+        self.root_dir = root_dir
+        self.scaling = scaling or ChannelScaling()
+        self.sample_rate = float(sample_rate)
+        self.batch_size = max(1, int(batch_size))
+        self.table = FeatureTable(root_dir)
+        self.store = store
+
+    def analyze(self, codes, channels, timestamps, sample_rate=None):
+        """
+        Returns FEATURE_DTYPE rows for a (captures x samples) array of ADC codes.
+        All captures of one call must share the sample count and sample rate.
+        (캡처 x 샘플) ADC 코드 배열에 대한 특징 레코드를 반환합니다.
+        """
+        sample_rate = float(sample_rate or self.sample_rate)
+        codes = np.atleast_2d(codes)
+        count, n = codes.shape
+        rows = np.zeros(count, dtype=FEATURE_DTYPE)
+        rows["timestamp"] = timestamps
+        rows["channel"] = channels
+        rows["n_samples"] = n
+        rows["sample_rate"] = sample_rate
+        if n == 0:
+            return rows
+
+        values = self.scaling.apply(codes, channels)
+        mean = values.mean(axis=1)
+        values -= mean[:, None]  # 이후 지표는 AC 성분 기준
+        rms = np.sqrt(np.einsum("ij,ij->i", values, values) / n)
+        peak = np.abs(values).max(axis=1)
+        rows["mean"] = mean
+        rows["rms"] = rms
+        rows["peak"] = peak
+        rows["crest"] = np.divide(peak, rms, out=np.zeros_like(rms), where=rms > 0)
+
+        # 배치 전체에 대해 rfft 한 번
+        spectrum = np.abs(np.fft.rfft(values, axis=1))
+        spectrum *= 2.0 / n
+        spectrum[:, 0] = 0.0
+        # 국소 최댓값 + 포물선 보간 피크 (없는 자리는 0: 롤업 합계에 nan 이 섞이지 않도록)
+        freqs = np.fft.rfftfreq(n, 1.0 / sample_rate)
+        peak_freq, peak_amp = find_peaks(spectrum, freqs, TOP_PEAK_COUNT)
+        rows["peak_freq"] = np.nan_to_num(peak_freq)
+        rows["peak_amp"] = peak_amp
+        return rows
+
+    def __call__(self, capture, dest_path):
+        timestamp = (capture.timestamp or datetime.now()).timestamp()
+        rows = self.analyze(capture.samples, [channel_index(capture.channel)], [timestamp])
+        self._store(capture.device, rows)
+
+    def _store(self, device, rows):
+        self.table.append(device, rows)
+        if self.store is not None:
+            self.store.add(device, rows)
+
+    def _analyze_group(self, device, sample_rate, items):
+        """Analyses items [(channel, timestamp, samples)] of one device/length in batch_size chunks."""
+        for i in range(0, len(items), self.batch_size):
+            chunk = items[i:i + self.batch_size]
+            codes = np.stack([samples for _, _, samples in chunk])
+            rows = self.analyze(codes, [c for c, _, _ in chunk], [t for _, t, _ in chunk], sample_rate)
+            self._store(device, rows)
+
+    def _backlog_items(self, start, end, device):
+        """Yields (device, channel, timestamp, sample_rate, samples) from archives and filed CSVs."""
+        index = CaptureIndex(self.root_dir)
+        try:
+            index.refresh()
+            for path, record in index.query(start, end, device):
+                yield record.device, record.channel, record.timestamp, record.sample_rate, index.load(path, record)
+        finally:
+            index.close()
+
+        start_ts = start.timestamp() if isinstance(start, datetime) else start
+        end_ts = end.timestamp() if isinstance(end, datetime) else end
+        for dirpath, _, filenames in os.walk(self.root_dir):
+            for name in filenames:
+                if not name.lower().endswith(".csv"):
+                    continue
+                prefix, channel_name, _ = parse_upload_name(name, None)
+                if device is not None and prefix != device:
+                    continue
+                try:
+                    capture = parse_device_csv(os.path.join(dirpath, name), device=prefix, channel=channel_name)
+                except (OSError, ValueError) as e:
+                    root_logger.error(f"Skipping '{name}' in analytics backlog: {e}")
+                    continue
+                if capture.timestamp is None:
+                    continue
+                ts = capture.timestamp.timestamp()
+                if (start_ts is None or ts >= start_ts) and (end_ts is None or ts < end_ts):
+                    yield prefix, channel_index(channel_name), ts, self.sample_rate, capture.samples
+
+    def run_backlog(self, start=None, end=None, device=None, skip_existing=True):
+        """
+        Analyses every stored capture in [start, end) that is not in the feature table yet.
+        A group is analysed as soon as it holds batch_size captures, so memory does not grow
+        with the backlog. skip_existing=False analyses every capture again; rows already in
+        the feature table or store are still ignored, so this only fills in missing rows
+        (e.g. a newly enabled feature store). Returns the number of captures analysed.
+        [start, end) 범위의 저장된 캡처 중 아직 분석하지 않은 캡처를 분석합니다. 그룹이 batch_size 개가
+        되는 즉시 분석하므로 메모리는 백로그 크기와 무관합니다. 분석한 캡처 수를 반환합니다.
+        """
+        known = {}
+        groups = {}  # (장치, 샘플 수, 샘플링 주파수) -> [(채널, 타임스탬프, 샘플)], 최대 batch_size 개
+        analysed = 0
+        for dev, channel, ts, rate, samples in self._backlog_items(start, end, device):
+            if skip_existing:
+                if dev not in known:
+                    known[dev] = self.table.keys(dev)
+                if (ts, channel) in known[dev]:
+                    continue
+                known[dev].add((ts, channel))
+            key = (dev, len(samples), rate)
+            items = groups.setdefault(key, [])
+            # 아카이브 뷰는 인덱스를 닫으면 무효가 되므로 복사 (그룹당 batch_size 개까지만 보관)
+            items.append((channel, ts, np.array(samples)))
+            if len(items) >= self.batch_size:
+                self._analyze_group(dev, rate, groups.pop(key))
+                analysed += len(items)
+
+        for (dev, _, rate), items in groups.items():
+            self._analyze_group(dev, rate, items)
+            analysed += len(items)
+        return analysed
+
+
+def build_analyzer(config):
+    """Creates a BatchAnalyzer from the analytics_* config values. 설정 값으로 분석기를 생성합니다."""
+    scaling = ChannelScaling(vref=config["analytics_adc_vref"],
+                             sensitivity=config["analytics_sensitivity"],
+                             current_scale=config["analytics_current_scale"])
+    store = FeatureStore(store_path_for(config)) if config["feature_store_enabled"] else None
+    return BatchAnalyzer(config["root_dir"], scaling, sample_rate=config["device_sample_rate"],
+                         batch_size=config["analytics_batch_size"], store=store)
+
+
+def _parse_day(text):
+    return datetime.strptime(text, "%Y%m%d") if text else None
+
+
+def main(argv=None):
+    from ftp_core import Config
+
+    parser = argparse.ArgumentParser(description="Analyse stored captures into per-device feature tables.")
+    parser.add_argument("--config", default="config.json", help="config file path (default: config.json)")
+    parser.add_argument("--device", help="only this device")
+    parser.add_argument("--start", help="first day, YYYYMMDD")
+    parser.add_argument("--end", help="day after the last day, YYYYMMDD")
+    parser.add_argument("--all", action="store_true",
+                        help="re-analyse captures already in the feature table (existing rows are kept, "
+                             "only missing table/store rows are added)")
+    parser.add_argument("--sync-store", action="store_true",
+                        help="also import existing feature tables into the feature store")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    analyzer = build_analyzer(Config(args.config))
+    count = analyzer.run_backlog(_parse_day(args.start), _parse_day(args.end), args.device,
+                                 skip_existing=not args.all)
+    root_logger.info(f"Analysed {count} captures.")
+    if args.sync_store and analyzer.store is not None:
+        for name in sorted(os.listdir(analyzer.root_dir)):
+            if os.path.exists(analyzer.table.path_for(name)) and (args.device is None or name == args.device):
+                added = analyzer.store.sync_from_table(analyzer.table, name)
+                root_logger.info(f"Imported {added} feature rows for '{name}' into the feature store.")
+    if analyzer.store is not None:
+        analyzer.store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
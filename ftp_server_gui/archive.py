@@ -0,0 +1,495 @@
+import os
+import mmap
+import bisect
+import struct
+import threading
+import zlib
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import lz4.frame as lz4_frame  # 선택 의존성: 설치되어 있을 때만 lz4 압축 사용
+except ImportError:
+    lz4_frame = None
+try:
+    import fcntl  # POSIX 전용: multiprocess 서버 모드의 프로세스 간 추가 기록 잠금
+except ImportError:
+    fcntl = None
+
+
+root_logger = logging.getLogger()
+
+# --- Archive format constants ---
+# 아카이브(.mroa) 파일 형식 상수
+ARCHIVE_EXTENSION = ".mroa"
+FILE_MAGIC = b"MROA"
+RECORD_MAGIC = b"CAPT"
+FORMAT_VERSION = 1
+RECORD_ALIGN = 8  # 레코드 시작 위치를 8바이트 단위로 정렬 (메모리 맵 뷰용)
+DEFAULT_SAMPLE_RATE = 10000.0  # 펌웨어 TimerInit(100) -> 100 usec = 10 kHz
+
+# File header: magic, format version, record header size, reserved
+# 파일 헤더: 매직, 형식 버전, 레코드 헤더 크기, 예약
+FILE_HEADER = struct.Struct("<4sHH8x")
+# Record header: magic, version, flags, codec, channel, n_samples, timestamp(epoch s),
+# sample rate, payload size, crc32(of decoded samples), device name, channel label
+# 레코드 헤더: 매직, 버전, 플래그, 코덱, 채널, 샘플 수, 타임스탬프, 샘플링 주파수, 페이로드 크기, CRC32, 장치 이름, 채널 라벨
+RECORD_HEADER = struct.Struct("<4sBBBBIdfII32s16s")
+
+FLAG_DELTA = 0x01
+UNKNOWN_CHANNEL = 0xFF
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_LZ4 = 2
+CODECS = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "lz4": CODEC_LZ4}
+
+
+class ArchiveError(Exception):
+    """Raised for malformed archive files or unsupported codecs. 아카이브 형식 오류."""
+
+
+def archive_path_for(dest_path):
+    """
+    Maps a filed CSV path 'root/<device>/<date>/<CH>/<file>.csv' to the per-device/day
+    archive 'root/<device>/<date>/<date>.mroa'.
+    분류 저장된 CSV 경로를 장치/일자별 아카이브 경로로 변환합니다.
+    """
+    day_dir = os.path.dirname(os.path.dirname(dest_path))
+    return os.path.join(day_dir, os.path.basename(day_dir) + ARCHIVE_EXTENSION)
+
+
+def channel_index(channel_name):
+    """'CH2' -> 2; anything unparsable -> UNKNOWN_CHANNEL."""
+    try:
+        return int(str(channel_name).upper().replace("CH", ""))
+    except (TypeError, ValueError):
+        return UNKNOWN_CHANNEL
+
+
+def _padding(size):
+    return (-size) % RECORD_ALIGN
+
+
+def _fixed(text, size):
+    return (text or "").encode("utf-8")[:size]
+
+
+def _unfixed(raw):
+    return raw.rstrip(b"\x00").decode("utf-8", errors="replace")
+
+
+@contextmanager
+def file_lock(f):
+    """
+    Holds an exclusive advisory lock on an open file, so appends from forked server processes
+    (multiprocess mode) do not interleave. No-op where fcntl is unavailable (Windows has no
+    multiprocess mode, and threads are already serialised by per-path locks).
+    열린 파일에 프로세스 간 배타 잠금을 겁니다 (multiprocess 모드의 세션 프로세스끼리 추가 기록이 섞이지 않도록).
+    """
+    if fcntl is None:
+        yield f
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        yield f
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def encode_samples(samples, codec=CODEC_ZLIB, delta=True):
+    """
+    Encodes uint16 samples into a record payload. Delta coding uses modulo-2^16
+    differences, so decoding with a uint16 cumulative sum is lossless.
+    uint16 샘플을 레코드 페이로드로 인코딩합니다. (델타는 2^16 모듈러 차분이므로 무손실)
+    """
+    data = np.ascontiguousarray(samples, dtype="<u2")
+    if delta:
+        data = np.diff(data, prepend=np.uint16(0)).astype("<u2", copy=False)
+    raw = data.tobytes()
+    if codec == CODEC_NONE:
+        return raw
+    if codec == CODEC_ZLIB:
+        return zlib.compress(raw, 6)
+    if codec == CODEC_LZ4:
+        if lz4_frame is None:
+            raise ArchiveError("lz4 codec requested but the 'lz4' package is not installed.")
+        return lz4_frame.compress(raw)
+    raise ArchiveError(f"Unknown codec id: {codec}")
+
+
+def decode_samples(payload, n_samples, codec, delta):
+    """Decodes a record payload back into a uint16 array. 페이로드를 uint16 배열로 복원합니다."""
+    if codec == CODEC_NONE:
+        raw = payload
+    elif codec == CODEC_ZLIB:
+        raw = zlib.decompress(payload)
+    elif codec == CODEC_LZ4:
+        if lz4_frame is None:
+            raise ArchiveError("Archive uses lz4 but the 'lz4' package is not installed.")
+        raw = lz4_frame.decompress(payload)
+    else:
+        raise ArchiveError(f"Unknown codec id: {codec}")
+    data = np.frombuffer(raw, dtype="<u2", count=n_samples)
+    if delta:
+        return np.cumsum(data, dtype=np.uint16)
+    return data
+
+
+class ArchiveRecord:
+    """
+    Header of one capture stored in an archive, plus its payload location.
+    아카이브에 저장된 캡처 1개의 헤더와 페이로드 위치.
+    """
+    __slots__ = ("device", "channel", "label", "timestamp", "sample_rate", "n_samples",
+                 "codec", "flags", "crc32", "offset", "payload_offset", "payload_size")
+
+    def __init__(self, device, channel, label, timestamp, sample_rate, n_samples,
+                 codec, flags, crc32, offset, payload_offset, payload_size):
+        self.device = device
+        self.channel = channel
+        self.label = label
+        self.timestamp = timestamp  # epoch seconds (float)
+        self.sample_rate = sample_rate
+        self.n_samples = n_samples
+        self.codec = codec
+        self.flags = flags
+        self.crc32 = crc32
+        self.offset = offset
+        self.payload_offset = payload_offset
+        self.payload_size = payload_size
+
+    @property
+    def datetime(self):
+        return datetime.fromtimestamp(self.timestamp)
+
+    @property
+    def delta(self):
+        return bool(self.flags & FLAG_DELTA)
+
+    def __repr__(self):
+        return (f"ArchiveRecord(device={self.device!r}, channel={self.channel}, "
+                f"time={self.datetime:%Y-%m-%d %H:%M:%S}, n={self.n_samples}, offset={self.offset})")
+
+
+def _parse_record_header(buf, offset):
+    (magic, version, flags, codec, channel, n_samples, timestamp, sample_rate,
+     payload_size, crc32, device, label) = RECORD_HEADER.unpack_from(buf, offset)
+    if magic != RECORD_MAGIC:
+        raise ArchiveError(f"Bad record magic at offset {offset}")
+    if version != FORMAT_VERSION:
+        raise ArchiveError(f"Unsupported record version {version} at offset {offset}")
+    payload_offset = offset + RECORD_HEADER.size
+    return ArchiveRecord(_unfixed(device), channel, _unfixed(label), timestamp, sample_rate, n_samples,
+                         codec, flags, crc32, offset, payload_offset, payload_size)
+
+
+class ArchiveWriter:
+    """
+    Append-only writer for per-device/day capture archives. An instance is also an
+    ingest converter: ``writer(capture, dest_path)`` appends the capture to the archive
+    that belongs next to ``dest_path``.
+    장치/일자별 캡처 아카이브의 추가 전용(append-only) 기록기. 수신 파이프라인의 변환기로도 사용됩니다.
+    """
+    def __init__(self, compression="none", delta=False, sample_rate=DEFAULT_SAMPLE_RATE):
+        if compression not in CODECS:
+            raise ArchiveError(f"Unknown archive compression '{compression}'. Use one of {sorted(CODECS)}.")
+        if compression == "lz4" and lz4_frame is None:
+            root_logger.warning("lz4 package not installed; archive compression falls back to zlib.")
+            compression = "zlib"
+        self.codec = CODECS[compression]
+        self.delta = bool(delta)
+        self.sample_rate = float(sample_rate)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def __call__(self, capture, dest_path):
+        return self.append(archive_path_for(dest_path), capture.samples, capture.device, capture.channel,
+                           capture.timestamp or datetime.now(), label=capture.label)
+
+    def append(self, path, samples, device, channel, timestamp, label=None, sample_rate=None):
+        """
+        Appends one capture as a record and returns its byte offset in the archive.
+        캡처 1개를 레코드로 추가하고 아카이브 내 바이트 오프셋을 반환합니다.
+        """
+        samples = np.ascontiguousarray(samples, dtype="<u2")
+        payload = encode_samples(samples, self.codec, self.delta)
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        header = RECORD_HEADER.pack(
+            RECORD_MAGIC, FORMAT_VERSION, FLAG_DELTA if self.delta else 0, self.codec,
+            channel_index(channel) if not isinstance(channel, int) else channel,
+            len(samples), float(timestamp), float(sample_rate or self.sample_rate),
+            len(payload), zlib.crc32(samples.tobytes()), _fixed(device, 32), _fixed(label, 16)
+        )
+        record = header + payload + b"\x00" * _padding(len(payload))
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock_for(path):
+            with open(path, "ab") as f, file_lock(f):
+                f.seek(0, os.SEEK_END)  # 잠금을 기다리는 동안 다른 프로세스가 추가했을 수 있음
+                if f.tell() == 0:
+                    f.write(FILE_HEADER.pack(FILE_MAGIC, FORMAT_VERSION, RECORD_HEADER.size))
+                offset = f.tell()
+                if offset % RECORD_ALIGN:
+                    # 비정상 종료로 잘린 레코드 뒤: 다음 레코드를 정렬 위치에서 시작해야 resync() 로 찾을 수 있음
+                    f.write(b"\x00" * _padding(offset))
+                    offset += _padding(offset)
+                f.write(record)
+        return offset
+
+
+class ArchiveReader:
+    """
+    Reads records from a capture archive and returns samples as NumPy arrays without any text parsing.
+    캡처 아카이브에서 레코드를 읽어 텍스트 파싱 없이 NumPy 배열로 반환합니다.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        magic, version, record_header_size = FILE_HEADER.unpack(self._file.read(FILE_HEADER.size))
+        if magic != FILE_MAGIC:
+            raise ArchiveError(f"'{path}' is not an MRO capture archive.")
+        if version != FORMAT_VERSION or record_header_size != RECORD_HEADER.size:
+            raise ArchiveError(f"Unsupported archive version {version} in '{path}'.")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def records(self):
+        """Yields every record header in file order, skipping over payloads."""
+        size = os.fstat(self._file.fileno()).st_size
+        offset = FILE_HEADER.size
+        while True:
+            self._file.seek(offset)
+            buf = self._file.read(RECORD_HEADER.size)
+            if len(buf) < RECORD_HEADER.size:
+                return  # 파일 끝 (또는 기록 중 잘린 마지막 레코드)
+            record = _parse_record_header(buf, 0)
+            record.offset = offset
+            record.payload_offset = offset + RECORD_HEADER.size
+            if record.payload_offset + record.payload_size > size:
+                return  # 기록 중인 마지막 레코드
+            yield record
+            offset = record.payload_offset + record.payload_size + _padding(record.payload_size)
+
+    def __iter__(self):
+        return self.records()
+
+    def read(self, record, verify=False):
+        """Returns the samples of one record as a uint16 array. 레코드 1개의 샘플을 반환합니다."""
+        self._file.seek(record.payload_offset)
+        payload = self._file.read(record.payload_size)
+        data = decode_samples(payload, record.n_samples, record.codec, record.delta)
+        if verify and zlib.crc32(data.tobytes()) != record.crc32:
+            raise ArchiveError(f"CRC mismatch for record at offset {record.offset} in '{self.path}'.")
+        return data
+
+    def read_all(self, channel=None):
+        """
+        Returns (records, samples) for every capture (optionally one channel), with samples
+        stacked into a 2-D (captures x n_samples) array when all captures have the same length.
+        모든 캡처(선택적으로 특정 채널)를 (레코드 목록, 샘플 배열)로 반환합니다.
+        """
+        if channel is not None and not isinstance(channel, int):
+            channel = channel_index(channel)
+        records = [r for r in self.records() if channel is None or r.channel == channel]
+        arrays = [self.read(r) for r in records]
+        if arrays and all(len(a) == len(arrays[0]) for a in arrays):
+            return records, np.stack(arrays)
+        return records, arrays
+
+
+class MappedArchive:
+    """
+    Memory-mapped view of one archive. Uncompressed, non-delta records (the default archive
+    settings) are returned as zero-copy read-only views into the mapping; records written with
+    zlib/lz4 or delta coding trade that for disk space and are decoded on demand.
+    아카이브 1개의 메모리 맵 뷰. 압축/델타가 없는 레코드(기본 설정)는 복사 없는 읽기 전용 뷰로 반환하고,
+    zlib/lz4 또는 델타 레코드는 디스크 용량 대신 필요할 때 복원합니다.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._mm = None
+        self.size = 0
+        self.remap()
+
+    def remap(self):
+        """(Re)maps the file so records appended since the last call become visible."""
+        size = os.path.getsize(self.path)
+        if self._mm is not None and size == self.size:
+            return False
+        if self._file is None:
+            self._file = open(self.path, "rb")
+        # 기존 맵은 내보낸 뷰가 남아 있을 수 있으므로 닫지 않고 GC 에 맡김
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = size
+        magic, version, record_header_size = FILE_HEADER.unpack_from(self._mm, 0)
+        if magic != FILE_MAGIC or version != FORMAT_VERSION or record_header_size != RECORD_HEADER.size:
+            raise ArchiveError(f"'{self.path}' is not a supported MRO capture archive.")
+        return True
+
+    def close(self):
+        self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def records(self, start_offset=FILE_HEADER.size):
+        """Yields record headers parsed directly from the mapping, starting at ``start_offset``."""
+        offset = start_offset
+        while offset + RECORD_HEADER.size <= self.size:
+            record = _parse_record_header(self._mm, offset)
+            end = record.payload_offset + record.payload_size
+            if end > self.size:
+                return  # 기록 중인 마지막 레코드
+            yield record
+            offset = end + _padding(record.payload_size)
+
+    def resync(self, offset):
+        """
+        Offset of the first valid record header after the corrupt record at ``offset``, or None.
+        손상된 레코드 다음의 정상 레코드 위치를 찾습니다. (없으면 None)
+        """
+        pos = offset + RECORD_ALIGN
+        while True:
+            pos = self._mm.find(RECORD_MAGIC, pos, self.size)
+            if pos < 0 or pos + RECORD_HEADER.size > self.size:
+                return None
+            if pos % RECORD_ALIGN == 0:
+                try:
+                    _parse_record_header(self._mm, pos)
+                    return pos
+                except (ValueError, struct.error, ArchiveError):
+                    pass
+            pos += 1
+
+    def view(self, record):
+        """
+        Returns the samples of ``record``. Zero-copy for CODEC_NONE without delta coding.
+        레코드의 샘플을 반환합니다. (무압축/비델타 레코드는 복사 없음)
+        """
+        if record.codec == CODEC_NONE and not record.delta:
+            return np.frombuffer(self._mm, dtype="<u2", count=record.n_samples, offset=record.payload_offset)
+        payload = self._mm[record.payload_offset:record.payload_offset + record.payload_size]
+        return decode_samples(payload, record.n_samples, record.codec, record.delta)
+
+
+class CaptureIndex:
+    """
+    Time index over every archive under ``root_dir``, keyed by (device, channel, timestamp)
+    and mapping each capture to its archive and byte offset. ``refresh()`` is incremental:
+    archives are append-only, so only records written since the last scan are read.
+    root_dir 아래 모든 아카이브에 대한 시간 인덱스. (장치, 채널, 타임스탬프) -> (아카이브, 바이트 오프셋).
+    아카이브는 추가 전용이므로 refresh() 는 마지막 스캔 이후 추가된 레코드만 읽습니다.
+    """
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self._archives = {}  # path -> MappedArchive
+        self._scanned = {}  # path -> 다음 스캔 시작 오프셋
+        self._keys = {}  # (device, channel, timestamp) -> ArchiveRecord
+        self._corrupt = {}  # path -> 이미 보고한 손상 레코드 오프셋
+        self._times = []  # 정렬된 타임스탬프 목록 (bisect 용)
+        self._entries = []  # _times 와 같은 순서의 (path, record)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def refresh(self):
+        """Indexes new archives and records appended since the last call. Returns the number added."""
+        new_entries = []
+        for dirpath, _, filenames in os.walk(self.root_dir):
+            for name in filenames:
+                if name.endswith(ARCHIVE_EXTENSION):
+                    self._scan(os.path.join(dirpath, name), new_entries)
+        if new_entries:
+            # 레코드마다 insert 하면 O(n^2) 이므로 한 번에 정렬 (기존 목록은 이미 정렬되어 있어 병합에 가까움)
+            self._entries.extend(new_entries)
+            self._entries.sort(key=lambda entry: entry[1].timestamp)
+            self._times = [record.timestamp for _, record in self._entries]
+        return len(new_entries)
+
+    def _scan(self, path, new_entries):
+        archive = self._archives.get(path)
+        try:
+            if archive is None:
+                archive = self._archives[path] = MappedArchive(path)
+            else:
+                archive.remap()
+        except (OSError, ValueError, ArchiveError) as e:
+            root_logger.error(f"Skipping archive '{path}': {e}")
+            return
+
+        offset = self._scanned.get(path, FILE_HEADER.size)
+        while True:
+            try:
+                for record in archive.records(offset):
+                    self._keys[(record.device, record.channel, record.timestamp)] = (path, record)
+                    new_entries.append((path, record))
+                    offset = record.payload_offset + record.payload_size + _padding(record.payload_size)
+                break
+            except (ValueError, struct.error, ArchiveError) as e:
+                # 손상된 레코드: 건너뛰고 다음 정상 레코드부터 계속 (같은 위치는 한 번만 기록)
+                if self._corrupt.get(path) != offset:
+                    self._corrupt[path] = offset
+                    root_logger.error(f"Skipping corrupt record in '{path}' at offset {offset}: {e}")
+                next_offset = archive.resync(offset)
+                if next_offset is None:
+                    break  # 뒤에 정상 레코드가 아직 없음: 다음 refresh() 에서 다시 찾음
+                offset = next_offset
+        self._scanned[path] = offset
+
+    def lookup(self, device, channel, timestamp):
+        """Returns (archive path, record) for an exact key, or None."""
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        if not isinstance(channel, int):
+            channel = channel_index(channel)
+        return self._keys.get((device, channel, float(timestamp)))
+
+    def query(self, start=None, end=None, device=None, channel=None):
+        """
+        Returns the (path, record) pairs with start <= timestamp < end, in time order.
+        start <= 타임스탬프 < end 인 (경로, 레코드) 목록을 시간순으로 반환합니다.
+        """
+        if isinstance(start, datetime):
+            start = start.timestamp()
+        if isinstance(end, datetime):
+            end = end.timestamp()
+        if channel is not None and not isinstance(channel, int):
+            channel = channel_index(channel)
+        lo = 0 if start is None else bisect.bisect_left(self._times, start)
+        hi = len(self._times) if end is None else bisect.bisect_left(self._times, end)
+        return [(path, record) for path, record in self._entries[lo:hi]
+                if (device is None or record.device == device) and (channel is None or record.channel == channel)]
+
+    def load(self, path, record):
+        """Returns the samples of one indexed capture as an ndarray (a zero-copy view when possible)."""
+        return self._archives[path].view(record)
+
+    def load_range(self, start=None, end=None, device=None, channel=None):
+        """
+        Returns (records, arrays) for a time-range query; arrays are views into the memory maps.
+        시간 범위 조회 결과를 (레코드 목록, 배열 목록)으로 반환합니다. 배열은 메모리 맵의 뷰입니다.
+        """
+        hits = self.query(start, end, device, channel)
+        return [record for _, record in hits], [self.load(path, record) for path, record in hits]
+
+    def close(self):
+        for archive in self._archives.values():
+            archive.close()
+        self._archives.clear()
@@ -0,0 +1,181 @@
+import os
+import re
+import json
+import time
+import threading
+import logging
+from collections import deque
+from datetime import datetime
+
+
+root_logger = logging.getLogger()
+
+# --- Constants ---
+DEFAULT_REGISTRY_FILE = "devices.json"
+UNKNOWN_DEVICE = "Unknown Device"
+RATE_WINDOW_S = 60.0  # files/min 계산 구간
+MAX_DEVICE_NAME_LENGTH = 32  # 아카이브 레코드의 device 필드 크기와 동일
+# 펌웨어 파일 이름 형식: [Model]_CHn_YYYYMMDD_HHMMSS.csv
+UPLOAD_NAME_PATTERN = re.compile(r"^\[([^\[\]/\\]+)\]_CH\d+_")
+
+
+class DeviceStats:
+    """
+    Per-device receive statistics. 장치별 수신 통계.
+    """
+    __slots__ = ("name", "registered_at", "files", "bytes", "last_seen", "_recent")
+
+    def __init__(self, name, registered_at=None):
+        self.name = name
+        self.registered_at = registered_at or datetime.now().isoformat(timespec="seconds")
+        self.files = 0
+        self.bytes = 0
+        self.last_seen = None  # datetime
+        self._recent = deque()  # 최근 RATE_WINDOW_S 초 이내 수신 시각 (time.monotonic)
+
+    def record(self, nbytes, files=1, now=None):
+        now = time.monotonic() if now is None else now
+        self.files += files
+        self.bytes += nbytes
+        self.last_seen = datetime.now()
+        self._recent.extend([now] * files)
+        self._prune(now)
+
+    def _prune(self, now):
+        cutoff = now - RATE_WINDOW_S
+        while self._recent and self._recent[0] < cutoff:
+            self._recent.popleft()
+
+    def files_per_minute(self, now=None):
+        self._prune(time.monotonic() if now is None else now)
+        return len(self._recent) * 60.0 / RATE_WINDOW_S
+
+    def snapshot(self):
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "files_per_min": round(self.files_per_minute(), 2),
+            "last_seen": self.last_seen.isoformat(timespec="seconds") if self.last_seen else None,
+            "registered_at": self.registered_at,
+        }
+
+
+class DeviceRegistry:
+    """
+    Known devices keyed by their upload prefix, with O(1) lookup and per-device stats.
+    With ``auto_register`` a new '[Model]_CHn_' prefix is registered the first time it arrives
+    and written to ``path``, so adding a board needs no config edit or restart.
+    업로드 접두사로 조회하는 장치 목록(O(1) 조회)과 장치별 통계.
+    auto_register 가 켜져 있으면 처음 보는 '[Model]_CHn_' 접두사를 자동 등록하고 path 에 저장합니다.
+
+    The saved file is merged rather than overwritten, so forked session processes
+    (multiprocess mode) that each register a device do not drop each other's entries.
+    저장 시 기존 파일과 병합하므로 multiprocess 모드에서 세션 프로세스끼리 등록 내용을 덮어쓰지 않습니다.
+    """
+    def __init__(self, names=(), path=None, auto_register=True, on_register=None):
+        self.path = path
+        self.auto_register = auto_register
+        self.on_register = on_register  # 새 장치 등록 시 장치 이름으로 호출되는 콜백
+        self._lock = threading.Lock()
+        self._devices = {}  # 이름 -> DeviceStats (삽입 순서 = 표시 순서)
+        for name in names:
+            self._devices.setdefault(name, DeviceStats(name))
+        if path:
+            self.load()
+
+    def __contains__(self, name):
+        return name in self._devices
+
+    def __len__(self):
+        return len(self._devices)
+
+    def names(self):
+        with self._lock:
+            return list(self._devices)
+
+    def load(self):
+        """Adds the devices saved in ``path``. 저장된 장치 목록을 불러옵니다."""
+        entries = self._read_file()
+        with self._lock:
+            for name, info in entries.items():
+                if name not in self._devices:
+                    self._devices[name] = DeviceStats(name, info.get("registered_at"))
+
+    def _read_file(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get("devices", {}) if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            root_logger.error(f"Failed to load device registry '{self.path}': {e}")
+            return {}
+
+    def save(self):
+        """Writes the device list, merged with the file on disk, via a temp file + os.replace."""
+        if not self.path:
+            return
+        entries = self._read_file()
+        with self._lock:
+            for name, stats in self._devices.items():
+                entries.setdefault(name, {})["registered_at"] = stats.registered_at
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"devices": entries}, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            root_logger.error(f"Failed to save device registry '{self.path}': {e}")
+
+    def register(self, name):
+        """Registers ``name`` if it is new. Returns True when it was added. 새 장치를 등록합니다."""
+        with self._lock:
+            if name in self._devices:
+                return False
+            self._devices[name] = DeviceStats(name)
+        self.save()
+        if self.on_register:
+            self.on_register(name)
+        return True
+
+    def resolve(self, prefix):
+        """
+        Maps an upload prefix to a device name. Returns (name, registered_now).
+        Unknown prefixes are auto-registered when allowed, otherwise mapped to UNKNOWN_DEVICE.
+        업로드 접두사를 장치 이름으로 변환합니다. 반환값: (이름, 이번에 새로 등록되었는지 여부)
+        """
+        if prefix in self._devices:
+            return prefix, False
+        if not self.auto_register or not is_valid_device_name(prefix):
+            return UNKNOWN_DEVICE, False
+        return prefix, self.register(prefix)
+
+    def record(self, name, nbytes=0, files=1):
+        """Counts received files for ``name``. Unregistered names are ignored (returns None)."""
+        with self._lock:
+            stats = self._devices.get(name)
+            if stats is not None:
+                stats.record(nbytes, files)
+            return stats
+
+    def stats(self, name):
+        return self._devices.get(name)
+
+    def snapshot(self):
+        """Returns {name: stats dict} for status files and the status channel."""
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in self._devices.items()}
+
+
+def is_valid_device_name(name):
+    """A prefix is registrable if it is short, printable and usable as a folder name."""
+    return (0 < len(name.encode("utf-8")) <= MAX_DEVICE_NAME_LENGTH
+            and name == name.strip() and name.isprintable()
+            and not any(c in name for c in '<>:"/\\|?*'))
+
+
+def device_prefix_from_name(filename):
+    """Returns the '[Model]' prefix of a firmware upload name, or None. 펌웨어 파일 이름의 장치 접두사."""
+    match = UPLOAD_NAME_PATTERN.match(filename)
+    return match.group(1) if match else None
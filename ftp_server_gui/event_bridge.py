@@ -0,0 +1,84 @@
+import threading
+from collections import deque
+
+
+# --- Constants ---
+DEFAULT_MAX_PENDING_LOG_LINES = 1000  # 로그 창 최대 줄 수와 동일 (이보다 오래된 줄은 어차피 화면에서 잘림)
+
+
+class EventBuffer:
+    """
+    Thread-safe buffer between the status channel and the GUI thread. Producers push log
+    lines and device updates from any thread; the GUI drains everything once per frame.
+    Repeated device updates within a frame are coalesced into one, and log lines beyond
+    ``max_log_lines`` are dropped oldest-first.
+    상태 채널과 GUI 스레드 사이의 스레드 안전 버퍼. 생산자는 어느 스레드에서든 로그/장치 갱신을 넣고,
+    GUI 는 프레임마다 한 번에 가져갑니다. 한 프레임 내 같은 장치 갱신은 하나로 병합되며,
+    max_log_lines 를 넘는 로그는 오래된 것부터 버립니다.
+    """
+    def __init__(self, max_log_lines=DEFAULT_MAX_PENDING_LOG_LINES):
+        self._lock = threading.Lock()
+        self._logs = deque()
+        self._max_log_lines = max_log_lines
+        self._devices = {}  # 장치 접두사 -> [이번 프레임 수신 파일 수, 바이트 수]
+        self._server_events = []  # (state, detail) - 드물게 발생하므로 순서대로 모두 보존
+        self._metrics = None  # 최신 값만 유지
+        # counters
+        self.received = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def push_log(self, msg):
+        with self._lock:
+            self.received += 1
+            self._logs.append(msg)
+            if len(self._logs) > self._max_log_lines:
+                self._logs.popleft()
+                self.dropped += 1
+
+    def push_device(self, prefix, nbytes=0):
+        with self._lock:
+            self.received += 1
+            entry = self._devices.get(prefix)
+            if entry is not None:
+                self.coalesced += 1
+                entry[0] += 1
+                entry[1] += nbytes
+            else:
+                self._devices[prefix] = [1, nbytes]
+
+    def push_server(self, state, detail=""):
+        with self._lock:
+            self.received += 1
+            self._server_events.append((state, detail))
+
+    def push_metrics(self, metrics):
+        with self._lock:
+            self.received += 1
+            if self._metrics is not None:
+                self.coalesced += 1
+            self._metrics = metrics
+
+    def drain(self):
+        """
+        Takes everything pushed since the last call.
+        Returns (log_lines, device_updates{prefix: [files, bytes]}, server_events, metrics or None).
+        마지막 호출 이후 쌓인 이벤트를 모두 꺼냅니다.
+        """
+        with self._lock:
+            logs = list(self._logs)
+            devices = self._devices
+            server_events = self._server_events
+            metrics = self._metrics
+            self._logs.clear()
+            self._devices = {}
+            self._server_events = []
+            self._metrics = None
+            self.delivered += len(logs) + len(devices) + len(server_events) + (metrics is not None)
+        return logs, devices, server_events, metrics
+
+    def counters(self):
+        with self._lock:
+            return {"received": self.received, "delivered": self.delivered,
+                    "coalesced": self.coalesced, "dropped": self.dropped}
@@ -0,0 +1,234 @@
+"""
+Embedded per-device time-series store for capture features (SQLite). Every capture row
+is kept, and hourly / daily min / mean / max rollups are updated as rows arrive, so
+trend queries over months read a few thousand pre-aggregated rows instead of the FTP tree.
+캡처 특징값의 장치별 시계열 저장소 (SQLite). 캡처별 원본 행과 함께 시간/일 단위
+min / mean / max 집계를 수신 시점에 갱신하여, 수개월 추세 조회도 집계 행만 읽습니다.
+
+    python feature_store.py --config config.json --device "Main FAN" --channel CH0 --metric rms
+"""
+import os
+import sys
+import sqlite3
+import argparse
+import threading
+import logging
+from datetime import datetime
+
+import numpy as np
+
+
+root_logger = logging.getLogger()
+
+# --- Constants ---
+DEFAULT_STORE_NAME = "features.sqlite"
+# 집계 대상 특징값 (FEATURE_DTYPE 필드; peak_freq/peak_amp 는 최대 피크 값)
+ROLLUP_METRICS = ("mean", "rms", "peak", "crest", "peak_freq", "peak_amp")
+RESOLUTIONS = {"hour": 3600, "day": 86400}  # 집계 단위 -> 초
+DEFAULT_MAX_POINTS = 2000  # resolution="auto" 에서 반환할 최대 점 수
+
+_CAPTURE_COLUMNS = ", ".join(f"{m} REAL" for m in ROLLUP_METRICS)
+_ROLLUP_COLUMNS = ", ".join(f"{m}_min REAL, {m}_sum REAL, {m}_max REAL" for m in ROLLUP_METRICS)
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS captures (
+    device TEXT NOT NULL, channel INTEGER NOT NULL, ts REAL NOT NULL, {_CAPTURE_COLUMNS},
+    PRIMARY KEY (device, channel, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    device TEXT NOT NULL, channel INTEGER NOT NULL, resolution INTEGER NOT NULL, bucket REAL NOT NULL,
+    count INTEGER NOT NULL, {_ROLLUP_COLUMNS},
+    PRIMARY KEY (device, channel, resolution, bucket)
+) WITHOUT ROWID;
+"""
+_INSERT_CAPTURE = (f"INSERT OR IGNORE INTO captures (device, channel, ts, {', '.join(ROLLUP_METRICS)}) "
+                   f"VALUES (?, ?, ?{', ?' * len(ROLLUP_METRICS)})")
+_UPSERT_ROLLUP = (
+    "INSERT INTO rollups (device, channel, resolution, bucket, count, "
+    + ", ".join(f"{m}_min, {m}_sum, {m}_max" for m in ROLLUP_METRICS)
+    + f") VALUES (?, ?, ?, ?, 1{', ?, ?, ?' * len(ROLLUP_METRICS)}) "
+    "ON CONFLICT (device, channel, resolution, bucket) DO UPDATE SET count = count + 1, "
+    + ", ".join(f"{m}_min = min({m}_min, excluded.{m}_min), {m}_sum = {m}_sum + excluded.{m}_sum, "
+                f"{m}_max = max({m}_max, excluded.{m}_max)" for m in ROLLUP_METRICS)
+)
+
+
+def _bucket_start(ts, seconds):
+    """Start of the local-time hour/day containing ``ts`` (epoch seconds)."""
+    moment = datetime.fromtimestamp(ts)
+    if seconds == RESOLUTIONS["day"]:
+        moment = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.timestamp()
+
+
+def _epoch(value):
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+class TrendSeries:
+    """
+    Result of a trend query: arrays of bucket start time, min, mean, max and capture count.
+    For raw resolution min == mean == max and count == 1.
+    추세 조회 결과: 구간 시작 시각, min, mean, max, 캡처 수 배열.
+    """
+    __slots__ = ("resolution", "time", "min", "mean", "max", "count")
+
+    def __init__(self, resolution, rows):
+        self.resolution = resolution
+        data = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        self.time, self.min, self.mean, self.max, self.count = data.T
+
+    def __len__(self):
+        return len(self.time)
+
+
+class FeatureStore:
+    """
+    SQLite feature store shared by ingest workers. Writes are serialised by a lock, the
+    database runs in WAL mode so viewers can read while the server writes, and the
+    connection is reopened after a fork (multiprocess sessions).
+    수신 워커가 공유하는 SQLite 특징 저장소. 쓰기는 잠금으로 직렬화하고 WAL 모드로 동작하여
+    서버가 기록하는 동안에도 조회할 수 있습니다. fork 후에는 연결을 새로 엽니다.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def add(self, device, rows):
+        """
+        Stores FEATURE_DTYPE rows of one device and folds new ones into the rollups.
+        Rows already stored (same device, channel and timestamp) are ignored. Returns the number added.
+        한 장치의 특징 레코드를 저장하고 새 레코드만 집계에 반영합니다. 추가된 레코드 수를 반환합니다.
+        """
+        if len(rows) == 0:
+            return 0
+        values = np.column_stack([rows[m][:, 0] if rows[m].ndim > 1 else rows[m] for m in ROLLUP_METRICS])
+        values = values.astype(np.float64).tolist()
+        channels = rows["channel"].tolist()
+        timestamps = rows["timestamp"].tolist()
+        added = 0
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                for channel, ts, metrics in zip(channels, timestamps, values):
+                    if conn.execute(_INSERT_CAPTURE, (device, channel, ts, *metrics)).rowcount != 1:
+                        continue
+                    triples = [v for value in metrics for v in (value, value, value)]
+                    for seconds in RESOLUTIONS.values():
+                        conn.execute(_UPSERT_ROLLUP, (device, channel, seconds, _bucket_start(ts, seconds), *triples))
+                    added += 1
+        return added
+
+    def devices(self):
+        """Returns [(device, channel, captures)] for everything in the store."""
+        with self._lock:
+            return self._connection().execute(
+                "SELECT device, channel, count(*) FROM captures GROUP BY device, channel ORDER BY device, channel"
+            ).fetchall()
+
+    def trend(self, device, channel, metric="rms", start=None, end=None, resolution="auto",
+              max_points=DEFAULT_MAX_POINTS):
+        """
+        Returns a TrendSeries of ``metric`` for start <= time < end.
+        resolution: 'raw', 'hour', 'day' or 'auto' (the finest one that fits in max_points).
+        start <= 시각 < end 범위의 metric 추세를 반환합니다.
+        """
+        if metric not in ROLLUP_METRICS:
+            raise ValueError(f"Unknown metric '{metric}'. Use one of {ROLLUP_METRICS}.")
+        start, end = _epoch(start), _epoch(end)
+        with self._lock:
+            conn = self._connection()
+            if resolution == "auto":
+                resolution = self._auto_resolution(conn, device, channel, start, end, max_points)
+            lo = start if start is not None else float("-inf")
+            hi = end if end is not None else float("inf")
+            if resolution == "raw":
+                rows = conn.execute(
+                    f"SELECT ts, {metric}, {metric}, {metric}, 1 FROM captures "
+                    "WHERE device = ? AND channel = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                    (device, channel, lo, hi)).fetchall()
+            elif resolution in RESOLUTIONS:
+                rows = conn.execute(
+                    f"SELECT bucket, {metric}_min, {metric}_sum / count, {metric}_max, count FROM rollups "
+                    "WHERE device = ? AND channel = ? AND resolution = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+                    (device, channel, RESOLUTIONS[resolution], lo, hi)).fetchall()
+            else:
+                raise ValueError(f"Unknown resolution '{resolution}'. Use 'auto', 'raw' or one of {sorted(RESOLUTIONS)}.")
+        return TrendSeries(resolution, rows)
+
+    @staticmethod
+    def _auto_resolution(conn, device, channel, start, end, max_points):
+        lo = start if start is not None else float("-inf")
+        hi = end if end is not None else float("inf")
+        for resolution, table, column in (("raw", "captures", "ts"), ("hour", "rollups", "bucket")):
+            query = f"SELECT count(*) FROM {table} WHERE device = ? AND channel = ? AND {column} >= ? AND {column} < ?"
+            params = [device, channel, lo, hi]
+            if table == "rollups":
+                query += " AND resolution = ?"
+                params.append(RESOLUTIONS[resolution])
+            if conn.execute(query, params).fetchone()[0] <= max_points:
+                return resolution
+        return "day"
+
+    def sync_from_table(self, table, device):
+        """Imports the rows of a FeatureTable that are not in the store yet. 특징 테이블을 저장소로 가져옵니다."""
+        return self.add(device, table.read(device))
+
+
+def store_path_for(config):
+    """Configured store path, defaulting to root_dir/features.sqlite. 설정된 저장소 경로."""
+    return config["feature_store_file"] or os.path.join(config["root_dir"], DEFAULT_STORE_NAME)
+
+
+def main(argv=None):
+    from ftp_core import Config
+    from archive import channel_index
+
+    parser = argparse.ArgumentParser(description="Print a feature trend from the feature store as CSV.")
+    parser.add_argument("--config", default="config.json", help="config file path (default: config.json)")
+    parser.add_argument("--device", help="device name (omit to list devices)")
+    parser.add_argument("--channel", default="CH0", help="channel, e.g. CH0 (default: CH0)")
+    parser.add_argument("--metric", default="rms", choices=ROLLUP_METRICS)
+    parser.add_argument("--resolution", default="auto", choices=["auto", "raw", *RESOLUTIONS])
+    parser.add_argument("--start", help="first day, YYYYMMDD")
+    parser.add_argument("--end", help="day after the last day, YYYYMMDD")
+    args = parser.parse_args(argv)
+
+    store = FeatureStore(store_path_for(Config(args.config)))
+    try:
+        if not args.device:
+            for device, channel, count in store.devices():
+                print(f"{device},CH{channel},{count}")
+            return 0
+        start = datetime.strptime(args.start, "%Y%m%d") if args.start else None
+        end = datetime.strptime(args.end, "%Y%m%d") if args.end else None
+        series = store.trend(args.device, channel_index(args.channel), args.metric, start, end, args.resolution)
+        print(f"time,min,mean,max,count  # {series.resolution}")
+        for t, lo, mean, hi, count in zip(series.time, series.min, series.mean, series.max, series.count):
+            print(f"{datetime.fromtimestamp(t):%Y-%m-%d %H:%M:%S},{lo:.6g},{mean:.6g},{hi:.6g},{int(count)}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+import os
+import json
+import logging
+
+# pyftpdlib Modules
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.servers import FTPServer, ThreadedFTPServer
+from pyftpdlib.authorizers import DummyAuthorizer
+try:
+    from pyftpdlib.servers import MultiprocessFTPServer  # POSIX 전용
+except ImportError:
+    MultiprocessFTPServer = None
+
+from ingest import IngestPipeline, DEFAULT_INGEST_WORKERS, DEFAULT_INGEST_QUEUE_SIZE
+from device_registry import DeviceRegistry, DEFAULT_REGISTRY_FILE
+from analytics import build_analyzer, DEFAULT_ADC_VREF, DEFAULT_CURRENT_SCALE, DEFAULT_BATCH_SIZE
+from archive import ArchiveWriter, ArchiveError, DEFAULT_SAMPLE_RATE
+from status_channel import StatusPublisher, StatusListener, DEFAULT_STATUS_PORT
+
+
+# --- Constants ---
+# Qt 에 의존하지 않는 서버 코어 상수 (GUI 및 헤드리스 실행에서 공용)
+DEFAULT_FTP_PORT = 21
+DEFAULT_PASSIVE_PORT_START = 60000
+DEFAULT_PASSIVE_PORT_END = 60010
+DEFAULT_SERVER_MODE = "single"
+DEFAULT_STATUS_FILE = "ftp_status.json"
+METRICS_PUBLISH_INTERVAL_S = 1.0
+
+# Server mode -> pyftpdlib server class
+# single: 단일 스레드 비동기 루프 (기존 동작), threaded: 세션별 스레드, multiprocess: 세션별 프로세스
+SERVER_MODES = {
+    "single": FTPServer,
+    "threaded": ThreadedFTPServer,
+    "multiprocess": MultiprocessFTPServer,
+}
+
+# --- Global FTP Server Instance ---
+# FTP 서버 인스턴스 (스레드에서 접근하기 위함)
+ftp_server = None
+# 수신 후처리 파이프라인 인스턴스 (FTP I/O 루프 밖에서 파일 처리)
+ingest_pipeline = None
+# multiprocess 모드: 세션 프로세스가 보낸 작업 결과를 부모 프로세스 지표로 모으는 수신기/송신기
+job_listener = None
+job_reporter = None
+
+root_logger = logging.getLogger()
+
+
+class Config:
+    """
+    Handles loading and saving of configuration settings from/to a JSON file.
+    JSON 파일로부터 설정 값을 로드하고 저장하는 클래스.
+    """
+    def __init__(self, path="config.json"):
+        self.path = path
+        self.data = {
+            "root_dir": os.path.join(os.path.expanduser("~"), "FTP_Data"), # 기본 저장 경로를 사용자 홈 디렉토리 내로 변경
+            "username": "user",
+            "password": "password",
+            "auto_start": False, # 자동 시작 기본값을 False로 변경
+            "ftp_port": DEFAULT_FTP_PORT,
+            "passive_port_start": DEFAULT_PASSIVE_PORT_START,
+            "passive_port_end": DEFAULT_PASSIVE_PORT_END,
+            "device_names": ["Main FAN", "Rotary Motor", "Combustion FAN", "Purge FAN"], # 장치 이름 목록 추가
+            "device_auto_register": True, # 처음 보는 [Model]_CHn_ 접두사를 장치로 자동 등록
+            "device_registry_file": DEFAULT_REGISTRY_FILE, # 자동 등록된 장치 목록 저장 파일
+            "ingest_workers": DEFAULT_INGEST_WORKERS, # 수신 파일 처리 워커 수
+            "ingest_queue_size": DEFAULT_INGEST_QUEUE_SIZE, # 수신 처리 대기 큐 최대 크기
+            "archive_enabled": True, # 수신 CSV를 장치/일자별 바이너리 아카이브(.mroa)로 변환
+            "archive_compression": "none", # none (메모리 맵 무복사 읽기) / zlib / lz4 (lz4 패키지 설치 시, 읽을 때 복원)
+            "archive_delta": False, # 델타 인코딩 후 압축 (압축률 향상, 읽을 때 복원)
+            "archive_keep_csv": False, # 변환 후 원본 CSV 보관 여부
+            "device_sample_rate": DEFAULT_SAMPLE_RATE, # 펌웨어 샘플링 주파수 (Hz)
+            "analytics_enabled": True, # 수신 캡처의 RMS/피크/크레스트/스펙트럼 피크를 장치별 특징 테이블에 기록
+            "analytics_adc_vref": DEFAULT_ADC_VREF, # ADC 기준 전압 (V)
+            "analytics_sensitivity": {"CH0": 1.0}, # 진동 채널 감도 (V/g)
+            "analytics_current_scale": dict(DEFAULT_CURRENT_SCALE), # 전류 채널 환산 (IEPE 툴 ai3 와 동일)
+            "analytics_batch_size": DEFAULT_BATCH_SIZE, # 백로그 분석 시 한 번에 처리할 캡처 수
+            "feature_store_enabled": True, # 특징값을 시계열 저장소(SQLite)에 기록하고 시간/일 집계 유지
+            "feature_store_file": "", # 비어 있으면 root_dir/features.sqlite
+            "server_mode": DEFAULT_SERVER_MODE, # single / threaded / multiprocess (POSIX 전용)
+            "status_port": DEFAULT_STATUS_PORT, # 서버 -> GUI 상태 채널 (로컬 UDP 포트)
+            "server_process": "embedded", # embedded: GUI 내부에서 서버 실행, external: 헤드리스 데몬(ftp_daemon.py) 상태만 표시
+            "status_file": DEFAULT_STATUS_FILE # 헤드리스 데몬이 주기적으로 기록하는 상태 파일
+        }
+        self.load()
+        # 초기 root_dir이 존재하지 않으면 생성
+        if not os.path.exists(self.data["root_dir"]):
+            try:
+                os.makedirs(self.data["root_dir"])
+                root_logger.info(f"Created default root directory: {self.data['root_dir']}")
+            except OSError as e:
+                root_logger.error(f"Failed to create default root directory {self.data['root_dir']}: {e}")
+
+    def load(self):
+        """Loads configuration from the JSON file."""
+        # JSON 파일에서 설정을 로드합니다.
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f: # 인코딩 명시
+                loaded_data = json.load(f)
+                # 새로운 설정이 추가되어도 기존 설정이 유지되도록 업데이트
+                self.data.update(loaded_data)
+        except FileNotFoundError:
+            root_logger.info(f"Config file '{self.path}' not found. Using default settings.")
+            self.save() # 기본 설정으로 파일 생성
+        except json.JSONDecodeError as e:
+            root_logger.error(f"Error decoding config file '{self.path}': {e}. Using default settings.")
+        except Exception as e:
+            root_logger.error(f"Failed to load config from '{self.path}': {e}. Using default settings.")
+
+    def save(self):
+        """Saves current configuration to the JSON file."""
+        # 현재 설정을 JSON 파일에 저장합니다.
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f: # 인코딩 명시
+                json.dump(self.data, f, indent=4, ensure_ascii=False) # 한글 깨짐 방지
+            root_logger.info(f"Config saved to '{self.path}'.")
+        except Exception as e:
+            root_logger.error(f"Failed to save config to '{self.path}': {e}")
+
+    def __getitem__(self, key):
+        """Allows dictionary-like access to config data."""
+        # 딕셔너리처럼 설정 데이터에 접근할 수 있도록 합니다.
+        return self.data.get(key)
+
+    def __setitem__(self, key, value):
+        """Allows dictionary-like assignment to config data."""
+        # 딕셔너리처럼 설정 데이터에 값을 할당할 수 있도록 합니다.
+        self.data[key] = value
+
+
+class CustomFTPHandler(FTPHandler):
+    """
+    Custom FTP handler to process file transfers and log events.
+    This handler uses class-level attributes for status callbacks and configuration,
+    which are set by the run_ftp_server function before the server starts.
+    The callbacks are plain callables (normally a StatusPublisher), so the handler has no Qt dependency.
+    파일 전송을 처리하고 이벤트를 로깅하는 사용자 정의 FTP 핸들러.
+    이 핸들러는 상태 콜백 및 구성을 위한 클래스 레벨 속성을 사용하며,
+    이는 서버가 시작하기 전에 run_ftp_server 함수에 의해 설정됩니다.
+    콜백은 일반 함수(보통 StatusPublisher)이므로 Qt에 의존하지 않습니다.
+    """
+    # Class-level attributes to be set by run_ftp_server
+    # run_ftp_server 함수에 의해 설정될 클래스 레벨 속성
+    log_method_class = None
+    device_status_update_method_class = None
+    root_dir_class = None
+    device_registry_class = None
+    ingest_pipeline_class = None
+
+    def __init__(self, conn, server, **kwargs):
+        """
+        Initializes the custom FTP handler.
+        Any extra keyword arguments from pyftpdlib (like 'ioloop') are now accepted.
+        사용자 정의 FTP 핸들러를 초기화합니다.
+        pyftpdlib에서 전달되는 추가 키워드 인수('ioloop' 등)는 이제 허용됩니다.
+        """
+        super().__init__(conn, server, **kwargs)
+
+    def log(self, *args, **kwargs): # <--- Modified to accept *args and **kwargs
+        """
+        Logs messages using the provided status logging method (accessed via class attribute).
+        Handles any additional arguments from pyftpdlib's internal calls.
+        제공된 상태 로깅 메서드(클래스 속성을 통해 접근)를 사용하여 메시지를 로깅합니다.
+        pyftpdlib 내부 호출에서 오는 추가 인수들을 처리합니다.
+        """
+        msg = args[0] if args else "" # Extract message from positional arguments
+        CustomFTPHandler.emit_log(msg)
+
+    @staticmethod
+    def emit_log(msg):
+        """
+        Posts a message to the status channel and the root logger. Safe to call from any thread
+        or worker process, so the ingest workers use it as well.
+        상태 채널과 root_logger에 메시지를 기록합니다. 어느 스레드/프로세스에서든 호출할 수 있어 수신 워커도 사용합니다.
+        """
+        if CustomFTPHandler.log_method_class:
+            CustomFTPHandler.log_method_class(msg)
+        
+        # root_logger는 콘솔로도 출력되므로, 콘솔의 인코딩 문제 방지를 위해 이모지는 GUI 로그에만 표시
+        clean_msg = msg.replace('⚠', '[WARN]').replace('✅', '[OK]').replace('🛑', '[STOP]').replace('❌', '[ERROR]')
+        root_logger.info(clean_msg)
+
+    @staticmethod
+    def emit_device_status(prefix, nbytes=0):
+        """Reports that a device delivered a file. 장치 파일 수신을 상태 채널로 알립니다."""
+        if CustomFTPHandler.device_status_update_method_class: # Access class attribute
+            CustomFTPHandler.device_status_update_method_class(prefix, nbytes)
+
+
+    def on_connect(self):
+        """Called when a client connects."""
+        self.log(f"[+] FTP CONNECTED from {self.remote_ip}:{self.remote_port}")
+
+    def on_login(self, username):
+        """Called when a user logs in successfully."""
+        self.log(f"[+] LOGIN SUCCESS - Username: {username}")
+
+    def on_login_failed(self, username, password):
+        """Called when a user fails to log in."""
+        self.log(f"[!] LOGIN FAILED - Username: {username}")
+
+    def on_file_received(self, file_path):
+        """
+        Called when a file is successfully received.
+        Hands the file to the ingest pipeline, which parses, converts and moves it on a worker thread.
+        In multiprocess mode this session already owns its own process, so the file is processed inline.
+        파일이 성공적으로 수신될 때 호출됩니다. 파일은 수신 파이프라인에 넘겨지고,
+        파싱/변환/분류 저장은 워커 스레드에서 수행되어 FTP I/O 루프를 막지 않습니다.
+        multiprocess 모드에서는 세션이 전용 프로세스를 가지므로 그 자리에서 처리합니다.
+        """
+        pipeline = CustomFTPHandler.ingest_pipeline_class
+        if pipeline is None:
+            self.log(f"[!] Ingest pipeline not running. '{os.path.basename(file_path)}' left in upload directory.")
+            return
+        if pipeline.inline:
+            pipeline.run_inline(file_path)
+        else:
+            pipeline.submit(file_path)
+
+    def on_disconnect(self):
+        """Called when a client disconnects."""
+        self.log(f"[-] FTP DISCONNECTED: {self.remote_ip}")
+
+
+def build_converters(config, log=None):
+    """
+    Builds the ingest converters configured in ``config``. Returns (converters, keep_raw).
+    설정에 따른 수신 파일 변환기 목록과 원본 보관 여부를 반환합니다.
+    """
+    log = log or root_logger.error
+    converters = []
+    keep_raw = True
+    if config["archive_enabled"]:
+        try:
+            converters.append(ArchiveWriter(compression=config["archive_compression"],
+                                            delta=config["archive_delta"],
+                                            sample_rate=config["device_sample_rate"]))
+            keep_raw = bool(config["archive_keep_csv"])
+        except ArchiveError as e:
+            log(f"[!] Archive disabled: {e}")
+    if config["analytics_enabled"]:
+        converters.append(build_analyzer(config))
+    return converters, keep_raw
+
+
+def build_device_registry(config, auto_register=None):
+    """
+    Creates the device registry from the configured names plus the saved registry file.
+    설정의 장치 이름과 저장된 장치 목록 파일로 장치 레지스트리를 생성합니다.
+    """
+    if auto_register is None:
+        auto_register = bool(config["device_auto_register"])
+    return DeviceRegistry(config["device_names"] or (), path=config["device_registry_file"],
+                          auto_register=auto_register)
+
+
+def resolve_server_class(server_mode):
+    """
+    Returns (mode, server class) for a config value, falling back to threaded when
+    multiprocess is not available on this platform (e.g. Windows).
+    설정 값에 맞는 (모드, 서버 클래스)를 반환합니다. multiprocess 를 지원하지 않는 플랫폼에서는 threaded 로 대체합니다.
+    """
+    if server_mode not in SERVER_MODES:
+        root_logger.error(f"Unknown server_mode '{server_mode}'. Using '{DEFAULT_SERVER_MODE}'.")
+        server_mode = DEFAULT_SERVER_MODE
+    if SERVER_MODES[server_mode] is None:
+        root_logger.warning(f"server_mode '{server_mode}' is not supported on this platform. Using 'threaded'.")
+        server_mode = "threaded"
+    return server_mode, SERVER_MODES[server_mode]
+
+
+def run_ftp_server(ftp_port, passive_port_start, passive_port_end, root_dir, username, password, device_registry, publisher,
+                   server_mode=DEFAULT_SERVER_MODE, ingest_workers=DEFAULT_INGEST_WORKERS, ingest_queue_size=DEFAULT_INGEST_QUEUE_SIZE,
+                   converters=None, keep_raw=True):
+    """
+    Runs the FTP server until stop_ftp_server() is called. Blocks, so callers run it on a thread.
+    All events are reported through ``publisher`` (a StatusPublisher), never through Qt.
+    ``device_registry`` is a DeviceRegistry (see build_device_registry) or a plain list of device names.
+    stop_ftp_server() 가 호출될 때까지 FTP 서버를 실행합니다 (블로킹이므로 별도 스레드에서 호출).
+    모든 이벤트는 Qt 가 아닌 publisher(StatusPublisher)를 통해 전달됩니다.
+    """
+    global ftp_server, ingest_pipeline, job_listener, job_reporter
+    try:
+        server_mode, server_class = resolve_server_class(server_mode)
+
+        authorizer = DummyAuthorizer()
+        authorizer.add_user(username, password, root_dir, perm="elradfmw")
+
+        # Set CustomFTPHandler class attributes before starting the server
+        # 서버 시작 전에 CustomFTPHandler 클래스 속성 설정
+        CustomFTPHandler.authorizer = authorizer
+        CustomFTPHandler.banner = "Custom FTP Server Ready."
+        CustomFTPHandler.passive_ports = range(passive_port_start, passive_port_end + 1)
+        CustomFTPHandler.log_method_class = publisher.log
+        CustomFTPHandler.device_status_update_method_class = publisher.device
+        CustomFTPHandler.root_dir_class = root_dir
+        CustomFTPHandler.device_registry_class = device_registry
+
+        # 수신 후처리 파이프라인 (multiprocess 모드에서는 세션 프로세스가 직접 처리하므로 워커 없음)
+        on_job = None
+        if server_mode == "multiprocess":
+            # fork 된 세션 프로세스의 지표는 부모에 남지 않으므로, 작업마다 로컬 UDP 로 부모에 보내 합산
+            job_listener = StatusListener(_collect_remote_job, port=0)
+            job_listener.start()
+            job_reporter = StatusPublisher(port=job_listener.address[1])
+            on_job = job_reporter.ingest_job
+        ingest_pipeline = IngestPipeline(root_dir, device_registry,
+                                         log=CustomFTPHandler.emit_log,
+                                         on_filed=CustomFTPHandler.emit_device_status,
+                                         workers=ingest_workers, max_queue=ingest_queue_size,
+                                         converters=converters, keep_raw=keep_raw,
+                                         inline=(server_mode == "multiprocess"), on_job=on_job)
+        ingest_pipeline.start()
+        CustomFTPHandler.ingest_pipeline_class = ingest_pipeline
+
+        ftp_server = server_class(("0.0.0.0", ftp_port), CustomFTPHandler)
+        CustomFTPHandler.emit_log(f"[\u26a0] FTP Server attempting to start on port {ftp_port} ({server_mode}) with root: {root_dir}")
+
+        publisher.start_periodic("metrics", ingest_pipeline.metrics.snapshot, METRICS_PUBLISH_INTERVAL_S)
+        publisher.server("started", server_mode)
+
+        ftp_server.serve_forever()
+        publisher.server("stopped")
+    except OSError as e:
+        error_msg = f"[FATAL] FTP Server failed to start. Port {ftp_port} might be in use or permissions issue: {e}"
+        publisher.log(error_msg)
+        root_logger.critical(error_msg)
+        _shutdown_pipeline()
+        publisher.server("failed", str(e))
+    except Exception as e:
+        error_msg = f"[FATAL] An unexpected error occurred in FTP server thread: {e}"
+        publisher.log(error_msg)
+        root_logger.critical(error_msg)
+        _shutdown_pipeline()
+        publisher.server("failed", str(e))
+    finally:
+        publisher.stop()
+
+
+def _collect_remote_job(event):
+    """Adds an 'ingest_job' event from a session process to the parent's metrics."""
+    pipeline = ingest_pipeline
+    if pipeline is None or event.get("type") != "ingest_job":
+        return
+    pipeline.metrics.on_remote_job(bool(event.get("ok")), float(event.get("wait_ms", 0.0)),
+                                   float(event.get("process_ms", 0.0)))
+
+
+def _shutdown_pipeline():
+    global ingest_pipeline, job_listener, job_reporter
+    if ingest_pipeline:
+        # 이미 큐에 들어간 파일은 마저 처리한 뒤 워커 종료
+        CustomFTPHandler.ingest_pipeline_class = None
+        ingest_pipeline.stop()
+        ingest_pipeline = None
+    if job_listener:
+        job_listener.stop()
+        job_listener = None
+    if job_reporter:
+        job_reporter.close()
+        job_reporter = None
+
+
+def stop_ftp_server():
+    """
+    Closes the FTP server and drains the ingest pipeline. Returns False if no server was running.
+    FTP 서버를 닫고 수신 파이프라인을 정리합니다. 실행 중인 서버가 없으면 False 를 반환합니다.
+    """
+    global ftp_server
+    if not ftp_server:
+        return False
+    ftp_server.close_all()
+    ftp_server = None
+    _shutdown_pipeline()
+    return True
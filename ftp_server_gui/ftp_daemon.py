@@ -0,0 +1,185 @@
+"""
+Headless FTP ingest daemon. Runs the same Config / CustomFTPHandler / ingest pipeline as
+FTPServerGUI without importing Qt, and exposes its state through the UDP status channel
+and a periodically rewritten JSON status file.
+Qt 없이 FTPServerGUI 와 동일한 설정/핸들러/수신 파이프라인을 실행하는 헤드리스 FTP 수신 데몬.
+상태는 UDP 상태 채널과 주기적으로 갱신되는 JSON 상태 파일로 제공합니다.
+
+    python ftp_daemon.py --config config.json [--mode threaded] [--status-file ftp_status.json]
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import logging
+from datetime import datetime
+
+import ftp_core
+from ftp_core import Config, run_ftp_server, stop_ftp_server, build_converters, build_device_registry, SERVER_MODES
+from status_channel import StatusPublisher, StatusListener
+from device_registry import UNKNOWN_DEVICE, is_valid_device_name
+
+
+DEFAULT_STATUS_INTERVAL_S = 2.0
+RECENT_LOG_LINES = 20  # 상태 파일에 남길 최근 로그 줄 수
+
+root_logger = logging.getLogger()
+
+
+def setup_logging(log_file):
+    """File + console logging, same format as the GUI. GUI 와 같은 형식의 파일/콘솔 로깅."""
+    log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except AttributeError:
+        pass
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(log_formatter)
+        handler.setLevel(logging.INFO)
+        root_logger.addHandler(handler)
+    root_logger.setLevel(logging.INFO)
+
+
+class DaemonStatus:
+    """
+    Aggregates status-channel events into a snapshot and writes it atomically to a JSON file.
+    Events arrive over UDP, so uploads handled by forked session processes are counted too.
+    상태 채널 이벤트를 모아 스냅샷으로 만들고 JSON 파일에 원자적으로 기록합니다.
+    이벤트를 UDP 로 받으므로 fork 된 세션 프로세스가 처리한 업로드도 집계됩니다.
+    """
+    def __init__(self, path, server_mode, ftp_port, devices):
+        self.path = path
+        self.devices = devices  # 장치 통계용 DeviceRegistry (상태 이벤트로 갱신)
+        self._lock = threading.Lock()
+        self.state = {
+            "pid": os.getpid(),
+            "state": "starting",
+            "detail": "",
+            "server_mode": server_mode,
+            "ftp_port": ftp_port,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "updated_at": None,
+            "metrics": {},
+            "devices": {},
+            "recent_log": [],
+        }
+
+    def on_event(self, event):
+        """StatusListener callback. 상태 채널 수신 콜백."""
+        event_type = event.get("type")
+        with self._lock:
+            if event_type == "server":
+                self.state["state"] = event.get("state", "")
+                self.state["detail"] = event.get("detail", "")
+            elif event_type == "metrics":
+                self.state["metrics"] = event.get("metrics", {})
+            elif event_type == "device":
+                name = event.get("device", "")
+                # 서버(또는 세션 프로세스)가 새로 등록한 장치도 통계에 포함
+                if name not in self.devices and name != UNKNOWN_DEVICE and is_valid_device_name(name):
+                    self.devices.register(name)
+                self.devices.record(name, event.get("bytes", 0))
+            elif event_type == "log":
+                recent = self.state["recent_log"]
+                recent.append(event.get("msg", ""))
+                del recent[:-RECENT_LOG_LINES]
+
+    def set_state(self, state, detail=""):
+        with self._lock:
+            self.state["state"] = state
+            self.state["detail"] = detail
+
+    def write(self):
+        """Writes the snapshot via a temp file + os.replace so readers never see a partial file."""
+        with self._lock:
+            self.state["updated_at"] = datetime.now().isoformat(timespec="seconds")
+            self.state["devices"] = self.devices.snapshot()
+            data = json.dumps(self.state, indent=2, ensure_ascii=False)
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            root_logger.error(f"Failed to write status file '{self.path}': {e}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless MRO FTP ingest daemon (no GUI).")
+    parser.add_argument("--config", default="config.json", help="config file path (default: config.json)")
+    parser.add_argument("--mode", choices=sorted(SERVER_MODES), help="override server_mode from the config")
+    parser.add_argument("--status-file", help="JSON status file path (default: config 'status_file')")
+    parser.add_argument("--status-interval", type=float, default=DEFAULT_STATUS_INTERVAL_S,
+                        help=f"status file update interval in seconds (default: {DEFAULT_STATUS_INTERVAL_S})")
+    parser.add_argument("--log-file", default="ftp_server_log.log", help="log file path ('' to disable)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(args.log_file)
+
+    config = Config(args.config)
+    server_mode = args.mode or config["server_mode"]
+    status = DaemonStatus(args.status_file or config["status_file"], server_mode, config["ftp_port"],
+                          build_device_registry(config, auto_register=False))
+
+    # 이벤트는 GUI 뷰어(status_port)와 데몬 자신의 집계용 리스너로 동시에 전송
+    publisher = StatusPublisher(config["status_port"])
+    listener = StatusListener(status.on_event, port=0)
+    listener.start()
+    publisher.add_target(*listener.address)
+
+    stop_event = threading.Event()
+
+    def write_status_loop():
+        while not stop_event.wait(args.status_interval):
+            status.write()
+
+    status_thread = threading.Thread(target=write_status_loop, name="status-file", daemon=True)
+    status_thread.start()
+
+    def handle_signal(signum, frame):
+        # serve_forever(handle_exit=True) 가 KeyboardInterrupt 를 받아 정상 종료
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    if hasattr(signal, "SIGBREAK"):
+        signal.signal(signal.SIGBREAK, handle_signal)  # Windows 콘솔 종료
+
+    converters, keep_raw = build_converters(config)
+    root_logger.info(f"Starting headless FTP daemon (pid {os.getpid()}, mode {server_mode}).")
+    try:
+        run_ftp_server(config["ftp_port"], config["passive_port_start"], config["passive_port_end"],
+                       config["root_dir"], config["username"], config["password"],
+                       build_device_registry(config), publisher,
+                       server_mode=server_mode,
+                       ingest_workers=config["ingest_workers"],
+                       ingest_queue_size=config["ingest_queue_size"],
+                       converters=converters, keep_raw=keep_raw)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if ftp_core.ftp_server:
+            stop_ftp_server()
+        time.sleep(0.2)  # 마지막 상태 이벤트 수신 대기
+        failed = status.state["state"] == "failed"
+        if not failed:
+            status.set_state("stopped")
+        stop_event.set()
+        status.write()
+        listener.stop()
+        publisher.close()
+        root_logger.info("Headless FTP daemon stopped.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,25 @@
 import os
 import sys
-import json
-import shutil
+import time
 import threading
 import logging
-from datetime import datetime
+from enum import Enum
 from functools import partial
 
 # PyQt6 Modules
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QPushButton,
-    QTextEdit, QFileDialog, QVBoxLayout, QHBoxLayout, QMessageBox, QFrame
+    QTextEdit, QFileDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QMessageBox, QFrame, QScrollArea
 )
-from PyQt6.QtCore import Qt, QTimer, QMetaObject, Q_ARG, pyqtSlot, QDateTime
-from PyQt6.QtGui import QPixmap, QColor, QIntValidator
+from PyQt6.QtCore import Qt, QTimer, pyqtSlot, QDateTime
+from PyQt6.QtGui import QPixmap, QIntValidator, QTextCursor
 
-# pyftpdlib Modules
-from pyftpdlib.handlers import FTPHandler
-from pyftpdlib.servers import FTPServer
-from pyftpdlib.authorizers import DummyAuthorizer
+# Qt 에 의존하지 않는 FTP 서버 코어
+import ftp_core
+from ftp_core import Config, run_ftp_server, stop_ftp_server, build_converters, build_device_registry
+from status_channel import StatusPublisher, StatusListener
+from event_bridge import EventBuffer
+from device_registry import UNKNOWN_DEVICE, is_valid_device_name
 
 
 # BASE_DIR: Determine the base directory for resources (for PyInstaller)
@@ -29,13 +30,15 @@ BASE_DIR = getattr(sys, "_MEIPASS", os.path.abspath("."))
 # 가독성과 유지보수성을 위한 상수 정의
 INACTIVE_THRESHOLD_MS = 60000  # 60초 (1분) 이상 데이터 미수신 시 오류 표시
 ACTIVE_ICON_DURATION_MS = 500 # 1초 (아이콘 활성 상태 유지 시간)
-DEFAULT_FTP_PORT = 21
-DEFAULT_PASSIVE_PORT_START = 60000
-DEFAULT_PASSIVE_PORT_END = 60010
-
-# --- Global FTP Server Instance ---
-# FTP 서버 인스턴스 (스레드에서 접근하기 위함)
-ftp_server = None
+EXTERNAL_SERVER_TIMEOUT_S = 3.0 # 외부 서버 모드에서 이 시간 동안 상태 이벤트가 없으면 중지로 표시
+GUI_FLUSH_INTERVAL_MS = 100 # 이벤트 버퍼를 GUI에 반영하는 주기 (10 fps)
+MAX_LOG_BLOCKS = 1000 # 로그 창 최대 줄 수
+DEVICE_ICON_SIZE = 32
+SERVER_ICON_SIZE = 16
+DEVICE_TILE_COLUMNS = 8 # 장치 타일 한 줄당 개수 (많은 장치는 여러 줄 + 스크롤)
+ICON_IDLE = "idle"
+ICON_ACTIVE = "active"
+ICON_ERROR = "error"
 
 # --- Logger Setup ---
 # 로깅 설정을 위한 초기화 (파일 및 콘솔 출력)
@@ -63,223 +66,42 @@ root_logger.addHandler(file_handler)
 root_logger.addHandler(console_handler)
 
 
-class Config:
+class DeviceState(Enum):
     """
-    Handles loading and saving of configuration settings from/to a JSON file.
-    JSON 파일로부터 설정 값을 로드하고 저장하는 클래스.
+    Display state of a device tile. Tracked explicitly so the GUI never has to compare pixmaps.
+    장치 타일의 표시 상태. 픽스맵 비교 없이 상태를 판단하기 위해 명시적으로 관리합니다.
     """
-    def __init__(self, path="config.json"):
-        self.path = path
-        self.data = {
-            "root_dir": os.path.join(os.path.expanduser("~"), "FTP_Data"), # 기본 저장 경로를 사용자 홈 디렉토리 내로 변경
-            "username": "user",
-            "password": "password",
-            "auto_start": False, # 자동 시작 기본값을 False로 변경
-            "ftp_port": DEFAULT_FTP_PORT,
-            "passive_port_start": DEFAULT_PASSIVE_PORT_START,
-            "passive_port_end": DEFAULT_PASSIVE_PORT_END,
-            "device_names": ["Main FAN", "Rotary Motor", "Combustion FAN", "Purge FAN"] # 장치 이름 목록 추가
-        }
-        self.load()
-        # 초기 root_dir이 존재하지 않으면 생성
-        if not os.path.exists(self.data["root_dir"]):
-            try:
-                os.makedirs(self.data["root_dir"])
-                root_logger.info(f"Created default root directory: {self.data['root_dir']}")
-            except OSError as e:
-                root_logger.error(f"Failed to create default root directory {self.data['root_dir']}: {e}")
-
-    def load(self):
-        """Loads configuration from the JSON file."""
-        # JSON 파일에서 설정을 로드합니다.
-        try:
-            with open(self.path, 'r', encoding='utf-8') as f: # 인코딩 명시
-                loaded_data = json.load(f)
-                # 새로운 설정이 추가되어도 기존 설정이 유지되도록 업데이트
-                self.data.update(loaded_data)
-        except FileNotFoundError:
-            root_logger.info(f"Config file '{self.path}' not found. Using default settings.")
-            self.save() # 기본 설정으로 파일 생성
-        except json.JSONDecodeError as e:
-            root_logger.error(f"Error decoding config file '{self.path}': {e}. Using default settings.")
-        except Exception as e:
-            root_logger.error(f"Failed to load config from '{self.path}': {e}. Using default settings.")
-
-    def save(self):
-        """Saves current configuration to the JSON file."""
-        # 현재 설정을 JSON 파일에 저장합니다.
-        try:
-            with open(self.path, 'w', encoding='utf-8') as f: # 인코딩 명시
-                json.dump(self.data, f, indent=4, ensure_ascii=False) # 한글 깨짐 방지
-            root_logger.info(f"Config saved to '{self.path}'.")
-        except Exception as e:
-            root_logger.error(f"Failed to save config to '{self.path}': {e}")
+    IDLE = ICON_IDLE
+    ACTIVE = ICON_ACTIVE
+    ERROR = ICON_ERROR
 
-    def __getitem__(self, key):
-        """Allows dictionary-like access to config data."""
-        # 딕셔너리처럼 설정 데이터에 접근할 수 있도록 합니다.
-        return self.data.get(key)
 
-    def __setitem__(self, key, value):
-        """Allows dictionary-like assignment to config data."""
-        # 딕셔너리처럼 설정 데이터에 값을 할당할 수 있도록 합니다.
-        self.data[key] = value
+# 상태별 최종 수신 시간 라벨 스타일
+DEVICE_STATE_STYLES = {
+    DeviceState.IDLE: "font-size: 10px; color: gray;",
+    DeviceState.ACTIVE: "font-size: 10px; color: blue;",
+    DeviceState.ERROR: "font-size: 10px; color: red;",
+}
 
 
-class CustomFTPHandler(FTPHandler):
+class IconCache:
     """
-    Custom FTP handler to process file transfers and log events.
-    This handler now uses class-level attributes for GUI callbacks and configuration,
-    which are set by the run_ftp_server function before the server starts.
-    파일 전송을 처리하고 이벤트를 로깅하는 사용자 정의 FTP 핸들러.
-    이 핸들러는 이제 GUI 콜백 및 구성을 위한 클래스 레벨 속성을 사용하며,
-    이는 서버가 시작하기 전에 run_ftp_server 함수에 의해 설정됩니다.
+    Loads the status icons once and keeps pre-scaled copies per size, so status updates
+    are a dictionary lookup instead of a PNG decode + rescale.
+    상태 아이콘을 한 번만 로드하고 크기별로 미리 축소한 픽스맵을 보관합니다.
+    (상태 갱신 시 PNG 디코딩/리스케일 없이 딕셔너리 조회만 수행)
     """
-    # Class-level attributes to be set by run_ftp_server
-    # run_ftp_server 함수에 의해 설정될 클래스 레벨 속성
-    log_method_class = None
-    device_status_update_method_class = None
-    root_dir_class = None
-    device_names_config_class = None
-
-    def __init__(self, conn, server, **kwargs):
-        """
-        Initializes the custom FTP handler.
-        Any extra keyword arguments from pyftpdlib (like 'ioloop') are now accepted.
-        사용자 정의 FTP 핸들러를 초기화합니다.
-        pyftpdlib에서 전달되는 추가 키워드 인수('ioloop' 등)는 이제 허용됩니다.
-        """
-        super().__init__(conn, server, **kwargs)
+    def __init__(self, names=(ICON_IDLE, ICON_ACTIVE, ICON_ERROR), sizes=(SERVER_ICON_SIZE, DEVICE_ICON_SIZE)):
+        self._pixmaps = {}
+        for name in names:
+            source = QPixmap(os.path.join(BASE_DIR, f"{name}.png"))
+            for size in sizes:
+                self._pixmaps[(name, size)] = source.scaled(
+                    size, size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
+                )
 
-    def log(self, *args, **kwargs): # <--- Modified to accept *args and **kwargs
-        """
-        Logs messages using the provided GUI logging method (accessed via class attribute).
-        Handles any additional arguments from pyftpdlib's internal calls.
-        제공된 GUI 로깅 메서드(클래스 속성을 통해 접근)를 사용하여 메시지를 로깅합니다.
-        pyftpdlib 내부 호출에서 오는 추가 인수들을 처리합니다.
-        """
-        msg = args[0] if args else "" # Extract message from positional arguments
-        
-        if CustomFTPHandler.log_method_class:
-            QMetaObject.invokeMethod(CustomFTPHandler.log_method_class.__self__, CustomFTPHandler.log_method_class.__name__,
-                                     Qt.ConnectionType.QueuedConnection, Q_ARG(str, msg))
-        
-        # root_logger는 콘솔로도 출력되므로, 콘솔의 인코딩 문제 방지를 위해 이모지는 GUI 로그에만 표시
-        clean_msg = msg.replace('⚠', '[WARN]').replace('✅', '[OK]').replace('🛑', '[STOP]').replace('❌', '[ERROR]')
-        root_logger.info(clean_msg)
-
-
-    def on_connect(self):
-        """Called when a client connects."""
-        self.log(f"[+] FTP CONNECTED from {self.remote_ip}:{self.remote_port}")
-
-    def on_login(self, username):
-        """Called when a user logs in successfully."""
-        self.log(f"[+] LOGIN SUCCESS - Username: {username}")
-
-    def on_login_failed(self, username, password):
-        """Called when a user fails to log in."""
-        self.log(f"[!] LOGIN FAILED - Username: {username}")
-
-    def on_file_received(self, file_path):
-        """
-        Called when a file is successfully received.
-        Processes the file, moves it to the categorized directory, and updates GUI.
-        파일이 성공적으로 수신될 때 호출됩니다. 파일을 처리하고 분류된 디렉토리로 이동하며 GUI를 업데이트합니다.
-        """
-        filename = os.path.basename(file_path)
-        prefix = "Unknown"
-        channel_name = "Unknown"
-
-        # Extract prefix (e.g., [Main FAN])
-        if filename.startswith('[') and ']' in filename:
-            try:
-                prefix = filename.split(']')[0].strip('[]')
-                # Check if the extracted prefix is one of the configured device names
-                if prefix not in CustomFTPHandler.device_names_config_class: # Access class attribute
-                    self.log(f"[!] Warning: Unknown device prefix '{prefix}' in filename: {filename}")
-                    prefix = "Unknown Device" # 알 수 없는 장치 접두사에 대한 기본값 설정
-            except Exception as e:
-                self.log(f"[!] Error parsing prefix from '{filename}': {e}")
-                prefix = "Parse Error" # 파싱 오류 시 기본값 설정
-
-        # Extract channel name (e.g., CH0, CH1)
-        if "_CH" in filename:
-            try:
-                channel_part = filename.split("_CH")[1]
-                channel_name = "CH" + channel_part.split("_")[0]
-            except Exception as e:
-                self.log(f"[!] Error parsing channel name from '{filename}': {e}")
-                channel_name = "Parse Error" # 파싱 오류 시 기본값 설정
-
-        date_folder = datetime.now().strftime("%Y%m%d")
-        # Construct the destination folder path
-        dest_folder = os.path.join(CustomFTPHandler.root_dir_class, prefix, date_folder, channel_name) # Access class attribute
-        dest_path = os.path.join(dest_folder, filename)
-
-        try:
-            # Create destination directories if they don't exist
-            os.makedirs(dest_folder, exist_ok=True)
-            # Move the received file to its final destination
-            shutil.move(file_path, dest_path)
-            self.log(f"[\u2713] FILE SAVED TO: {dest_path}")
-
-            # Update GUI device status (on the main thread)
-            if CustomFTPHandler.device_status_update_method_class: # Access class attribute
-                # Corrected typo: CustomFTPHandler.device_method_class to CustomFTPHandler.device_status_update_method_class
-                QMetaObject.invokeMethod(CustomFTPHandler.device_status_update_method_class.__self__, CustomFTPHandler.device_status_update_method_class.__name__,
-                                         Qt.ConnectionType.QueuedConnection, Q_ARG(str, prefix))
-
-        except OSError as e:
-            self.log(f"[!] File system error saving '{filename}' to '{dest_path}': {e}. Check permissions or disk space.")
-        except Exception as e:
-            self.log(f"[!] Unexpected error saving file '{filename}': {e}")
-
-    def on_disconnect(self):
-        """Called when a client disconnects."""
-        self.log(f"[-] FTP DISCONNECTED: {self.remote_ip}")
-
-
-def run_ftp_server(ftp_port, passive_port_start, passive_port_end, root_dir, username, password, log_method, device_status_update_method, device_names_config, gui_ref):
-    """
-    Runs the FTP server in a separate thread.
-    This function now sets class-level attributes on CustomFTPHandler.
-    별도의 스레드에서 FTP 서버를 실행합니다.
-    이 함수는 이제 CustomFTPHandler에 클래스 레벨 속성을 설정합니다.
-    """
-    global ftp_server
-    try:
-        authorizer = DummyAuthorizer()
-        authorizer.add_user(username, password, root_dir, perm="elradfmw")
-
-        # Set CustomFTPHandler class attributes before starting the server
-        # 서버 시작 전에 CustomFTPHandler 클래스 속성 설정
-        CustomFTPHandler.authorizer = authorizer
-        CustomFTPHandler.banner = "Custom FTP Server Ready."
-        CustomFTPHandler.passive_ports = range(passive_port_start, passive_port_end + 1)
-        CustomFTPHandler.log_method_class = log_method
-        CustomFTPHandler.device_status_update_method_class = device_status_update_method
-        CustomFTPHandler.root_dir_class = root_dir
-        CustomFTPHandler.device_names_config_class = device_names_config
-
-        # FTPServer now directly uses the CustomFTPHandler class
-        # FTPServer는 이제 CustomFTPHandler 클래스를 직접 사용합니다.
-        ftp_server = FTPServer(("0.0.0.0", ftp_port), CustomFTPHandler)
-        log_method(f"[\u26a0] FTP Server attempting to start on port {ftp_port} with root: {root_dir}")
-        
-        QMetaObject.invokeMethod(gui_ref, "handle_server_startup_success", Qt.ConnectionType.QueuedConnection)
-        
-        ftp_server.serve_forever()
-    except OSError as e:
-        error_msg = f"[FATAL] FTP Server failed to start. Port {ftp_port} might be in use or permissions issue: {e}"
-        log_method(error_msg)
-        root_logger.critical(error_msg) # root_logger는 이모지 없는 메시지를 받도록 CustomFTPHandler.log에서 처리됨
-        QMetaObject.invokeMethod(gui_ref, "handle_server_startup_failure", Qt.ConnectionType.QueuedConnection, Q_ARG(str, str(e)))
-    except Exception as e:
-        error_msg = f"[FATAL] An unexpected error occurred in FTP server thread: {e}"
-        log_method(error_msg)
-        root_logger.critical(error_msg) # root_logger는 이모지 없는 메시지를 받도록 CustomFTPHandler.log에서 처리됨
-        QMetaObject.invokeMethod(gui_ref, "handle_server_startup_failure", Qt.ConnectionType.QueuedConnection, Q_ARG(str, str(e)))
+    def get(self, name, size):
+        return self._pixmaps[(name, size)]
 
 
 class FTPServerGUI(QWidget):
@@ -298,11 +120,29 @@ class FTPServerGUI(QWidget):
         self.device_last_received_labels = {} # 장치별 최종 수신 시간 라벨 추가
         self.device_timers = {}
         self.device_last_received = {}
+        self.device_states = {} # 장치 이름 -> DeviceState
+        self.device_received_once = set() # 한 번 이상 수신한 장치 (미수신 장치는 오류 로그 생략)
+        self.ingest_metrics = None # 상태 채널로 수신한 최신 수신 처리 지표
 
         self.config = CONFIG # 전역 CONFIG 객체 참조
-        self.device_names = self.config["device_names"] # 설정에서 장치 이름 로드
-
+        # 표시용 장치 레지스트리 (설정 + 저장된 장치 목록, 상태 이벤트로 통계 갱신)
+        self.device_registry = build_device_registry(self.config, auto_register=False)
+        # external: 서버는 헤드리스 데몬(ftp_daemon.py)이 실행하고 GUI는 상태 채널만 표시
+        self.external_server = self.config["server_process"] == "external"
+        self.last_status_event_time = 0.0 # 마지막 상태 이벤트 수신 시각 (time.monotonic)
+        # 로그/장치 상태 이벤트를 모아 일정 주기로 GUI에 반영 (이벤트마다 invokeMethod 하지 않음)
+        self.event_buffer = EventBuffer(MAX_LOG_BLOCKS)
+
+        self.icons = IconCache() # 상태 아이콘 캐시 (QApplication 생성 이후에 로드)
         self.setup_ui()
+
+        # 서버 -> GUI 상태 채널 (서버가 스레드/프로세스 어디서 실행되든 동일하게 수신)
+        self.status_publisher = StatusPublisher(self.config["status_port"])
+        self.status_listener = StatusListener(self._on_status_event, self.config["status_port"])
+        try:
+            self.status_listener.start()
+        except OSError as e:
+            self.append_log(f"[!] Status channel port {self.config['status_port']} unavailable: {e}")
         # self.setup_callbacks() # No longer needed as global log_callback is removed.
 
         # Check initial root_dir validity
@@ -311,7 +151,12 @@ class FTPServerGUI(QWidget):
             self.append_log(f"[!] Warning: Configured root directory '{self.config['root_dir']}' is invalid. Please select a valid directory.")
             self.dir_input.setStyleSheet("border: 1px solid red;") # 유효하지 않으면 빨간 테두리
 
-        if self.config["auto_start"]:
+        if self.external_server:
+            self.toggle_btn.setText("외부 서버 모드")
+            self.toggle_btn.setEnabled(False)
+            self.stop_btn.setEnabled(False)
+            self.append_log(f"[i] External server mode: showing status from ftp_daemon.py on UDP port {self.config['status_port']}.")
+        elif self.config["auto_start"]:
             self.toggle_server() # 설정값이 true일 때만 자동 시작
 
         self.error_check_timer = QTimer(self)
@@ -323,6 +168,10 @@ class FTPServerGUI(QWidget):
         self.server_status_update_timer.timeout.connect(self._update_server_status_display)
         self.server_status_update_timer.start(500) # 0.5초마다 서버 상태 텍스트 업데이트
 
+        self.event_flush_timer = QTimer(self)
+        self.event_flush_timer.timeout.connect(self._flush_events)
+        self.event_flush_timer.start(GUI_FLUSH_INTERVAL_MS)
+
     def setup_callbacks(self):
         """Sets up any necessary callbacks. (Now mostly handled by direct arg passing)"""
         # 필요한 콜백을 설정합니다. (이제 대부분 직접 인수 전달로 처리됩니다)
@@ -407,67 +256,102 @@ class FTPServerGUI(QWidget):
         self.server_status_label.setStyleSheet("color: gray;")
         self.server_status_indicator = QLabel()
         self.server_status_indicator.setFixedSize(16, 16)
-        self.server_status_indicator.setPixmap(QPixmap(os.path.join(BASE_DIR, "idle.png")).scaled(16, 16, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        self.server_status_indicator.setPixmap(self.icons.get(ICON_IDLE, SERVER_ICON_SIZE))
         server_status_layout.addWidget(self.server_status_indicator)
         server_status_layout.addWidget(self.server_status_label)
+        server_status_layout.addSpacing(20)
+        # 수신 처리 큐 상태 (워커가 밀리는지 확인용)
+        self.ingest_status_label = QLabel("수신 큐: -")
+        self.ingest_status_label.setStyleSheet("color: gray;")
+        server_status_layout.addWidget(self.ingest_status_label)
         server_status_layout.addStretch(1)
         layout.addLayout(server_status_layout)
 
 
         # --- Server Log Output ---
         # 서버 로그 출력
-        layout.addWidget(QLabel("<b>서버 로그</b>"))
+        log_header_layout = QHBoxLayout()
+        log_header_layout.addWidget(QLabel("<b>서버 로그</b>"))
+        log_header_layout.addStretch(1)
+        # GUI 이벤트 버퍼 카운터 (수신/반영/병합/버림)
+        self.event_counter_label = QLabel("")
+        self.event_counter_label.setStyleSheet("font-size: 10px; color: gray;")
+        log_header_layout.addWidget(self.event_counter_label)
+        layout.addLayout(log_header_layout)
         self.log_output = QTextEdit()
         self.log_output.setReadOnly(True)
-        self.log_output.document().setMaximumBlockCount(1000) # 로그 최대 1000줄 제한
+        self.log_output.document().setMaximumBlockCount(MAX_LOG_BLOCKS) # 로그 최대 1000줄 제한
         layout.addWidget(self.log_output)
 
         # --- Device Status Monitoring ---
         # 장치 수신 현황 모니터링
         layout.addWidget(QLabel("<b>장치 수신 현황</b>"))
-        device_layout = QHBoxLayout()
-        device_layout.setSpacing(10) # 간격 좁게 조정
-
-        for name in self.device_names:
-            vbox = QVBoxLayout()
-            vbox.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-            # Device Name Label
-            name_label = QLabel(name)
-            name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            vbox.addWidget(name_label)
-
-            # Icon Label
-            icon_label = QLabel()
-            icon_label.setFixedSize(32, 32) # 아이콘 크기 키움
-            icon_label.setPixmap(QPixmap(os.path.join(BASE_DIR, "idle.png")).scaled(
-                32, 32, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
-            ))
-            icon_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            vbox.addWidget(icon_label)
-
-            # Last Received Time Label
-            last_received_label = QLabel("미수신")
-            last_received_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            last_received_label.setStyleSheet("font-size: 10px; color: gray;")
-            vbox.addWidget(last_received_label)
-
-
-            container = QFrame(self) # 각 장치별 컨테이너 프레임
-            container.setFrameShape(QFrame.Shape.Box)
-            container.setLineWidth(1)
-            container.setLayout(vbox)
-            device_layout.addWidget(container)
-
-            self.device_labels[name] = icon_label
-            self.device_last_received_labels[name] = last_received_label
-            self.device_last_received[name] = QDateTime.currentDateTime() # 초기값을 현재 시간으로 설정
-
-        layout.addLayout(device_layout)
+        device_panel = QWidget()
+        self.device_layout = QGridLayout(device_panel)
+        self.device_layout.setSpacing(10) # 간격 좁게 조정
+        device_scroll = QScrollArea()
+        device_scroll.setWidgetResizable(True)
+        device_scroll.setFrameShape(QFrame.Shape.NoFrame)
+        device_scroll.setWidget(device_panel)
+
+        for name in self.device_registry.names():
+            self._add_device_tile(name)
+
+        layout.addWidget(device_scroll)
         layout.addStretch(1) # 하단 공간 채우기
 
         self.setLayout(layout)
 
+    def _add_device_tile(self, name):
+        """Creates the status tile for one device in the next grid cell. 장치 타일을 그리드의 다음 칸에 추가합니다."""
+        vbox = QVBoxLayout()
+        vbox.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        # Device Name Label
+        name_label = QLabel(name)
+        name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        vbox.addWidget(name_label)
+
+        # Icon Label
+        icon_label = QLabel()
+        icon_label.setFixedSize(DEVICE_ICON_SIZE, DEVICE_ICON_SIZE) # 아이콘 크기 키움
+        icon_label.setPixmap(self.icons.get(ICON_IDLE, DEVICE_ICON_SIZE))
+        icon_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        vbox.addWidget(icon_label)
+
+        # Last Received Time Label
+        last_received_label = QLabel("미수신")
+        last_received_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        last_received_label.setStyleSheet(DEVICE_STATE_STYLES[DeviceState.IDLE])
+        vbox.addWidget(last_received_label)
+
+        container = QFrame(self) # 각 장치별 컨테이너 프레임
+        container.setFrameShape(QFrame.Shape.Box)
+        container.setLineWidth(1)
+        container.setLayout(vbox)
+        index = len(self.device_labels)
+        self.device_layout.addWidget(container, index // DEVICE_TILE_COLUMNS, index % DEVICE_TILE_COLUMNS)
+
+        # 장치별 활성 아이콘 복귀 타이머 (갱신 때마다 새로 만들지 않고 재시작)
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setInterval(ACTIVE_ICON_DURATION_MS)
+        timer.timeout.connect(partial(self.reset_device_icon, name))
+
+        self.device_labels[name] = icon_label
+        self.device_last_received_labels[name] = last_received_label
+        self.device_timers[name] = timer
+        self.device_states[name] = DeviceState.IDLE
+        self.device_last_received[name] = QDateTime.currentDateTime() # 초기값을 현재 시간으로 설정
+
+    def _set_device_state(self, name, state):
+        """Switches a tile's icon and label colour, touching widgets only when the state changes."""
+        if self.device_states.get(name) == state:
+            return
+        self.device_states[name] = state
+        self.device_labels[name].setPixmap(self.icons.get(state.value, DEVICE_ICON_SIZE))
+        self.device_last_received_labels[name].setStyleSheet(DEVICE_STATE_STYLES[state])
+
     def _is_valid_directory(self, path):
         """Checks if a given path is a valid and accessible directory."""
         # 주어진 경로가 유효하고 접근 가능한 디렉토리인지 확인합니다.
@@ -525,11 +409,18 @@ class FTPServerGUI(QWidget):
             self.config["passive_port_end"] = passive_end
             self.config.save()
 
+            # 수신 파일 변환기 구성 (바이너리 아카이브)
+            converters, keep_raw = build_converters(self.config, self.append_log)
+
             self.server_thread = threading.Thread(target=run_ftp_server, daemon=True,
                                                   args=(ftp_port, passive_start, passive_end,
                                                         root_dir, username, password,
-                                                        self.append_log, self.update_device_status,
-                                                        self.device_names, self))
+                                                        build_device_registry(self.config), self.status_publisher),
+                                                  kwargs={"server_mode": self.config["server_mode"],
+                                                          "ingest_workers": self.config["ingest_workers"],
+                                                          "ingest_queue_size": self.config["ingest_queue_size"],
+                                                          "converters": converters,
+                                                          "keep_raw": keep_raw})
             self.server_thread.start()
             
             self.toggle_btn.setText("FTP 서버 시작 중...")
@@ -537,7 +428,7 @@ class FTPServerGUI(QWidget):
             self.stop_btn.setEnabled(True)
             self.server_status_label.setText("시작 중...")
             self.server_status_label.setStyleSheet("color: orange;")
-            self.server_status_indicator.setPixmap(QPixmap(os.path.join(BASE_DIR, "idle.png")).scaled(16, 16, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+            self.server_status_indicator.setPixmap(self.icons.get(ICON_IDLE, SERVER_ICON_SIZE))
 
         else:
             self.stop_server()
@@ -545,42 +436,48 @@ class FTPServerGUI(QWidget):
     @pyqtSlot()
     def handle_server_startup_success(self):
         """Slot called when FTP server successfully starts."""
+        if self.external_server:
+            self.append_log("✅ 외부 FTP 서버가 시작되었습니다.")
+            return
         self.server_running = True
         self.toggle_btn.setText("FTP 서버 실행 중")
         self.toggle_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.server_status_label.setText("실행 중")
         self.server_status_label.setStyleSheet("color: green;")
-        self.server_status_indicator.setPixmap(QPixmap(os.path.join(BASE_DIR, "active.png")).scaled(16, 16, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        self.server_status_indicator.setPixmap(self.icons.get(ICON_ACTIVE, SERVER_ICON_SIZE))
         self.append_log("✅ FTP 서버가 성공적으로 시작되었습니다.")
 
     @pyqtSlot(str)
     def handle_server_startup_failure(self, error_message):
         """Slot called when FTP server fails to start."""
+        if self.external_server:
+            self.append_log(f"❌ 외부 FTP 서버 시작 실패: {error_message}")
+            return
         self.server_running = False
         self.toggle_btn.setText("FTP 서버 시작")
         self.toggle_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.server_status_label.setText("오류 발생")
         self.server_status_label.setStyleSheet("color: red;")
-        self.server_status_indicator.setPixmap(QPixmap(os.path.join(BASE_DIR, "error.png")).scaled(16, 16, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        self.server_status_indicator.setPixmap(self.icons.get(ICON_ERROR, SERVER_ICON_SIZE))
         self.append_log(f"❌ FTP 서버 시작 실패: {error_message}")
         self.show_message_box("FTP 서버 시작 실패", f"서버 시작 중 오류가 발생했습니다: {error_message}\n\n다른 프로그램이 포트 21을 사용 중이거나, 관리자 권한이 부족할 수 있습니다.")
 
 
     def stop_server(self):
         """Stops the running FTP server."""
-        global ftp_server
-        if self.server_running and ftp_server:
+        if self.server_running and ftp_core.ftp_server:
             try:
-                ftp_server.close_all()
+                stop_ftp_server()
+                self.ingest_metrics = None
                 self.server_running = False
                 self.toggle_btn.setText("FTP 서버 시작")
                 self.toggle_btn.setEnabled(True)
                 self.stop_btn.setEnabled(False)
                 self.server_status_label.setText("중지됨")
                 self.server_status_label.setStyleSheet("color: gray;")
-                self.server_status_indicator.setPixmap(QPixmap(os.path.join(BASE_DIR, "idle.png")).scaled(16, 16, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+                self.server_status_indicator.setPixmap(self.icons.get(ICON_IDLE, SERVER_ICON_SIZE))
                 self.append_log("🛑 FTP 서버가 중지되었습니다.")
                 root_logger.info("FTP server stopped.")
             except Exception as e:
@@ -590,106 +487,175 @@ class FTPServerGUI(QWidget):
         else:
             self.append_log("[!] FTP 서버가 이미 중지 상태입니다.")
 
+    def _on_status_event(self, event):
+        """
+        Buffers a status-channel event for the next GUI frame. Runs on the listener thread.
+        Server log lines are not written to root_logger again; the server already logged them.
+        상태 채널 이벤트를 다음 GUI 프레임까지 버퍼에 담습니다. (리스너 스레드에서 실행)
+        서버 로그는 서버 측에서 이미 기록했으므로 root_logger에 다시 기록하지 않습니다.
+        """
+        self.last_status_event_time = time.monotonic()
+        event_type = event.get("type")
+        if event_type == "log":
+            self.event_buffer.push_log(event.get("msg", ""))
+        elif event_type == "device":
+            self.event_buffer.push_device(event.get("device", ""), event.get("bytes", 0))
+        elif event_type == "server":
+            self.event_buffer.push_server(event.get("state", ""), event.get("detail", ""))
+        elif event_type == "metrics":
+            self.event_buffer.push_metrics(event.get("metrics", {}))
+
+    def _flush_events(self):
+        """
+        Applies everything buffered since the last frame: log lines in one document edit,
+        one status update per device, the latest metrics and any server state changes.
+        지난 프레임 이후 버퍼에 쌓인 이벤트를 한 번에 반영합니다.
+        """
+        logs, devices, server_events, metrics = self.event_buffer.drain()
+        if logs:
+            self._append_log_lines(logs)
+        for prefix, (files, nbytes) in devices.items():
+            self.update_device_status(prefix, files, nbytes)
+        if metrics is not None and (self.server_running or self.external_server):
+            self.ingest_metrics = metrics
+        for state, detail in server_events:
+            if state == "started":
+                self.handle_server_startup_success()
+            elif state == "failed":
+                self.handle_server_startup_failure(detail)
+        if logs or devices or server_events or metrics is not None:
+            c = self.event_buffer.counters()
+            self.event_counter_label.setText(
+                f"이벤트 수신 {c['received']} | 반영 {c['delivered']} | 병합 {c['coalesced']} | 버림 {c['dropped']}")
+
+    def _append_log_lines(self, lines):
+        """Appends several lines with a single document edit and one repaint."""
+        cursor = QTextCursor(self.log_output.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        text = "\n".join(lines)
+        if not self.log_output.document().isEmpty():
+            text = "\n" + text
+        cursor.insertText(text)
+        cursor.endEditBlock()
+        scrollbar = self.log_output.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
     @pyqtSlot(str) # <--- Added pyqtSlot decorator
     def append_log(self, msg):
-        """Appends a message to the log output QTextEdit."""
-        QMetaObject.invokeMethod(self.log_output, "append",
-                                 Qt.ConnectionType.QueuedConnection, Q_ARG(str, msg))
+        """
+        Queues a GUI-originated message for the log output (shown on the next frame) and
+        writes it to the file/console logger. Safe to call from any thread.
+        GUI에서 발생한 메시지를 로그 창 버퍼에 넣고(다음 프레임에 표시) 파일/콘솔에 기록합니다.
+        """
+        self.event_buffer.push_log(msg)
         # Ensure that the message logged to file/console doesn't cause encoding errors
         # Remove emojis for console/file logging, as QTextEdit handles them fine but console might not
         clean_msg_for_logger = msg.replace('⚠', '[WARN]').replace('✅', '[OK]').replace('🛑', '[STOP]').replace('❌', '[ERROR]')
         root_logger.info(clean_msg_for_logger)
 
-    @pyqtSlot(str)
-    def update_device_status(self, device_prefix):
+    def update_device_status(self, device_prefix, files=1, nbytes=0):
         """
-        Updates the status of a specific device in the GUI.
+        Updates the status and receive statistics of a specific device in the GUI,
+        adding a tile first if the server has just registered the device.
         """
-        device_name_map = {
-            "Main FAN": "Main FAN",
-            "Rotary Motor": "Rotary Motor",
-            "Combustion FAN": "Combustion FAN",
-            "Purge FAN": "Purge FAN"
-        }
-        
-        display_name = device_name_map.get(device_prefix, device_prefix)
-
-        if display_name not in self.device_labels:
-            self.append_log(f"[!] Unknown device prefix received: {device_prefix}. Not updating status.")
-            return
+        if device_prefix not in self.device_labels:
+            if device_prefix == UNKNOWN_DEVICE or not is_valid_device_name(device_prefix):
+                self.append_log(f"[!] Unknown device prefix received: {device_prefix}. Not updating status.")
+                return
+            # 서버가 자동 등록한 새 장치: 타일을 즉시 추가 (설정 변경/재시작 불필요)
+            self.device_registry.register(device_prefix)
+            self._add_device_tile(device_prefix)
+            self.append_log(f"[+] New device added: {device_prefix}")
 
         now = QDateTime.currentDateTime()
-        self.device_last_received[display_name] = now
-        
-        label = self.device_labels[display_name]
-        last_received_label = self.device_last_received_labels[display_name]
-
-        label.setPixmap(QPixmap(os.path.join(BASE_DIR, "active.png")).scaled(
-            32, 32, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
-        ))
-        last_received_label.setText(now.toString("hh:mm:ss"))
-        last_received_label.setStyleSheet("font-size: 10px; color: blue;")
+        self.device_last_received[device_prefix] = now
+        self.device_received_once.add(device_prefix)
 
-        if display_name in self.device_timers:
-            self.device_timers[display_name].stop()
+        self._set_device_state(device_prefix, DeviceState.ACTIVE)
+        self.device_last_received_labels[device_prefix].setText(now.toString("hh:mm:ss"))
+        self.device_timers[device_prefix].start() # 활성 표시 유지 시간 재시작
 
-        timer = QTimer(self)
-        timer.setSingleShot(True)
-        timer.timeout.connect(partial(self.reset_device_icon, display_name))
-        timer.start(ACTIVE_ICON_DURATION_MS)
-        self.device_timers[display_name] = timer
+        stats = self.device_registry.record(device_prefix, nbytes, files)
+        if stats is not None:
+            self.device_labels[device_prefix].setToolTip(
+                f"{stats.files} files, {stats.bytes / 1024:.1f} KB\n"
+                f"{stats.files_per_minute():.1f} files/min, last seen {now.toString('hh:mm:ss')}")
 
     def reset_device_icon(self, device_name):
         """Resets a device icon to idle state after an active period."""
-        if device_name in self.device_labels:
-            label = self.device_labels[device_name]
-            label.setPixmap(QPixmap(os.path.join(BASE_DIR, "idle.png")).scaled(
-                32, 32, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
-            ))
+        if self.device_states.get(device_name) == DeviceState.ACTIVE:
+            self._set_device_state(device_name, DeviceState.IDLE)
 
     def check_device_errors(self):
         """
         Periodically checks for devices that haven't received data within a threshold
-        and updates their icon to error state.
+        and updates their icon to error state. Only state transitions touch widgets.
         """
         now = QDateTime.currentDateTime()
-        for name in self.device_names:
-            if name not in self.device_labels:
-                continue
-
+        for name, state in list(self.device_states.items()):
             last_time = self.device_last_received.get(name, now)
-            label = self.device_labels[name]
-            last_received_label = self.device_last_received_labels[name]
-
             if last_time.msecsTo(now) > INACTIVE_THRESHOLD_MS:
-                # Check if the current pixmap is not already the error icon to avoid unnecessary updates
-                if label.pixmap().toImage() != QPixmap(os.path.join(BASE_DIR, "error.png")).toImage():
-                    label.setPixmap(QPixmap(os.path.join(BASE_DIR, "error.png")).scaled(
-                        32, 32, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
-                    ))
-                    last_received_label.setStyleSheet("font-size: 10px; color: red;")
-                    # Log only if the status actually changed to error from idle/active
-                    if last_received_label.text() != "미수신" and "오류" not in last_received_label.text():
-                         self.append_log(f"[!] Warning: '{name}' has not received data for {INACTIVE_THRESHOLD_MS/1000} seconds. Last received: {last_time.toString('hh:mm:ss')}")
-            else:
-                # If it was in error state but now within threshold, reset color to gray (unless active)
-                if last_received_label.styleSheet() == "font-size: 10px; color: red;" and \
-                   label.pixmap().toImage() != QPixmap(os.path.join(BASE_DIR, "active.png")).toImage():
-                    last_received_label.setStyleSheet("font-size: 10px; color: gray;")
+                if state != DeviceState.ERROR:
+                    self._set_device_state(name, DeviceState.ERROR)
+                    # Log only if the device has delivered data before
+                    if name in self.device_received_once:
+                        self.append_log(f"[!] Warning: '{name}' has not received data for {INACTIVE_THRESHOLD_MS/1000} seconds. Last received: {last_time.toString('hh:mm:ss')}")
+            elif state == DeviceState.ERROR:
+                self._set_device_state(name, DeviceState.IDLE)
 
     def _update_server_status_display(self):
         """Periodically updates the textual server status to reflect actual state."""
+        if self.external_server:
+            self._update_external_server_display()
+            return
         # Use self.server_thread to check if the thread is alive
         if self.server_running and self.server_thread and self.server_thread.is_alive():
             if self.server_status_label.text() != "실행 중":
                 self.server_status_label.setText("실행 중")
                 self.server_status_label.setStyleSheet("color: green;")
-                self.server_status_indicator.setPixmap(QPixmap(os.path.join(BASE_DIR, "active.png")).scaled(16, 16, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+                self.server_status_indicator.setPixmap(self.icons.get(ICON_ACTIVE, SERVER_ICON_SIZE))
         elif not self.server_running:
             if self.server_status_label.text() != "중지됨" and self.server_status_label.text() != "오류 발생":
                 self.server_status_label.setText("중지됨")
                 self.server_status_label.setStyleSheet("color: gray;")
-                self.server_status_indicator.setPixmap(QPixmap(os.path.join(BASE_DIR, "idle.png")).scaled(16, 16, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+                self.server_status_indicator.setPixmap(self.icons.get(ICON_IDLE, SERVER_ICON_SIZE))
+        self._update_ingest_status_display()
+
+    def _update_external_server_display(self):
+        """
+        External server mode: the daemon is considered alive while its once-per-second
+        metrics events keep arriving.
+        외부 서버 모드: 데몬의 주기적 지표 이벤트가 계속 수신되면 실행 중으로 표시합니다.
+        """
+        alive = time.monotonic() - self.last_status_event_time < EXTERNAL_SERVER_TIMEOUT_S
+        text, color, icon = ("실행 중 (외부)", "green", ICON_ACTIVE) if alive else ("응답 없음 (외부)", "gray", ICON_IDLE)
+        if self.server_status_label.text() != text:
+            self.server_status_label.setText(text)
+            self.server_status_label.setStyleSheet(f"color: {color};")
+            self.server_status_indicator.setPixmap(self.icons.get(icon, SERVER_ICON_SIZE))
+        if not alive:
+            self.ingest_metrics = None
+        self._update_ingest_status_display()
+
+    def _update_ingest_status_display(self):
+        """Shows ingest queue backpressure metrics. 수신 처리 큐의 적체 지표를 표시합니다."""
+        m = self.ingest_metrics
+        if not m:
+            self.ingest_status_label.setText("수신 큐: -")
+            self.ingest_status_label.setStyleSheet("color: gray;")
+            return
+        self.ingest_status_label.setText(
+            f"수신 큐: {m['queue_depth']}/{m['max_queue']} (최대 {m['high_water']}) | "
+            f"처리 {m['processed']} | 실패 {m['failed']} | 거부 {m['rejected']} (재시도 대기 {m['deferred']}) | "
+            f"대기 {m['avg_wait_ms']:.0f}ms (최대 {m['max_wait_ms']:.0f}ms)"
+        )
+        if m['rejected'] or m['queue_depth'] >= m['max_queue'] * 0.8:
+            self.ingest_status_label.setStyleSheet("color: red;")
+        elif m['queue_depth'] > 0:
+            self.ingest_status_label.setStyleSheet("color: orange;")
+        else:
+            self.ingest_status_label.setStyleSheet("color: green;")
 
 
     def show_message_box(self, title, message, icon=QMessageBox.Icon.Warning):
@@ -703,6 +669,13 @@ class FTPServerGUI(QWidget):
         msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
         msg_box.exec()
 
+    def closeEvent(self, event):
+        """Stops the embedded server and the status listener on exit. 종료 시 서버와 상태 채널 수신을 정리합니다."""
+        if self.server_running:
+            stop_ftp_server()
+        self.status_listener.stop()
+        event.accept()
+
 
 if __name__ == "__main__":
     CONFIG = Config()
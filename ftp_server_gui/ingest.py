@@ -0,0 +1,422 @@
+import os
+import queue
+import collections
+import shutil
+import threading
+import time
+import logging
+from datetime import datetime
+
+import numpy as np
+
+from device_csv import read_device_csv
+from device_registry import DeviceRegistry, UNKNOWN_DEVICE, device_prefix_from_name
+
+
+root_logger = logging.getLogger()
+
+# --- Constants ---
+# 펌웨어(mro_ftp_client.ino)와 맞춰야 하는 상수
+SAMPLE_COUNT_PER_CHANNEL = 30000  # FTP_Send 가 한 파일에 기록하는 샘플 수
+DEFAULT_INGEST_WORKERS = 2
+DEFAULT_INGEST_QUEUE_SIZE = 64
+QUEUE_HIGH_WATERMARK_RATIO = 0.8  # 큐가 80% 이상 차면 경고
+
+# 워커 종료 신호
+_STOP = object()
+
+
+class DeviceCapture:
+    """
+    One capture file uploaded by an ESP32 board, parsed into header fields and samples.
+    ESP32 보드가 업로드한 캡처 파일 1개를 헤더 필드와 샘플 배열로 파싱한 결과.
+    """
+    __slots__ = ("device", "channel", "location", "label", "timestamp", "samples", "source_path")
+
+    def __init__(self, device, channel, location, label, timestamp, samples, source_path=None):
+        self.device = device
+        self.channel = channel
+        self.location = location
+        self.label = label
+        self.timestamp = timestamp  # datetime, 헤더의 "Date & Time" 값 (파싱 실패 시 None)
+        self.samples = samples  # np.ndarray(uint16), ADC 코드
+        self.source_path = source_path
+
+    def __repr__(self):
+        return (f"DeviceCapture(device={self.device!r}, channel={self.channel!r}, "
+                f"timestamp={self.timestamp}, samples={len(self.samples)})")
+
+
+def parse_upload_name(filename, registry):
+    """
+    Extracts (device prefix, channel name) from a firmware file name such as
+    '[Main FAN]_CH0_20250101_120000.csv'. Prefixes not in ``registry`` are auto-registered
+    when the registry allows it and the name follows the firmware format, otherwise they
+    become "Unknown Device". ``registry`` None accepts any prefix.
+    펌웨어 파일 이름에서 (장치 접두사, 채널 이름)을 추출합니다. 등록되지 않은 접두사는
+    자동 등록이 허용되면 등록하고, 아니면 "Unknown Device" 로 처리합니다.
+    Returns (prefix, channel_name, warnings).
+    """
+    prefix = "Unknown"
+    channel_name = "Unknown"
+    warnings = []
+
+    # Extract prefix (e.g., [Main FAN])
+    if filename.startswith('[') and ']' in filename:
+        try:
+            prefix = filename.split(']')[0].strip('[]')
+            if registry is not None and prefix not in registry:
+                registered = False
+                if device_prefix_from_name(filename) == prefix:
+                    prefix, registered = registry.resolve(prefix)
+                if registered:
+                    warnings.append(f"[+] New device registered: '{prefix}'")
+                elif prefix not in registry:
+                    warnings.append(f"[!] Warning: Unknown device prefix '{prefix}' in filename: {filename}")
+                    prefix = UNKNOWN_DEVICE # 알 수 없는 장치 접두사에 대한 기본값 설정
+        except Exception as e:
+            warnings.append(f"[!] Error parsing prefix from '{filename}': {e}")
+            prefix = "Parse Error" # 파싱 오류 시 기본값 설정
+
+    # Extract channel name (e.g., CH0, CH1)
+    if "_CH" in filename:
+        try:
+            channel_part = filename.split("_CH")[1]
+            channel_name = "CH" + channel_part.split("_")[0]
+        except Exception as e:
+            warnings.append(f"[!] Error parsing channel name from '{filename}': {e}")
+            channel_name = "Parse Error" # 파싱 오류 시 기본값 설정
+
+    return prefix, channel_name, warnings
+
+
+def parse_device_csv(file_path, device=None, channel=None):
+    """
+    Parses a CSV written by FTP_Send: four text header lines followed by one uint16 per line.
+    FTP_Send 가 기록한 CSV(4줄 텍스트 헤더 + 줄당 uint16 1개)를 파싱합니다.
+    The numeric body is converted in one numpy call (device_csv, shared with the IEPE tool).
+    """
+    header, samples = read_device_csv(file_path)
+    return DeviceCapture(device or header["position"], channel, header["location"], header["label"],
+                         header["timestamp"], samples, file_path)
+
+
+class IngestMetrics:
+    """
+    Thread-safe backpressure counters for the ingest pipeline.
+    수신 파이프라인의 백프레셔(적체) 지표를 스레드 안전하게 집계합니다.
+    """
+    def __init__(self, max_queue):
+        self._lock = threading.Lock()
+        self.max_queue = max_queue
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0  # 큐가 가득 차서 받지 못한 파일 수
+        self.deferred = 0  # 큐가 비면 다시 넣기 위해 대기 중인 파일 수
+        self.queue_depth = 0
+        self.high_water = 0  # 최대 큐 깊이
+        self.busy_workers = 0
+        self.max_wait_ms = 0.0
+        self._total_wait_ms = 0.0
+        self._total_process_ms = 0.0
+
+    def on_submit(self, depth):
+        with self._lock:
+            self.submitted += 1
+            self.queue_depth = depth
+            self.high_water = max(self.high_water, depth)
+
+    def on_reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def on_defer(self, deferred):
+        with self._lock:
+            self.deferred = deferred
+
+    def on_start(self, wait_ms, depth):
+        with self._lock:
+            self.busy_workers += 1
+            self.queue_depth = depth
+            self._total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def on_finish(self, process_ms, ok, depth):
+        with self._lock:
+            self.busy_workers -= 1
+            self.queue_depth = depth
+            self._total_process_ms += process_ms
+            if ok:
+                self.processed += 1
+            else:
+                self.failed += 1
+
+    def on_remote_job(self, ok, wait_ms, process_ms):
+        """
+        Counts a job finished by another process (multiprocess server mode sessions).
+        다른 프로세스(multiprocess 모드의 세션)가 처리한 작업을 합산합니다.
+        """
+        with self._lock:
+            self.submitted += 1
+            self._total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self._total_process_ms += process_ms
+            if ok:
+                self.processed += 1
+            else:
+                self.failed += 1
+
+    def snapshot(self):
+        """Returns a consistent copy of the counters as a dict."""
+        with self._lock:
+            done = self.processed + self.failed
+            return {
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "deferred": self.deferred,
+                "queue_depth": self.queue_depth,
+                "max_queue": self.max_queue,
+                "high_water": self.high_water,
+                "busy_workers": self.busy_workers,
+                "avg_wait_ms": self._total_wait_ms / done if done else 0.0,
+                "max_wait_ms": self.max_wait_ms,
+                "avg_process_ms": self._total_process_ms / done if done else 0.0,
+            }
+
+
+class IngestJob:
+    """A received file waiting in the ingest queue. 수신 큐에서 대기 중인 파일."""
+    __slots__ = ("file_path", "enqueued_at", "received_at")
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.enqueued_at = time.monotonic()
+        self.received_at = datetime.now()
+
+
+class IngestPipeline:
+    """
+    Post-receive pipeline: a bounded queue drained by a pool of worker threads that
+    parse, convert and file each uploaded capture, so the FTP I/O loop never blocks on disk work.
+    수신 후처리 파이프라인: 제한된 크기의 큐와 워커 스레드 풀이 업로드된 캡처를 파싱/변환/분류 저장하여,
+    FTP I/O 루프가 디스크 작업으로 멈추지 않도록 합니다.
+
+    registry: DeviceRegistry (or a plain list of names, which disables auto-registration)
+    used to resolve upload prefixes.
+    converters: callables ``converter(capture, dest_path)`` run on each parsed capture
+    before the raw file is moved into ``root_dir/<device>/<date>/<CH>``.
+    keep_raw: when False, the raw CSV is deleted instead of filed once every converter succeeded.
+    Files that arrive while the queue is full stay in the upload directory and are queued
+    again by the workers once the queue has drained below half of the high watermark.
+    inline: no worker threads; callers process files themselves with run_inline() (used by
+    per-session server processes, which are already off the accepting loop).
+    on_job: optional ``on_job(ok, wait_ms, process_ms)`` called after every job, so forked
+    session processes can report their counts back to the parent's metrics.
+    """
+    def __init__(self, root_dir, registry=None, log=None, on_filed=None,
+                 workers=DEFAULT_INGEST_WORKERS, max_queue=DEFAULT_INGEST_QUEUE_SIZE, converters=None,
+                 keep_raw=True, inline=False, on_job=None):
+        self.root_dir = root_dir
+        if registry is not None and not isinstance(registry, DeviceRegistry):
+            registry = DeviceRegistry(registry, auto_register=False)
+        self.registry = registry
+        self.log = log or root_logger.info
+        self.on_filed = on_filed  # 파일 저장 완료 시 (장치 접두사, 바이트 수)로 호출되는 콜백
+        self.converters = list(converters or [])
+        self.keep_raw = keep_raw
+        self.inline = inline
+        self.on_job = on_job  # 작업 완료 시 (성공 여부, 대기 ms, 처리 ms)로 호출되는 콜백
+        self.worker_count = max(1, int(workers))
+        self.metrics = IngestMetrics(max_queue)
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._deferred = collections.deque()  # 큐가 가득 차서 업로드 폴더에 남겨 둔 파일 경로
+        self._deferred_lock = threading.Lock()
+        self._workers = []
+        self._accepting = False
+        self._high_water_warned = False
+
+    def start(self):
+        """Starts the worker threads. 워커 스레드를 시작합니다."""
+        if self._workers:
+            return
+        self._accepting = True
+        if self.inline:
+            return
+        for i in range(self.worker_count):
+            worker = threading.Thread(target=self._worker_loop, name=f"ingest-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout=5.0):
+        """
+        Stops accepting files, lets workers finish what is already queued, then joins them.
+        새 파일 접수를 중단하고, 이미 큐에 있는 작업을 마친 뒤 워커를 종료합니다.
+        """
+        self._accepting = False
+        deadline = time.monotonic() + timeout
+        for _ in self._workers:
+            try:
+                self._queue.put(_STOP, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        self._workers = []
+        with self._deferred_lock:
+            deferred = len(self._deferred)
+            self._deferred.clear()
+        if deferred:
+            self.log(f"[!] {deferred} upload(s) left unfiled in the upload directory (ingest queue was full).")
+
+    def submit(self, file_path):
+        """
+        Queues a received file without blocking. Returns False when the queue is full;
+        the file then stays where pyftpdlib wrote it and is queued again once the queue drains.
+        수신 파일을 블로킹 없이 큐에 넣습니다. 큐가 가득 차면 False 를 반환하며,
+        파일은 pyftpdlib 가 저장한 위치에 남았다가 큐가 비면 다시 큐에 들어갑니다.
+        """
+        if not self._accepting:
+            self.metrics.on_reject()
+            return False
+        try:
+            self._queue.put_nowait(IngestJob(file_path))
+        except queue.Full:
+            self.metrics.on_reject()
+            with self._deferred_lock:
+                self._deferred.append(file_path)
+                deferred = len(self._deferred)
+            self.metrics.on_defer(deferred)
+            self.log(f"[!] Ingest queue full ({self._queue.maxsize}). Left '{os.path.basename(file_path)}' "
+                     f"in upload directory; it is retried when the queue drains ({deferred} waiting).")
+            self._retry_deferred()  # 그 사이 워커가 큐를 모두 비웠을 수 있음
+            return False
+        self._on_queued()
+        return True
+
+    def _on_queued(self):
+        depth = self._queue.qsize()
+        self.metrics.on_submit(depth)
+        high_water = self._queue.maxsize * QUEUE_HIGH_WATERMARK_RATIO
+        if depth >= high_water and not self._high_water_warned:
+            self._high_water_warned = True
+            self.log(f"[!] Warning: Ingest workers falling behind - queue depth {depth}/{self._queue.maxsize}")
+        elif depth < high_water / 2:
+            self._high_water_warned = False
+
+    def _retry_deferred(self):
+        """Re-queues deferred uploads while the queue is below half of the high watermark. 대기 파일 재투입."""
+        low_water = self._queue.maxsize * QUEUE_HIGH_WATERMARK_RATIO / 2
+        while self._accepting and self._queue.qsize() < low_water:
+            with self._deferred_lock:
+                if not self._deferred:
+                    return
+                file_path = self._deferred.popleft()
+                deferred = len(self._deferred)
+            self.metrics.on_defer(deferred)
+            if not os.path.exists(file_path):
+                continue  # 그 사이 클라이언트가 지웠거나 덮어쓴 뒤 이미 처리됨
+            try:
+                self._queue.put_nowait(IngestJob(file_path))
+            except queue.Full:
+                with self._deferred_lock:
+                    self._deferred.appendleft(file_path)
+                    deferred = len(self._deferred)
+                self.metrics.on_defer(deferred)
+                return
+            self._on_queued()
+
+    def run_inline(self, file_path):
+        """Processes a received file on the calling thread. 호출한 스레드에서 바로 처리합니다."""
+        job = IngestJob(file_path)
+        self.metrics.on_submit(0)
+        self._run_job(job)
+
+    def _worker_loop(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is _STOP:
+                    return
+                self._run_job(job)
+            finally:
+                self._queue.task_done()
+            self._retry_deferred()
+
+    def _run_job(self, job):
+        started = time.monotonic()
+        wait_ms = (started - job.enqueued_at) * 1000.0
+        self.metrics.on_start(wait_ms, self._queue.qsize())
+        ok = False
+        try:
+            ok = self.process(job)
+        except Exception as e:
+            self.log(f"[!] Unexpected error processing '{os.path.basename(job.file_path)}': {e}")
+        finally:
+            process_ms = (time.monotonic() - started) * 1000.0
+            self.metrics.on_finish(process_ms, ok, self._queue.qsize())
+            if self.on_job:
+                self.on_job(ok, wait_ms, process_ms)
+
+    def process(self, job):
+        """
+        Parses, converts and files one received capture. Runs on a worker thread.
+        수신된 캡처 1개를 파싱/변환/분류 저장합니다. 워커 스레드에서 실행됩니다.
+        """
+        filename = os.path.basename(job.file_path)
+        prefix, channel_name, warnings = parse_upload_name(filename, self.registry)
+        for warning in warnings:
+            self.log(warning)
+
+        date_folder = job.received_at.strftime("%Y%m%d")
+        dest_folder = os.path.join(self.root_dir, prefix, date_folder, channel_name)
+        dest_path = os.path.join(dest_folder, filename)
+
+        try:
+            nbytes = os.path.getsize(job.file_path)
+        except OSError:
+            nbytes = 0
+
+        capture = None
+        converted = False
+        try:
+            capture = parse_device_csv(job.file_path, device=prefix, channel=channel_name)
+            if len(capture.samples) != SAMPLE_COUNT_PER_CHANNEL:
+                self.log(f"[!] Warning: '{filename}' has {len(capture.samples)} samples (expected {SAMPLE_COUNT_PER_CHANNEL}).")
+        except (OSError, ValueError) as e:
+            # 펌웨어 형식이 아닌 파일도 분류 저장은 계속 진행
+            self.log(f"[!] Could not parse '{filename}' as device CSV: {e}")
+
+        if capture is not None and self.converters:
+            converted = True
+            for converter in self.converters:
+                try:
+                    converter(capture, dest_path)
+                except Exception as e:
+                    converted = False
+                    self.log(f"[!] Conversion error for '{filename}': {e}")
+
+        if converted and not self.keep_raw:
+            # 변환본(아카이브)만 보관하고 원본 CSV 는 삭제
+            try:
+                os.remove(job.file_path)
+            except OSError as e:
+                self.log(f"[!] Could not remove converted upload '{filename}': {e}")
+            self.log(f"[✓] FILE ARCHIVED: {filename}")
+            if self.on_filed:
+                self.on_filed(prefix, nbytes)
+            return True
+
+        try:
+            os.makedirs(dest_folder, exist_ok=True)
+            shutil.move(job.file_path, dest_path)
+        except OSError as e:
+            self.log(f"[!] File system error saving '{filename}' to '{dest_path}': {e}. Check permissions or disk space.")
+            return False
+
+        self.log(f"[✓] FILE SAVED TO: {dest_path}")
+        if self.on_filed:
+            self.on_filed(prefix, nbytes)
+        return True
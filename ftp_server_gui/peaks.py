@@ -0,0 +1,54 @@
+"""
+Batched spectral peak search shared by the analytics pipeline. Same algorithm as
+ni_data_acq/peaks.py in the IEPE tool, so both report identical peak frequencies.
+분석 파이프라인용 배치 스펙트럼 피크 검색. IEPE 툴의 ni_data_acq/peaks.py 와 같은 알고리즘이므로
+두 도구가 같은 피크 주파수를 보고합니다.
+"""
+import numpy as np
+
+_LOG_FLOOR = 1e-300  # log(0) 방지
+
+
+def find_peaks(spectrum, freqs, count):
+    """
+    Returns the top `count` peaks of spectrum (..., bins) in O(bins); leading axes are batched
+    (channels / captures). Only local maxima are candidates, so adjacent bins of one peak never
+    fill several slots; the true frequency and amplitude are refined by parabolic interpolation
+    of the log magnitude. Missing peaks are filled with nan / 0.
+    스펙트럼 (..., bins) 의 상위 count 개 피크를 O(bins) 로 찾습니다 (앞쪽 차원은 채널/캡처 배치).
+    - 국소 최댓값(양옆 bin 보다 큰 bin)만 후보로 삼으므로 같은 피크의 인접 bin 이 여러 자리를 차지하지 않습니다.
+    - 후보 중 상위 count 개를 argpartition 으로 고르고 그 count 개만 정렬합니다.
+    - 로그 진폭에 대한 포물선 보간으로 bin 사이의 실제 주파수와 진폭을 추정합니다.
+    freqs 는 균일 간격 주파수 축 (rfftfreq 또는 Zoom FFT 대역).
+    반환: (주파수, 진폭) 각각 (..., count), 진폭 내림차순. 피크가 count 개보다 적으면 nan / 0 으로 채움.
+    """
+    spectrum = np.asarray(spectrum)
+    shape = spectrum.shape[:-1]
+    peak_freqs = np.full(shape + (count,), np.nan)
+    peak_amps = np.zeros(shape + (count,))
+    n = spectrum.shape[-1]
+    if n < 3 or count < 1:
+        return peak_freqs, peak_amps
+
+    left = spectrum[..., :-2]
+    center = spectrum[..., 1:-1]
+    right = spectrum[..., 2:]
+    candidates = np.where((center > left) & (center >= right), center, -np.inf)
+    k = min(count, n - 2)
+    top = np.argpartition(candidates, -k, axis=-1)[..., -k:]
+    top_vals = np.take_along_axis(candidates, top, axis=-1)
+    order = np.argsort(-top_vals, axis=-1)
+    top = np.take_along_axis(top, order, axis=-1)
+    valid = np.isfinite(np.take_along_axis(top_vals, order, axis=-1))
+
+    a = np.log(np.maximum(np.take_along_axis(left, top, axis=-1), _LOG_FLOOR))
+    b = np.log(np.maximum(np.take_along_axis(center, top, axis=-1), _LOG_FLOOR))
+    c = np.log(np.maximum(np.take_along_axis(right, top, axis=-1), _LOG_FLOOR))
+    denom = a - 2.0 * b + c
+    delta = np.divide(0.5 * (a - c), denom, out=np.zeros_like(denom), where=denom < 0)
+    delta = np.clip(delta, -0.5, 0.5)
+
+    step = freqs[1] - freqs[0]
+    peak_freqs[..., :k] = np.where(valid, freqs[top + 1] + delta * step, np.nan)
+    peak_amps[..., :k] = np.where(valid, np.exp(b - 0.25 * (a - c) * delta), 0.0)
+    return peak_freqs, peak_amps
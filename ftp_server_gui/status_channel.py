@@ -0,0 +1,144 @@
+import json
+import socket
+import threading
+import logging
+
+
+root_logger = logging.getLogger()
+
+# --- Constants ---
+DEFAULT_STATUS_HOST = "127.0.0.1"
+DEFAULT_STATUS_PORT = 50021
+MAX_DATAGRAM_SIZE = 60000  # UDP 데이터그램 한 개에 담을 최대 바이트
+
+
+class StatusPublisher:
+    """
+    Sends server events (log lines, device uploads, server state, ingest metrics) as small
+    JSON datagrams to a local UDP port. Sending never blocks the FTP loop and works from
+    forked worker processes, so any number of server processes can feed one viewer.
+    서버 이벤트(로그, 장치 수신, 서버 상태, 수신 지표)를 로컬 UDP 포트로 JSON 데이터그램으로 보냅니다.
+    전송은 FTP 루프를 막지 않으며 fork 된 워커 프로세스에서도 동작합니다.
+    """
+    def __init__(self, port=DEFAULT_STATUS_PORT, host=DEFAULT_STATUS_HOST):
+        self.addresses = [(host, port)]
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self._periodic_stop = threading.Event()
+        self._periodic_threads = []
+
+    def add_target(self, host, port):
+        """Sends every event to an additional local listener as well. 추가 수신 대상을 등록합니다."""
+        if (host, port) not in self.addresses:
+            self.addresses.append((host, port))
+
+    def publish(self, event_type, **fields):
+        """Sends one event. Delivery is best-effort: a missing listener or full buffer is ignored."""
+        fields["type"] = event_type
+        data = json.dumps(fields, ensure_ascii=False).encode("utf-8")
+        if len(data) > MAX_DATAGRAM_SIZE:
+            return
+        for address in self.addresses:
+            try:
+                self._sock.sendto(data, address)
+            except OSError:
+                pass  # 수신 측이 없거나 버퍼가 가득 찬 경우 무시
+
+    def log(self, msg):
+        self.publish("log", msg=msg)
+
+    def device(self, prefix, nbytes=0):
+        self.publish("device", device=prefix, bytes=nbytes)
+
+    def server(self, state, detail=""):
+        """state: 'started' / 'failed' / 'stopped'"""
+        self.publish("server", state=state, detail=detail)
+
+    def metrics(self, snapshot):
+        self.publish("metrics", metrics=snapshot)
+
+    def ingest_job(self, ok, wait_ms, process_ms):
+        """One finished ingest job (sent by multiprocess sessions to the parent server)."""
+        self.publish("ingest_job", ok=bool(ok), wait_ms=wait_ms, process_ms=process_ms)
+
+    def start_periodic(self, event_type, source, interval=1.0):
+        """
+        Publishes ``source()`` as ``event_type`` every ``interval`` seconds until stop() is called.
+        stop() 이 호출될 때까지 interval 초마다 source() 결과를 발행합니다.
+        """
+        def loop():
+            while not self._periodic_stop.wait(interval):
+                try:
+                    self.publish(event_type, **{event_type: source()})
+                except Exception as e:
+                    root_logger.error(f"Status publisher error ({event_type}): {e}")
+
+        thread = threading.Thread(target=loop, name=f"status-{event_type}", daemon=True)
+        thread.start()
+        self._periodic_threads.append(thread)
+
+    def stop(self):
+        self._periodic_stop.set()
+        for thread in self._periodic_threads:
+            thread.join(1.0)
+        self._periodic_threads = []
+        self._periodic_stop = threading.Event()
+
+    def close(self):
+        self.stop()
+        self._sock.close()
+
+
+class StatusListener:
+    """
+    Receives StatusPublisher datagrams on a background thread and hands each decoded
+    event dict to ``callback``. The callback runs on the listener thread.
+    StatusPublisher 데이터그램을 백그라운드 스레드에서 수신하여 디코딩된 이벤트(dict)를 callback 에 전달합니다.
+    """
+    def __init__(self, callback, port=DEFAULT_STATUS_PORT, host=DEFAULT_STATUS_HOST):
+        self.callback = callback
+        self.address = (host, port)
+        self._sock = None
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """
+        Binds the status port (port 0 picks a free one; see ``address`` afterwards).
+        Raises OSError if another viewer already owns it.
+        """
+        if self._running:
+            return
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(self.address)
+        self.address = self._sock.getsockname()
+        self._sock.settimeout(0.5)
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="status-listener", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while self._running:
+            try:
+                data, _ = self._sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                event = json.loads(data.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                continue
+            try:
+                self.callback(event)
+            except Exception as e:
+                root_logger.error(f"Status listener callback error: {e}")
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(1.0)
+            self._thread = None
+        if self._sock:
+            self._sock.close()
+            self._sock = None
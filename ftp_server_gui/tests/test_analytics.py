@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from analytics import (ADC_FULL_SCALE, CAL_RESISTOR, FEATURE_DTYPE, BatchAnalyzer, ChannelScaling, FeatureTable)
+from archive import ArchiveWriter, archive_path_for
+
+FS = 10000.0
+N = 30000
+
+
+def _codes(freq, amplitude, offset=2048):
+    t = np.arange(N) / FS
+    return np.round(offset + amplitude * np.sin(2 * np.pi * freq * t)).astype(np.uint16)
+
+
+def test_vibration_features(tmp_path):
+    scaling = ChannelScaling(vref=2.5, sensitivity={"CH0": 0.1})
+    analyzer = BatchAnalyzer(str(tmp_path), scaling, sample_rate=FS)
+    rows = analyzer.analyze(_codes(500.0, 1000), [0], [1.0])
+    g_per_code = 2.5 / ADC_FULL_SCALE / 0.1
+
+    assert rows["n_samples"][0] == N and rows["sample_rate"][0] == FS
+    assert rows["mean"][0] == pytest.approx(2048 * g_per_code, rel=1e-4)
+    assert rows["rms"][0] == pytest.approx(1000 * g_per_code / np.sqrt(2), rel=1e-3)
+    assert rows["peak"][0] == pytest.approx(1000 * g_per_code, rel=1e-3)
+    assert rows["crest"][0] == pytest.approx(np.sqrt(2), rel=1e-3)
+    assert rows["peak_freq"][0, 0] == pytest.approx(500.0, abs=0.1)
+    assert rows["peak_amp"][0, 0] == pytest.approx(1000 * g_per_code, rel=1e-3)
+    assert np.all(np.isfinite(rows["peak_freq"]))  # 없는 피크는 nan 대신 0
+
+
+def test_current_channel_scaling():
+    scaling = ChannelScaling(vref=2.5, current_scale={"offset": 4.0, "gain": 16.0, "range": 10.0})
+    values = scaling.apply(np.array([[0, 4095]]), [1])
+    milliamps = 2.5 * 1000.0 / CAL_RESISTOR
+    np.testing.assert_allclose(values[0], [-4.0 / 16.0 * 10.0, (milliamps - 4.0) / 16.0 * 10.0])
+
+
+def test_batch_matches_single_captures(tmp_path):
+    analyzer = BatchAnalyzer(str(tmp_path), sample_rate=FS)
+    codes = np.stack([_codes(120.0, 300), _codes(60.0, 50, offset=1000), _codes(2500.0, 10)])
+    batch = analyzer.analyze(codes, [0, 1, 2], [1.0, 2.0, 3.0])
+    for i in range(3):
+        single = analyzer.analyze(codes[i], [i], [float(i + 1)])
+        for field in ("mean", "rms", "peak", "crest", "peak_freq", "peak_amp"):
+            np.testing.assert_allclose(batch[field][i], single[field][0], rtol=1e-6)
+
+
+def test_feature_table_ignores_duplicates(tmp_path):
+    table = FeatureTable(str(tmp_path))
+    rows = np.zeros(3, dtype=FEATURE_DTYPE)
+    rows["timestamp"] = [1.0, 2.0, 2.0]
+    rows["channel"] = [0, 0, 1]
+    assert table.append("fan", rows) == 3
+    assert table.append("fan", rows[1:]) == 0
+    assert FeatureTable(str(tmp_path)).append("fan", rows[:1]) == 0  # 다른 인스턴스(프로세스)도 파일에서 확인
+    assert len(table.read("fan")) == 3
+    assert table.keys("fan") == {(1.0, 0), (2.0, 0), (2.0, 1)}
+    assert len(table.read("pump")) == 0
+
+
+def test_backlog_analyses_archives_once_in_batches(tmp_path):
+    root = str(tmp_path)
+    writer = ArchiveWriter()
+    dest = str(tmp_path / "fan" / "20250101" / "CH0" / "x.csv")
+    for i in range(7):
+        writer.append(archive_path_for(dest), _codes(100.0 + i, 500), "fan", i % 2, 1_700_000_000.0 + i)
+
+    analyzer = BatchAnalyzer(root, sample_rate=FS, batch_size=3)
+    calls = []
+    original = analyzer._store
+    analyzer._store = lambda device, rows: (calls.append(len(rows)), original(device, rows))
+    assert analyzer.run_backlog() == 7
+    assert sorted(calls) == [1, 3, 3]
+    assert analyzer.run_backlog() == 0
+    rows = analyzer.table.read("fan")
+    assert len(rows) == 7
+    np.testing.assert_allclose(np.sort(rows["peak_freq"][:, 0]), 100.0 + np.arange(7), atol=0.1)
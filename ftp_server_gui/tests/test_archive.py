@@ -0,0 +1,252 @@
+import os
+import zlib
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import archive
+from archive import (ArchiveWriter, ArchiveReader, ArchiveError, MappedArchive, CaptureIndex, FILE_HEADER,
+                     CODEC_NONE, CODEC_ZLIB, CODEC_LZ4, encode_samples, decode_samples, archive_path_for)
+
+CODECS = ["none", "zlib", pytest.param("lz4", marks=pytest.mark.skipif(archive.lz4_frame is None,
+                                                                        reason="lz4 package not installed"))]
+
+
+def _samples(seed, n=3000):
+    rng = np.random.default_rng(seed)
+    samples = rng.integers(0, 4096, n).astype(np.uint16)
+    samples[:4] = [0, 65535, 0, 65535]  # 델타 인코딩의 2^16 래핑 구간
+    return samples
+
+
+def _write(path, writer, count=3):
+    captures = [_samples(i) for i in range(count)]
+    for i, samples in enumerate(captures):
+        writer.append(path, samples, "Main FAN", f"CH{i}", 1_700_000_000.0 + i, label="Vibration")
+    return captures
+
+
+@pytest.mark.parametrize("delta", [False, True])
+@pytest.mark.parametrize("compression", CODECS)
+def test_round_trip(tmp_path, compression, delta):
+    path = str(tmp_path / "day.mroa")
+    captures = _write(path, ArchiveWriter(compression=compression, delta=delta))
+
+    with ArchiveReader(path) as reader:
+        records = list(reader.records())
+        assert [r.channel for r in records] == [0, 1, 2]
+        assert [r.timestamp for r in records] == [1_700_000_000.0 + i for i in range(3)]
+        assert all(r.device == "Main FAN" and r.label == "Vibration" and r.delta == delta for r in records)
+        for record, samples in zip(records, captures):
+            np.testing.assert_array_equal(reader.read(record, verify=True), samples)
+        stacked_records, stacked = reader.read_all()
+        assert stacked.shape == (3, 3000)
+
+
+@pytest.mark.parametrize("codec", [CODEC_NONE, CODEC_ZLIB])
+@pytest.mark.parametrize("delta", [False, True])
+def test_encode_decode_is_lossless(codec, delta):
+    samples = _samples(7)
+    payload = encode_samples(samples, codec, delta)
+    np.testing.assert_array_equal(decode_samples(payload, len(samples), codec, delta), samples)
+
+
+@pytest.mark.parametrize("delta", [False, True])
+@pytest.mark.parametrize("compression", CODECS)
+def test_mapped_views_match_reader(tmp_path, compression, delta):
+    path = str(tmp_path / "day.mroa")
+    captures = _write(path, ArchiveWriter(compression=compression, delta=delta))
+
+    mapped = MappedArchive(path)
+    try:
+        records = list(mapped.records())
+        assert [r.channel for r in records] == [0, 1, 2]
+        for record, samples in zip(records, captures):
+            np.testing.assert_array_equal(mapped.view(record), samples)
+    finally:
+        mapped.close()
+
+
+def test_default_archives_are_read_zero_copy(tmp_path):
+    path = str(tmp_path / "day.mroa")
+    captures = _write(path, ArchiveWriter(), count=1)
+    mapped = MappedArchive(path)
+    try:
+        view = mapped.view(next(mapped.records()))
+        assert not view.flags.owndata and not view.flags.writeable
+        np.testing.assert_array_equal(view, captures[0])
+    finally:
+        mapped.close()
+
+
+def test_zero_copy_view_only_for_raw_records(tmp_path):
+    raw_path = str(tmp_path / "raw.mroa")
+    packed_path = str(tmp_path / "packed.mroa")
+    _write(raw_path, ArchiveWriter(compression="none", delta=False), count=1)
+    _write(packed_path, ArchiveWriter(compression="zlib", delta=True), count=1)
+
+    raw = MappedArchive(raw_path)
+    packed = MappedArchive(packed_path)
+    try:
+        assert not raw.view(next(raw.records())).flags.owndata
+        assert packed.view(next(packed.records())).flags.owndata
+    finally:
+        raw.close()
+        packed.close()
+
+
+def test_crc_mismatch_is_detected(tmp_path):
+    path = str(tmp_path / "day.mroa")
+    _write(path, ArchiveWriter(compression="none", delta=False), count=1)
+    with ArchiveReader(path) as reader:
+        record = next(reader.records())
+        assert record.crc32 == zlib.crc32(reader.read(record).tobytes())
+    with open(path, "r+b") as f:
+        f.seek(record.payload_offset + 10)
+        f.write(b"\xff\xff")
+
+    with ArchiveReader(path) as reader:
+        record = next(reader.records())
+        reader.read(record)  # verify=False 이면 검사하지 않음
+        with pytest.raises(ArchiveError, match="CRC"):
+            reader.read(record, verify=True)
+
+
+def test_truncated_last_record_is_skipped(tmp_path):
+    path = str(tmp_path / "dev" / "20250101" / "20250101.mroa")
+    captures = _write(path, ArchiveWriter(), count=3)
+    with open(path, "rb") as f:
+        full = f.read()
+    with ArchiveReader(path) as reader:
+        last = list(reader.records())[-1]
+    # 기록 중인 마지막 레코드: 헤더는 있고 페이로드가 잘린 상태
+    with open(path, "wb") as f:
+        f.write(full[:last.payload_offset + last.payload_size // 2])
+
+    with ArchiveReader(path) as reader:
+        assert len(list(reader.records())) == 2
+    mapped = MappedArchive(path)
+    try:
+        assert len(list(mapped.records())) == 2
+    finally:
+        mapped.close()
+
+    index = CaptureIndex(str(tmp_path))
+    try:
+        assert index.refresh() == 2
+        with open(path, "wb") as f:
+            f.write(full)  # 기록 완료
+        assert index.refresh() == 1
+        records, arrays = index.load_range()
+        assert len(records) == 3
+        np.testing.assert_array_equal(arrays[2], captures[2])
+    finally:
+        index.close()
+
+
+def test_index_skips_a_corrupt_record(tmp_path, caplog):
+    path = str(tmp_path / "dev" / "20250101" / "20250101.mroa")
+    writer = ArchiveWriter()
+    _write(path, writer, count=2)
+    with ArchiveReader(path) as reader:
+        second = list(reader.records())[1]
+    with open(path, "r+b") as f:
+        f.seek(second.offset)
+        f.write(b"JUNK")  # 두 번째 레코드 헤더 손상
+    writer.append(path, _samples(9), "Main FAN", "CH2", 1_700_000_002.0)
+
+    index = CaptureIndex(str(tmp_path))
+    try:
+        assert index.refresh() == 2
+        assert index.lookup("Main FAN", "CH0", 1_700_000_000.0) is not None
+        assert index.lookup("Main FAN", "CH1", 1_700_000_001.0) is None
+        found = index.lookup("Main FAN", "CH2", 1_700_000_002.0)
+        np.testing.assert_array_equal(index.load(*found), _samples(9))
+
+        writer.append(path, _samples(10), "Main FAN", "CH3", 1_700_000_003.0)
+        assert index.refresh() == 1
+        assert index.refresh() == 0
+        assert sum("corrupt record" in message for message in caplog.messages) == 1
+    finally:
+        index.close()
+
+
+def test_index_waits_for_a_record_after_a_corrupt_tail(tmp_path, caplog):
+    path = str(tmp_path / "dev" / "20250101" / "20250101.mroa")
+    writer = ArchiveWriter()
+    _write(path, writer, count=2)
+    with open(path, "ab") as f:
+        f.write(b"JUNK" + b"\x00" * 101)  # 비정상 종료로 남은 조각 (정렬되지 않음)
+
+    index = CaptureIndex(str(tmp_path))
+    try:
+        assert index.refresh() == 2
+        assert index.refresh() == 0
+        writer.append(path, _samples(9), "Main FAN", "CH2", 1_700_000_002.0)
+        assert index.refresh() == 1
+        assert sum("corrupt record" in message for message in caplog.messages) == 1
+    finally:
+        index.close()
+
+
+def test_index_refresh_keeps_time_order(tmp_path):
+    path = str(tmp_path / "dev" / "20250101" / "20250101.mroa")
+    writer = ArchiveWriter()
+    for ts in (30.0, 10.0, 20.0):
+        writer.append(path, _samples(0, 10), "dev", "CH0", ts)
+    index = CaptureIndex(str(tmp_path))
+    try:
+        index.refresh()
+        writer.append(path, _samples(0, 10), "dev", "CH0", 15.0)
+        index.refresh()
+        assert [record.timestamp for _, record in index.query()] == [10.0, 15.0, 20.0, 30.0]
+        assert [record.timestamp for _, record in index.query(start=12, end=25)] == [15.0, 20.0]
+    finally:
+        index.close()
+
+
+def test_index_query_by_time_device_and_channel(tmp_path):
+    writer = ArchiveWriter()
+    for day in ("20250101", "20250102"):
+        path = str(tmp_path / "dev" / day / f"{day}.mroa")
+        stamp = datetime.strptime(day, "%Y%m%d").timestamp()
+        for ch in range(2):
+            writer.append(path, _samples(ch, 100), "dev", ch, stamp + 60 * ch)
+
+    index = CaptureIndex(str(tmp_path))
+    try:
+        assert index.refresh() == 4
+        day2 = datetime(2025, 1, 2)
+        assert len(index.query(start=day2)) == 2
+        assert len(index.query(end=day2, channel="CH1")) == 1
+        assert index.query(device="other") == []
+        timestamps = [record.timestamp for _, record in index.query()]
+        assert timestamps == sorted(timestamps)
+    finally:
+        index.close()
+
+
+def test_missing_lz4_falls_back_to_zlib(monkeypatch, tmp_path):
+    monkeypatch.setattr(archive, "lz4_frame", None)
+    writer = ArchiveWriter(compression="lz4")
+    assert writer.codec == CODEC_ZLIB
+    with pytest.raises(ArchiveError):
+        decode_samples(b"", 0, CODEC_LZ4, False)
+
+
+def test_unknown_compression_is_rejected():
+    with pytest.raises(ArchiveError):
+        ArchiveWriter(compression="bz2")
+
+
+def test_rejects_non_archive_files(tmp_path):
+    path = tmp_path / "not.mroa"
+    path.write_bytes(b"XXXX" + b"\x00" * (FILE_HEADER.size - 4))
+    with pytest.raises(ArchiveError):
+        ArchiveReader(str(path))
+
+
+def test_archive_path_for_filed_csv():
+    dest = os.path.join("root", "Main FAN", "20250101", "CH0", "[Main FAN]_CH0_20250101_120000.csv")
+    assert archive_path_for(dest) == os.path.join("root", "Main FAN", "20250101", "20250101.mroa")
@@ -0,0 +1,48 @@
+import ast
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from device_csv import parse_adc_codes, read_device_csv
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+IEPE_COPY = os.path.join(HERE, os.pardir, os.pardir, "ni_data_acq", "device_csv.py")
+
+
+@pytest.mark.skipif(not os.path.exists(IEPE_COPY), reason="IEPE tool sources not checked out")
+def test_matches_the_iepe_tool_copy():
+    # 두 도구가 같은 펌웨어 형식을 같은 코드로 파싱하는지 확인
+    def code(path):
+        with open(path, encoding="utf-8") as f:
+            return ast.dump(ast.parse(f.read()))
+
+    assert code(os.path.join(HERE, os.pardir, "device_csv.py")) == code(IEPE_COPY)
+
+
+def test_read_device_csv(tmp_path):
+    path = tmp_path / "[Main FAN]_CH1_20250101_120000.csv"
+    path.write_bytes(b"Location : Plant A\r\nPosition : Main FAN\r\nDate & Time : 20250101_120000\r\n"
+                     b"Current R\r\n100\r\n200\r\n65535\r\n")
+    header, samples = read_device_csv(str(path))
+    assert header == {"location": "Plant A", "position": "Main FAN",
+                      "timestamp": datetime(2025, 1, 1, 12, 0, 0), "label": "Current R"}
+    assert samples.dtype == np.uint16
+    np.testing.assert_array_equal(samples, [100, 200, 65535])
+
+
+def test_partial_header_and_bad_timestamp(tmp_path):
+    path = tmp_path / "partial.csv"
+    path.write_bytes(b"Location : Plant A\nPosition : Main FAN\nDate & Time : yesterday\n1\n2\n")
+    header, samples = read_device_csv(str(path))
+    assert header["timestamp"] is None and header["label"] is None
+    np.testing.assert_array_equal(samples, [1, 2])
+
+
+def test_parse_adc_codes():
+    np.testing.assert_array_equal(parse_adc_codes(b"1\n2 3\r\n"), [1, 2, 3])
+    assert parse_adc_codes(b"").size == 0
+    for body in (b"1\n65536\n", b"-5\n", b"9" * 30, b"1\nx\n"):
+        with pytest.raises(ValueError):
+            parse_adc_codes(body)
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from device_registry import (DeviceRegistry, DeviceStats, RATE_WINDOW_S, UNKNOWN_DEVICE, device_prefix_from_name,
+                             is_valid_device_name)
+
+
+def test_auto_registration_is_saved_and_merged(tmp_path):
+    path = str(tmp_path / "devices.json")
+    registered = []
+    first = DeviceRegistry(["Main FAN"], path=path, on_register=registered.append)
+    assert first.resolve("Main FAN") == ("Main FAN", False)
+    assert first.resolve("Pump 2") == ("Pump 2", True)
+    assert first.resolve("Pump 2") == ("Pump 2", False)
+    assert registered == ["Pump 2"]
+
+    # 다른 프로세스가 같은 파일에 다른 장치를 등록해도 서로 지우지 않음
+    second = DeviceRegistry(path=path)
+    second.register("Blower")
+    first.register("Mixer")
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)["devices"]
+    assert {"Main FAN", "Pump 2", "Blower", "Mixer"} <= set(saved)
+    assert DeviceRegistry(path=path).names() == list(saved)
+
+
+def test_unknown_prefixes_without_auto_register(tmp_path):
+    registry = DeviceRegistry(["Main FAN"], auto_register=False)
+    assert registry.resolve("Pump") == (UNKNOWN_DEVICE, False)
+    assert "Pump" not in registry and len(registry) == 1
+
+
+@pytest.mark.parametrize("name", ["", " padded", "a/b", "x" * 33, "tab\t"])
+def test_invalid_names_are_not_registered(name):
+    assert not is_valid_device_name(name)
+    assert DeviceRegistry().resolve(name) == (UNKNOWN_DEVICE, False)
+
+
+def test_prefix_from_upload_name():
+    assert device_prefix_from_name("[Main FAN]_CH0_20250101_120000.csv") == "Main FAN"
+    assert device_prefix_from_name("[Main FAN].csv") is None
+    assert device_prefix_from_name("notes.txt") is None
+
+
+def test_stats_count_files_and_rate():
+    stats = DeviceStats("Main FAN")
+    stats.record(100, now=0.0)
+    stats.record(300, files=2, now=10.0)
+    assert (stats.files, stats.bytes) == (3, 400)
+    assert stats.files_per_minute(now=20.0) == pytest.approx(3 * 60.0 / RATE_WINDOW_S)
+    assert stats.files_per_minute(now=5.0 + RATE_WINDOW_S) == pytest.approx(2 * 60.0 / RATE_WINDOW_S)
+
+    registry = DeviceRegistry(["Main FAN"])
+    assert registry.record("Ghost", 10) is None
+    registry.record("Main FAN", 10)
+    assert registry.snapshot()["Main FAN"]["files"] == 1
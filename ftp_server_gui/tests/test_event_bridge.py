@@ -0,0 +1,63 @@
+import threading
+
+from event_bridge import EventBuffer
+
+
+def test_drain_returns_everything_once():
+    events = EventBuffer()
+    events.push_log("a")
+    events.push_server("started", "threaded")
+    events.push_metrics({"processed": 1})
+    logs, devices, server_events, metrics = events.drain()
+    assert logs == ["a"] and devices == {} and server_events == [("started", "threaded")]
+    assert metrics == {"processed": 1}
+    assert events.drain() == ([], {}, [], None)
+
+
+def test_device_updates_and_metrics_are_coalesced_per_frame():
+    events = EventBuffer()
+    for nbytes in (10, 20, 30):
+        events.push_device("Main FAN", nbytes)
+    events.push_device("Pump")
+    events.push_metrics({"processed": 1})
+    events.push_metrics({"processed": 2})
+    _, devices, _, metrics = events.drain()
+    assert devices == {"Main FAN": [3, 60], "Pump": [1, 0]}
+    assert metrics == {"processed": 2}
+    counters = events.counters()
+    assert counters["received"] == 6 and counters["coalesced"] == 3 and counters["delivered"] == 3
+
+
+def test_oldest_log_lines_are_dropped():
+    events = EventBuffer(max_log_lines=3)
+    for i in range(5):
+        events.push_log(str(i))
+    assert events.drain()[0] == ["2", "3", "4"]
+    assert events.counters()["dropped"] == 2
+
+
+def test_producers_on_many_threads():
+    events = EventBuffer(max_log_lines=10000)
+    logs, devices = [], {"Main FAN": [0, 0]}
+
+    def produce():
+        for _ in range(500):
+            events.push_log("x")
+            events.push_device("Main FAN", 1)
+
+    def drain():
+        frame_logs, frame_devices, _, _ = events.drain()
+        logs.extend(frame_logs)
+        for prefix, (files, nbytes) in frame_devices.items():
+            devices[prefix][0] += files
+            devices[prefix][1] += nbytes
+
+    threads = [threading.Thread(target=produce) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        drain()
+    for thread in threads:
+        thread.join()
+    drain()
+    assert len(logs) == 2000 and devices == {"Main FAN": [2000, 2000]}
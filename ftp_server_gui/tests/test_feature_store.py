@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from analytics import FEATURE_DTYPE, FeatureTable
+from feature_store import FeatureStore
+
+DAY = datetime(2025, 1, 1)
+HOUR_9 = datetime(2025, 1, 1, 9).timestamp()
+HOUR_10 = datetime(2025, 1, 1, 10).timestamp()
+
+
+def _rows(timestamps, rms, channel=0):
+    rows = np.zeros(len(timestamps), dtype=FEATURE_DTYPE)
+    rows["timestamp"] = timestamps
+    rows["channel"] = channel
+    rows["rms"] = rms
+    rows["peak_freq"][:, 0] = 100.0
+    rows["peak_freq"][:, 1] = 999.0  # 최대 피크만 집계
+    return rows
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = FeatureStore(str(tmp_path / "features.sqlite"))
+    yield store
+    store.close()
+
+
+def test_hour_and_day_rollups(store):
+    rows = _rows([HOUR_9 + 60, HOUR_9 + 120, HOUR_9 + 180, HOUR_10 + 60], [1.0, 2.0, 6.0, 4.0])
+    assert store.add("fan", rows) == 4
+
+    hourly = store.trend("fan", 0, "rms", resolution="hour")
+    np.testing.assert_array_equal(hourly.time, [HOUR_9, HOUR_10])
+    np.testing.assert_allclose(hourly.min, [1.0, 4.0])
+    np.testing.assert_allclose(hourly.mean, [3.0, 4.0])
+    np.testing.assert_allclose(hourly.max, [6.0, 4.0])
+    np.testing.assert_array_equal(hourly.count, [3, 1])
+
+    daily = store.trend("fan", 0, "rms", resolution="day")
+    np.testing.assert_array_equal(daily.time, [DAY.timestamp()])
+    np.testing.assert_allclose([daily.min[0], daily.mean[0], daily.max[0]], [1.0, 3.25, 6.0])
+    assert daily.count[0] == 4
+
+    peak_freq = store.trend("fan", 0, "peak_freq", resolution="day")
+    np.testing.assert_allclose(peak_freq.max, [100.0])
+
+
+def test_duplicates_do_not_change_rollups(store):
+    rows = _rows([HOUR_9 + 60, HOUR_9 + 120], [1.0, 3.0])
+    assert store.add("fan", rows) == 2
+    assert store.add("fan", rows) == 0
+    assert store.add("fan", _rows([HOUR_9 + 120, HOUR_9 + 180], [100.0, 5.0])) == 1
+
+    hourly = store.trend("fan", 0, "rms", resolution="hour")
+    np.testing.assert_array_equal(hourly.count, [3])
+    np.testing.assert_allclose([hourly.min[0], hourly.mean[0], hourly.max[0]], [1.0, 3.0, 5.0])
+    assert store.devices() == [("fan", 0, 3)]
+
+
+def test_channels_and_devices_are_kept_apart(store):
+    store.add("fan", _rows([HOUR_9], [1.0], channel=0))
+    store.add("fan", _rows([HOUR_9], [2.0], channel=1))
+    store.add("pump", _rows([HOUR_9], [3.0], channel=0))
+
+    assert store.devices() == [("fan", 0, 1), ("fan", 1, 1), ("pump", 0, 1)]
+    np.testing.assert_allclose(store.trend("fan", 1, "rms", resolution="hour").mean, [2.0])
+    np.testing.assert_allclose(store.trend("pump", 0, "rms", resolution="hour").mean, [3.0])
+
+
+def test_raw_trend_and_time_range(store):
+    timestamps = [HOUR_9 + 60, HOUR_9 + 120, HOUR_10 + 60]
+    store.add("fan", _rows(timestamps, [1.0, 2.0, 3.0]))
+
+    raw = store.trend("fan", 0, "rms", resolution="raw")
+    np.testing.assert_array_equal(raw.time, timestamps)
+    np.testing.assert_allclose(raw.mean, [1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(raw.count, [1, 1, 1])
+
+    ranged = store.trend("fan", 0, "rms", start=HOUR_9 + 120, end=datetime(2025, 1, 1, 10), resolution="raw")
+    np.testing.assert_allclose(ranged.mean, [2.0])
+
+
+def test_auto_resolution(store):
+    store.add("fan", _rows([HOUR_9 + 60 * i for i in range(10)] + [HOUR_10], np.arange(11.0)))
+
+    assert store.trend("fan", 0, max_points=100).resolution == "raw"
+    assert store.trend("fan", 0, max_points=5).resolution == "hour"
+    assert store.trend("fan", 0, max_points=1).resolution == "day"
+
+
+def test_unknown_metric_and_resolution(store):
+    with pytest.raises(ValueError):
+        store.trend("fan", 0, "kurtosis")
+    with pytest.raises(ValueError):
+        store.trend("fan", 0, resolution="week")
+
+
+def test_sync_from_feature_table(store, tmp_path):
+    table = FeatureTable(str(tmp_path / "features"))
+    rows = _rows([HOUR_9 + 60, HOUR_9 + 120], [1.0, 2.0])
+    assert table.append("fan", rows) == 2
+    assert table.append("fan", rows) == 0
+
+    assert store.sync_from_table(table, "fan") == 2
+    assert store.sync_from_table(table, "fan") == 0
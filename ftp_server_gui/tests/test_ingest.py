@@ -0,0 +1,100 @@
+import os
+import time
+import threading
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from device_registry import DeviceRegistry, UNKNOWN_DEVICE
+from ingest import IngestPipeline, parse_device_csv, parse_upload_name
+
+HEADER = "Location : Plant A\nPosition : Main FAN\nDate & Time : 20250101_120000\nVibration\n"
+
+
+def _upload(directory, name, values, header=HEADER):
+    path = os.path.join(directory, name)
+    with open(path, "w", newline="") as f:
+        f.write(header + "".join(f"{v}\r\n" for v in values))
+    return path
+
+
+def test_parse_device_csv(tmp_path):
+    path = _upload(tmp_path, "[Main FAN]_CH0_20250101_120000.csv", [0, 1, 65535, 512])
+    capture = parse_device_csv(path, channel="CH0")
+    assert capture.device == "Main FAN"
+    assert capture.location == "Plant A"
+    assert capture.label == "Vibration"
+    assert capture.timestamp == datetime(2025, 1, 1, 12, 0, 0)
+    assert capture.samples.dtype == np.uint16
+    np.testing.assert_array_equal(capture.samples, [0, 1, 65535, 512])
+
+
+def test_parse_device_csv_without_header(tmp_path):
+    capture = parse_device_csv(_upload(tmp_path, "raw.csv", [7, 8, 9], header=""))
+    assert capture.timestamp is None and capture.label is None
+    np.testing.assert_array_equal(capture.samples, [7, 8, 9])
+
+
+@pytest.mark.parametrize("values", [[1, 65536], [-1, 2], [1, 10**30], [1, "abc"]])
+def test_parse_device_csv_rejects_bad_samples(tmp_path, values):
+    with pytest.raises(ValueError):
+        parse_device_csv(_upload(tmp_path, "bad.csv", values))
+
+
+def test_parse_upload_name():
+    registry = DeviceRegistry(["Main FAN"], auto_register=False)
+    assert parse_upload_name("[Main FAN]_CH1_20250101_120000.csv", registry)[:2] == ("Main FAN", "CH1")
+    prefix, _, warnings = parse_upload_name("[Other]_CH0_20250101_120000.csv", registry)
+    assert prefix == UNKNOWN_DEVICE and warnings
+
+    auto = DeviceRegistry(["Main FAN"], auto_register=True)
+    prefix, _, warnings = parse_upload_name("[New Pump]_CH0_20250101_120000.csv", auto)
+    assert prefix == "New Pump" and "New Pump" in auto
+
+
+def _pipeline(root, **kwargs):
+    logs = []
+    pipeline = IngestPipeline(str(root), DeviceRegistry(["Main FAN"], auto_register=False), log=logs.append, **kwargs)
+    return pipeline, logs
+
+
+def _filed(root):
+    return sorted(name for _, _, names in os.walk(os.path.join(root, "Main FAN")) for name in names)
+
+
+def test_pipeline_converts_and_files_uploads(tmp_path):
+    captures = []
+    pipeline, _ = _pipeline(tmp_path, converters=[lambda capture, dest: captures.append((capture, dest))])
+    pipeline.start()
+    path = _upload(tmp_path, "[Main FAN]_CH0_20250101_120000.csv", range(10))
+    assert pipeline.submit(path)
+    pipeline.stop()
+
+    assert not os.path.exists(path)
+    assert _filed(tmp_path) == ["[Main FAN]_CH0_20250101_120000.csv"]
+    capture, dest = captures[0]
+    assert capture.channel == "CH0" and os.path.dirname(dest).endswith(os.path.join("Main FAN", datetime.now().strftime("%Y%m%d"), "CH0"))
+    assert pipeline.metrics.snapshot()["processed"] == 1
+
+
+def test_pipeline_retries_uploads_rejected_by_a_full_queue(tmp_path):
+    release = threading.Event()
+    pipeline, logs = _pipeline(tmp_path, workers=1, max_queue=2, converters=[lambda capture, dest: release.wait(5)])
+    pipeline.start()
+    paths = [_upload(tmp_path, f"[Main FAN]_CH{i % 4}_20250101_12000{i}.csv", range(10)) for i in range(8)]
+    accepted = [pipeline.submit(path) for path in paths]
+    assert not all(accepted)
+    assert any("retried when the queue drains" in line for line in logs)
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while len(_filed(tmp_path)) < len(paths) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pipeline.stop()
+
+    assert len(_filed(tmp_path)) == len(paths)
+    metrics = pipeline.metrics.snapshot()
+    assert metrics["processed"] == len(paths)
+    assert metrics["deferred"] == 0
+    assert metrics["rejected"] == accepted.count(False)
@@ -0,0 +1,56 @@
+import ast
+import os
+
+import numpy as np
+import pytest
+
+from peaks import find_peaks
+
+IEPE_PEAKS = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "ni_data_acq", "peaks.py")
+
+
+@pytest.mark.skipif(not os.path.exists(IEPE_PEAKS), reason="IEPE tool sources not checked out")
+def test_matches_the_iepe_tool_copy():
+    # 두 도구는 따로 배포되므로 같은 구현을 각자 가지고 있음: 알고리즘이 어긋나지 않도록 확인
+    def code(path):
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        body = [node for node in tree.body if not isinstance(node, ast.Expr)]  # 모듈 docstring 제외
+        for node in body:
+            if isinstance(node, ast.FunctionDef):
+                node.body = node.body[1:]  # 함수 docstring 제외
+        return [ast.dump(node) for node in body]
+
+    assert code(os.path.join(os.path.dirname(__file__), os.pardir, "peaks.py")) == code(IEPE_PEAKS)
+
+
+def test_batched_peaks_are_interpolated_and_sorted():
+    fs, n = 10000.0, 4096
+    t = np.arange(n) / fs
+    signals = np.vstack([np.sin(2 * np.pi * 1234.5 * t) + 0.5 * np.sin(2 * np.pi * 310.2 * t),
+                         0.2 * np.sin(2 * np.pi * 2500.7 * t)])
+    window = np.hanning(n)
+    spectrum = np.abs(np.fft.rfft(signals * window, axis=-1))
+    freqs = np.fft.rfftfreq(n, 1 / fs)
+
+    peak_freqs, peak_amps = find_peaks(spectrum, freqs, 3)
+    assert peak_freqs.shape == peak_amps.shape == (2, 3)
+    np.testing.assert_allclose(peak_freqs[0, :2], [1234.5, 310.2], atol=0.5)
+    np.testing.assert_allclose(peak_freqs[1, 0], 2500.7, atol=0.5)
+    assert np.all(np.diff(peak_amps, axis=-1) <= 0)
+    assert peak_amps[0, 0] / peak_amps[0, 1] == pytest.approx(2.0, rel=0.05)
+
+
+def test_adjacent_bins_of_one_peak_take_one_slot():
+    spectrum = np.array([0.0, 1.0, 5.0, 4.0, 3.0, 0.0, 2.0, 0.0])
+    peak_freqs, peak_amps = find_peaks(spectrum, np.arange(8.0), 3)
+    assert peak_freqs[0] == pytest.approx(2.0, abs=0.5)
+    assert peak_freqs[1] == pytest.approx(6.0, abs=0.5)
+    assert np.isnan(peak_freqs[2]) and peak_amps[2] == 0
+
+
+def test_degenerate_input():
+    peak_freqs, peak_amps = find_peaks(np.ones(2), np.arange(2.0), 2)
+    assert np.all(np.isnan(peak_freqs)) and np.all(peak_amps == 0)
+    peak_freqs, _ = find_peaks(np.zeros(10), np.arange(10.0), 2)
+    assert np.all(np.isnan(peak_freqs))
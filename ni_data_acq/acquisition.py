@@ -0,0 +1,100 @@
+import threading
+
+import numpy as np
+import nidaqmx
+from nidaqmx.constants import AcquisitionType
+from nidaqmx.stream_readers import AnalogMultiChannelReader
+
+from ring_buffer import RingBuffer
+
+TASK_NAME = "MyTask3"
+DEFAULT_BLOCK_DURATION = 0.1  # 한 번에 읽는 블록 길이 (초)
+DEFAULT_HISTORY_DURATION = 10.0  # 메모리에 보관할 최근 데이터 길이 (초)
+DRIVER_BUFFER_DURATION = 2.0  # DAQmx 입력 버퍼 길이 (초) - 읽기 스레드가 잠시 늦어도 overflow 방지
+READ_TIMEOUT = 5.0
+
+
+class StreamingAcquisition:
+    """
+    PersistedTask 를 연속(CONTINUOUS) 모드로 실행하고, 생산자 스레드가
+    AnalogMultiChannelReader.read_many_sample 로 블록 단위로 끊김 없이 읽어 링 버퍼(buffer)에 기록합니다.
+    GUI 스레드는 latest() 로 최근 구간의 뷰만 가져가므로 측정 중에도 화면이 멈추지 않습니다.
+    """
+    def __init__(self, task_name=TASK_NAME, block_duration=DEFAULT_BLOCK_DURATION,
+                 history_duration=DEFAULT_HISTORY_DURATION):
+        self.task_name = task_name
+        self.block_duration = block_duration
+        self.history_duration = history_duration
+        self.task = None
+        self.sample_rate = None
+        self.samples_per_shot = 0  # PersistedTask 에 설정된 샘플 수 (화면 1회 표시 길이)
+        self.channel_count = 0
+        self.block_size = 0
+        self.buffer = None  # RingBuffer (channels x history)
+        self.error = None  # 읽기 스레드에서 발생한 DaqError
+        self._block = None  # read_many_sample 이 매번 재사용하는 블록 버퍼
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def samples_acquired(self):
+        return self.buffer.total_written if self.buffer else 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        task = nidaqmx.system.storage.persisted_task.PersistedTask(self.task_name).load()
+        try:
+            self.sample_rate = task.timing.samp_clk_rate
+            self.samples_per_shot = task.timing.samp_quant_samp_per_chan
+            self.channel_count = task.number_of_channels
+            self.block_size = max(1, int(self.sample_rate * self.block_duration))
+            buffer_size = max(int(self.sample_rate * DRIVER_BUFFER_DURATION), 4 * self.block_size)
+            task.timing.cfg_samp_clk_timing(self.sample_rate, sample_mode=AcquisitionType.CONTINUOUS,
+                                            samps_per_chan=buffer_size)
+            reader = AnalogMultiChannelReader(task.in_stream)
+            task.start()
+        except nidaqmx.errors.DaqError:
+            task.close()
+            raise
+
+        history = max(int(self.history_duration * self.sample_rate), self.samples_per_shot, self.block_size)
+        self.buffer = RingBuffer(self.channel_count, history)
+        self._block = np.empty((self.channel_count, self.block_size), dtype=np.float64)
+        self.error = None
+        self.task = task
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(reader,), name="daq-reader", daemon=True)
+        self._thread.start()
+
+    def _run(self, reader):
+        block = self._block
+        while not self._stop_event.is_set():
+            try:
+                reader.read_many_sample(block, number_of_samples_per_channel=self.block_size,
+                                        timeout=READ_TIMEOUT)
+            except nidaqmx.errors.DaqError as e:
+                if not self._stop_event.is_set():
+                    self.error = e
+                return
+            self.buffer.write(block)
+
+    def latest(self, n_samples):
+        """최근 n_samples 개 샘플의 읽기 전용 뷰 (channels x n_samples). 아직 모이지 않았으면 None."""
+        return self.buffer.latest(n_samples) if self.buffer else None
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            # 읽기는 블록 단위로 끝나므로 Task 를 닫기 전에 스레드 종료를 기다림
+            self._thread.join(READ_TIMEOUT + 1.0)
+            self._thread = None
+        if self.task:
+            try:
+                self.task.control(nidaqmx.constants.TaskMode.TASK_STOP)
+                self.task.close()
+            except nidaqmx.errors.DaqError as e:
+                print(f"[DAQ Error] 연속 측정 Task 종료 오류: {e}")
+            self.task = None
@@ -0,0 +1,124 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from loaders import load_capture, source_key, effective_sample_rate
+
+CAPTURE_PATTERN = re.compile(r"^iepe_(\d{8}_\d{6})\.(npz|csv)$", re.IGNORECASE)
+CAPTURE_TIME_FORMAT = "%Y%m%d_%H%M%S"
+DEFAULT_PREFETCH_WORKERS = 2
+DEFAULT_PREFETCH_CACHE = 8  # 메모리에 보관할 측정 파일 수
+PREFETCH_RADIUS = 2  # 현재 파일 앞뒤로 미리 읽을 개수
+
+
+class CaptureEntry:
+    __slots__ = ("path", "name", "timestamp")
+
+    def __init__(self, path, name, timestamp):
+        self.path = path
+        self.name = name
+        self.timestamp = timestamp
+
+    @property
+    def label(self):
+        return f"{self.timestamp:%Y-%m-%d %H:%M:%S}  {self.name}"
+
+
+def list_captures(directory):
+    """
+    폴더의 iepe_YYYYMMDD_HHMMSS.(npz|csv) 측정 파일을 시각 순으로 반환합니다 (디렉터리 한 번 읽기).
+    같은 측정이 npz 와 csv 로 모두 있으면 읽기가 빠른 npz 만 사용합니다.
+    """
+    captures = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            match = CAPTURE_PATTERN.match(entry.name)
+            if not match or not entry.is_file():
+                continue
+            stamp, ext = match.group(1), match.group(2).lower()
+            existing = captures.get(stamp)
+            if existing is not None and existing.name.lower().endswith(".npz"):
+                continue
+            try:
+                timestamp = datetime.strptime(stamp, CAPTURE_TIME_FORMAT)
+            except ValueError:
+                continue
+            captures[stamp] = CaptureEntry(entry.path, entry.name, timestamp)
+    return sorted(captures.values(), key=lambda c: c.timestamp)
+
+
+class LoadedCapture:
+    __slots__ = ("path", "source", "t", "data", "sample_rate")
+
+    def __init__(self, path, source, t, data, sample_rate):
+        self.path = path
+        self.source = source
+        self.t = t
+        self.data = data
+        self.sample_rate = sample_rate
+
+
+class CapturePrefetcher:
+    """
+    측정 파일 읽기와 전처리(필터 + FFT, TraceCache 에 저장)를 스레드 풀에서 수행합니다.
+    (파일, cutoff) 별 Future 를 최근 사용 순으로 cache_size 개까지 보관하므로, 미리 읽어 둔 이전/다음 파일은 바로 표시됩니다.
+    cutoff 만 바뀌면 이미 읽은 파일 데이터를 재사용하고 새 cutoff 의 필터링만 스레드 풀에서 다시 합니다.
+    """
+    def __init__(self, trace_cache, max_workers=DEFAULT_PREFETCH_WORKERS, cache_size=DEFAULT_PREFETCH_CACHE,
+                 dtype=None):
+        self.trace_cache = trace_cache
+        self.dtype = dtype  # 채널 값 dtype (None 이면 파일 형식 그대로)
+        self.cache_size = max(1, int(cache_size))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="capture-prefetch")
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def request(self, path, cutoff):
+        """(path, cutoff) 의 Future (이미 요청한 조합이면 기존 Future). 결과는 LoadedCapture."""
+        key = (path, cutoff)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not future.cancelled():
+                self._futures.move_to_end(key)
+                return future
+            loaded = self._loaded(path)
+            if loaded is not None:
+                future = self._executor.submit(self._prepare, loaded, cutoff)
+            else:
+                future = self._executor.submit(self._load, path, cutoff)
+            self._futures[key] = future
+            while len(self._futures) > self.cache_size:
+                _, old = self._futures.popitem(last=False)
+                old.cancel()  # 아직 시작하지 않았으면 취소
+            return future
+
+    def prefetch(self, paths, cutoff):
+        for path in paths:
+            self.request(path, cutoff)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _loaded(self, path):
+        """다른 cutoff 로 이미 읽어 둔 path 의 LoadedCapture (없으면 None). 잠금 안에서 호출."""
+        for (other, _), future in self._futures.items():
+            if other == path and future.done() and not future.cancelled() and future.exception() is None:
+                return future.result()
+        return None
+
+    def _load(self, path, cutoff):
+        t, data, sample_rate = load_capture(path, self.dtype)
+        capture = LoadedCapture(path, source_key(path), t, data, sample_rate)
+        fs = effective_sample_rate(t, sample_rate)
+        for channel, values in data.items():
+            self.trace_cache.get(capture.source, channel, values, fs)  # 통계/피크용 (원본)
+        return self._prepare(capture, cutoff)
+
+    def _prepare(self, capture, cutoff):
+        fs = effective_sample_rate(capture.t, capture.sample_rate)
+        for channel, values in capture.data.items():
+            self.trace_cache.get(capture.source, channel, values, fs, cutoff)  # 그래프용 (필터링)
+        return capture
@@ -0,0 +1,68 @@
+"""
+Parser for the capture CSV written by the ESP32 firmware (FTP_Send): four text header lines
+(Location, Position, Date & Time, channel label) followed by one uint16 ADC code per line.
+The FTP server (ftp_server_gui) and the IEPE tool (ni_data_acq) are deployed separately, so each
+ships an identical copy of this file; the tests of both tools check that the copies match.
+ESP32 펌웨어(FTP_Send)가 기록한 캡처 CSV 파서 (4줄 텍스트 헤더 + 줄당 uint16 ADC 코드 1개).
+두 도구는 따로 배포되므로 같은 파일을 각자 가지고 있으며, 두 복사본이 같은지 테스트에서 확인합니다.
+"""
+from datetime import datetime
+
+import numpy as np
+
+HEADER_LINE_COUNT = 4  # Location / Position / Date & Time / 채널 라벨
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+
+def _header_value(line):
+    """Returns the text after the first ':' of a header line ('Position : Main FAN' -> 'Main FAN')."""
+    return line.split(":", 1)[1].strip() if ":" in line else line.strip()
+
+
+def parse_adc_codes(body):
+    """
+    Parses whitespace-separated ADC codes in one numpy call and returns them as uint16.
+    Raises ValueError for non-numeric or out-of-range (not 0..65535) values.
+    공백으로 구분된 ADC 코드를 한 번에 파싱해 uint16 으로 반환합니다. 숫자가 아니거나 범위 밖이면 ValueError.
+    """
+    # 넓은 정수형으로 파싱한 뒤 범위를 확인 (uint16 로 바로 변환하면 범위 밖 값이 OverflowError)
+    try:
+        values = np.array(body.split(), dtype=np.int64)
+    except OverflowError as e:
+        raise ValueError(f"sample value out of range: {e}") from e
+    if values.size and (values.min() < 0 or values.max() > np.iinfo(np.uint16).max):
+        raise ValueError(f"sample values must be 0..65535 (found {values.min()}..{values.max()})")
+    return values.astype(np.uint16)
+
+
+def read_device_csv(file_path):
+    """
+    Reads one FTP_Send CSV. Returns (header, samples): header is a dict with 'location', 'position',
+    'timestamp' (datetime) and 'label' (None when missing), samples a uint16 array of ADC codes.
+    FTP_Send CSV 1개를 읽어 (헤더 dict, uint16 샘플 배열)을 반환합니다. 누락된 헤더 값은 None.
+    """
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+
+    lines = raw.split(b"\n", HEADER_LINE_COUNT)
+    header = []
+    for line in lines[:HEADER_LINE_COUNT]:
+        text = line.strip()
+        if text.isdigit():
+            break
+        header.append(text.decode("utf-8", errors="replace"))
+    body = raw.split(b"\n", len(header))[-1] if header else raw
+
+    timestamp = None
+    if len(header) > 2:
+        try:
+            timestamp = datetime.strptime(_header_value(header[2]), TIMESTAMP_FORMAT)
+        except ValueError:
+            timestamp = None
+    fields = {
+        "location": _header_value(header[0]) if len(header) > 0 else None,
+        "position": _header_value(header[1]) if len(header) > 1 else None,
+        "timestamp": timestamp,
+        "label": header[3] if len(header) > 3 else None,
+    }
+    return fields, parse_adc_codes(body)
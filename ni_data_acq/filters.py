@@ -0,0 +1,154 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import butter, sosfilt, sosfilt_zi, sosfiltfilt
+
+from ring_buffer import RingBuffer
+
+DEFAULT_FILTER_ORDER = 4
+FILTER_CACHE_SIZE = 32
+FILTER_WORK_BYTES = 5 * 8  # sosfiltfilt 의 샘플당 작업 메모리 (패딩/정방향/역방향 등 float64 배열 약 5개)
+FILTER_SETTLE_PERIODS = 20  # 구간 필터링 시 앞뒤 여유 구간 (cutoff 주기 수)
+
+_budget_warnings = set()  # 이미 알린 (cutoff, fs, memory_budget) - 샷마다 같은 경고를 반복하지 않음
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def lowpass_sos(cutoff, fs, order=DEFAULT_FILTER_ORDER):
+    """Butterworth 저역통과 SOS 계수. (cutoff, fs, order) 별로 한 번만 설계합니다."""
+    nyq = 0.5 * fs
+    return butter(order, cutoff / nyq, btype='low', analog=False, output='sos')  # 캐시 공유 배열 - 수정 금지
+
+
+def butter_lowpass_filter(data, cutoff, fs, order=DEFAULT_FILTER_ORDER, zero_phase=True, axis=-1):
+    """
+    zero_phase=True: 블록 전체를 앞뒤로 필터링 (위상 지연 없음, 기존 filtfilt 동작).
+    zero_phase=False: 한 방향 sosfilt (블록 단위 연속 처리는 StreamingLowpass 사용).
+    data 가 2차원이면 axis 방향으로 모든 채널을 한 번에 필터링합니다.
+    """
+    sos = lowpass_sos(float(cutoff), float(fs), int(order))
+    if zero_phase:
+        return sosfiltfilt(sos, data, axis=axis)
+    return sosfilt(sos, data, axis=axis)
+
+
+def filter_margin(cutoff, fs):
+    """구간 필터링 시 구간 앞뒤로 더 읽는 샘플 수 (필터 과도 응답이 사라지는 길이)."""
+    return int(np.ceil(FILTER_SETTLE_PERIODS * fs / cutoff))
+
+
+def filter_chunk_length(data, cutoff, fs, memory_budget, dtype=np.float64):
+    """
+    영위상 필터링의 최대 메모리가 memory_budget(바이트) 를 넘으면 구간당 샘플 수, 넘지 않으면 None (한 번에 필터링).
+    한 번에 필터링할 때는 float64 작업 배열에 dtype 이 float64 가 아니면 변환된 결과 배열까지 더하고,
+    구간 처리 시에는 dtype 결과 배열 전체 + 구간 하나의 작업 범위(chunk + 앞뒤 여유 2 * margin)가 예산 안에 들도록 정합니다.
+    여유 구간이 예산의 대부분을 차지하면 (낮은 cutoff) 가능한 최소 구간(margin 샘플)으로 처리하고 한 번만 알립니다.
+    """
+    n_samples = data.shape[-1]
+    rows = data.size // n_samples if n_samples else 0
+    if memory_budget is None or rows == 0:
+        return None
+    itemsize = np.dtype(dtype).itemsize
+    result_bytes = 0 if np.dtype(dtype) == np.float64 else itemsize  # float64 결과는 작업 배열 중 하나
+    if rows * n_samples * (FILTER_WORK_BYTES + result_bytes) <= memory_budget:
+        return None
+    margin = filter_margin(cutoff, fs)
+    chunk = (int(memory_budget) - rows * n_samples * itemsize) // (rows * FILTER_WORK_BYTES) - 2 * margin
+    if chunk < margin:
+        key = (float(cutoff), float(fs), int(memory_budget))
+        if key not in _budget_warnings:
+            _budget_warnings.add(key)
+            minimum = rows * (n_samples * itemsize + 3 * margin * FILTER_WORK_BYTES)
+            print(f"[Filter Warning] 메모리 예산 {memory_budget / 2**20:.1f} MB 가 cutoff {cutoff:g} Hz 구간 필터링의 "
+                  f"최소 작업 메모리보다 작아 최소 구간으로 처리합니다 (약 {minimum / 2**20:.1f} MB 사용).")
+        return margin
+    return chunk
+
+
+def butter_lowpass_chunked(data, cutoff, fs, chunk, out, order=DEFAULT_FILTER_ORDER):
+    """
+    영위상 필터를 chunk 샘플 구간별로 적용해 out 에 기록합니다 (out 의 dtype 으로 변환).
+    구간마다 앞뒤로 filter_margin() 샘플을 더 읽어 필터링하고 그 여유 구간은 버리므로
+    구간 경계의 과도 응답 없이 한 번에 필터링한 결과와 같습니다. 작업 메모리는 chunk + 2 * margin 샘플 분량입니다.
+    """
+    n_samples = data.shape[-1]
+    margin = filter_margin(cutoff, fs)
+    chunk = max(1, int(chunk))
+    for start in range(0, n_samples, chunk):
+        stop = min(n_samples, start + chunk)
+        lo, hi = max(0, start - margin), min(n_samples, stop + margin)
+        filtered = butter_lowpass_filter(data[..., lo:hi], cutoff, fs, order)
+        out[..., start:stop] = filtered[..., start - lo:stop - lo]
+    return out
+
+
+def lowpass_within_budget(data, cutoff, fs, memory_budget=None, dtype=np.float64, order=DEFAULT_FILTER_ORDER):
+    """
+    영위상 저역통과 결과를 dtype 배열로 반환합니다. 예산 안이면 기존처럼 한 번에 필터링하고,
+    아니면 미리 할당한 dtype 배열에 구간별로 기록합니다 (float64 전체 크기의 중간 배열 없음).
+    """
+    chunk = filter_chunk_length(data, cutoff, fs, memory_budget, dtype)
+    if chunk is None:
+        return butter_lowpass_filter(data, cutoff, fs, order).astype(dtype, copy=False)
+    return butter_lowpass_chunked(data, cutoff, fs, chunk, np.empty(data.shape, dtype=dtype), order)
+
+
+class StreamingLowpass:
+    """
+    채널별 필터 상태(zi)를 유지하는 sosfilt 저역통과 필터.
+    연속 데이터를 블록 단위로 나눠 넣어도 한 번에 필터링한 것과 같은 결과를 내며 블록 경계에 과도 응답이 없습니다.
+    """
+    def __init__(self, cutoff, fs, order=DEFAULT_FILTER_ORDER):
+        self.cutoff = float(cutoff)
+        self.fs = float(fs)
+        self.order = int(order)
+        self.sos = lowpass_sos(self.cutoff, self.fs, self.order)
+        self.zi = None  # (sections, channels, 2)
+
+    def reset(self):
+        self.zi = None
+
+    def process(self, block):
+        """block (channels x k) -> 필터링된 새 배열 (channels x k)."""
+        if block.shape[1] == 0:
+            return np.empty(block.shape)
+        if self.zi is None:
+            # 첫 샘플 값에서 정상 상태로 시작하여 시작 과도 응답 제거
+            self.zi = sosfilt_zi(self.sos)[:, None, :] * block[:, 0][None, :, None]
+        filtered, self.zi = sosfilt(self.sos, block, axis=-1, zi=self.zi)
+        return filtered
+
+
+class FilteredRing:
+    """
+    원본 RingBuffer 를 따라가며 새로 기록된 샘플만 StreamingLowpass 로 필터링해 별도 링 버퍼에 보관합니다.
+    update() 를 주기적으로 호출하면 latest() 로 필터링된 최근 구간의 뷰를 얻을 수 있습니다.
+    """
+    def __init__(self, source, cutoff, fs, order=DEFAULT_FILTER_ORDER):
+        self.source = source
+        self.filter = StreamingLowpass(cutoff, fs, order)
+        self.buffer = RingBuffer(source.channels, source.capacity)
+        self.position = source.oldest  # 다음에 필터링할 원본 샘플의 절대 인덱스
+
+    def matches(self, cutoff, fs, order=DEFAULT_FILTER_ORDER):
+        f = self.filter
+        return (f.cutoff, f.fs, f.order) == (float(cutoff), float(fs), int(order))
+
+    def update(self):
+        end = self.source.total_written
+        if self.position < self.source.oldest:
+            # 처리가 밀려 원본이 이미 덮어써짐: 남아 있는 구간부터 다시 시작
+            self.position = self.source.oldest
+            self.filter.reset()
+        while self.position < end:
+            n = min(end - self.position, self.source.capacity)
+            chunk = self.source.read(self.position, n)
+            if chunk is None:
+                self.position = self.source.oldest
+                self.filter.reset()
+                continue
+            self.buffer.write(self.filter.process(chunk))
+            self.position += n
+
+    def latest(self, n_samples):
+        return self.buffer.latest(n_samples)
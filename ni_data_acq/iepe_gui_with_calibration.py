@@ -2,47 +2,94 @@ import sys
 import os
 import json
 import numpy as np
-import pandas as pd
 import nidaqmx
 from nidaqmx.system import System
 from datetime import datetime
-from scipy.fft import rfft, rfftfreq
-from scipy.signal import butter, filtfilt
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QFileDialog, QMessageBox
+    QApplication, QMainWindow, QFileDialog, QMessageBox, QCheckBox, QComboBox, QWidget, QHBoxLayout, QPushButton
 )
-from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QAction, QKeySequence
+from PyQt6.QtCore import QTimer, QThread, QMetaObject, Qt, pyqtSignal
 from PyQt6.uic import loadUi
 from PyQt6.QtWidgets import QSizePolicy
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qtagg import NavigationToolbar2QT
 from matplotlib.figure import Figure
 
+from acquisition import StreamingAcquisition
+from browser import CapturePrefetcher, list_captures, PREFETCH_RADIUS
+from live_plot import LivePlot
+from loaders import load_capture, source_key, effective_sample_rate
+from processing import (CHANNEL_NAMES, TOP_PEAK_COUNT, PROCESSING_DTYPES, DEFAULT_PROCESSING_DTYPE,
+                        DEFAULT_MEMORY_BUDGET_MB, signal_statistics)
+from spectrum import (SpectrumEngine, DEFAULT_SEGMENT, DEFAULT_OVERLAP, DEFAULT_WINDOW, DEFAULT_AVERAGING,
+                      DEFAULT_AVERAGE_DEPTH)
+from trace_cache import TraceCache, DEFAULT_TRACE_CACHE_MB
+from waterfall import (StreamingSTFT, WaterfallPlot, DEFAULT_WATERFALL_SEGMENT, DEFAULT_WATERFALL_OVERLAP,
+                       DEFAULT_WATERFALL_DEPTH, DEFAULT_WATERFALL_WINDOW)
+from workers import AcquisitionWorker, ProcessingWorker, ShotParams
+from writer import ShotWriter, DEFAULT_SAVE_FORMAT, DEFAULT_PNG_INTERVAL
+
 CONFIG_FILE = "iepe_config.json"
 SENSITIVITY_FILE = "sensitivity_config.json"
-CAL_RESISTOR = 230.9
 DEFAULT_FILTER_CUTOFF = 5000.0
-DEFAULT_FILTER_ORDER = 4
 DEFAULT_AI3_SCALE = {"offset": 4.0, "gain": 16.0, "range": 10.0}
 DEFAULT_INITIAL_CHANNELS = {"ai0": True, "ai1": True, "ai2": True, "ai3": True}
 DEFAULT_COMBO_INDEX = 2
-
-def butter_lowpass_filter(data, cutoff, fs, order=DEFAULT_FILTER_ORDER):
-    nyq = 0.5 * fs
-    normal_cutoff = cutoff / nyq
-    b, a = butter(order, normal_cutoff, btype='low', analog=False)
-    return filtfilt(b, a, data)
+FILTER_MODE_ZERO_PHASE = 0
+FILTER_MODE_STREAMING = 1
+FILTER_MODES = ["필터: 영위상", "필터: 스트리밍"]
+PLOT_DEBOUNCE_MS = 150
+SPECTRUM_MODE_SINGLE = 0
+SPECTRUM_MODE_AVERAGED = 1
+SPECTRUM_MODES = ["스펙트럼: 단일 FFT", "스펙트럼: 평균(Welch)"]
+DEFAULT_SPECTRUM = {
+    "window": DEFAULT_WINDOW,
+    "segment": DEFAULT_SEGMENT,
+    "overlap": DEFAULT_OVERLAP,
+    "averaging": DEFAULT_AVERAGING,
+    "depth": DEFAULT_AVERAGE_DEPTH,
+    "band": None  # [f_lo, f_hi, points]: 해당 대역만 Zoom FFT
+}
+DEFAULT_WATERFALL = {
+    "segment": DEFAULT_WATERFALL_SEGMENT,
+    "overlap": DEFAULT_WATERFALL_OVERLAP,
+    "depth": DEFAULT_WATERFALL_DEPTH,
+    "window": DEFAULT_WATERFALL_WINDOW
+}
+
+class PlotToolbar(NavigationToolbar2QT):
+    """확대/이동 툴바. 홈 버튼은 LivePlot 의 자동 범위 조정으로 되돌립니다."""
+    def __init__(self, canvas, parent, live_plot):
+        super().__init__(canvas, parent)
+        self.live_plot = live_plot
+
+    def home(self, *args):
+        self.live_plot.reset_view()
 
 class IEPEWindow(QMainWindow):
+    # 작업 스레드 요청 (스레드 간 연결이므로 큐잉되어 각 작업 스레드에서 실행)
+    requestShot = pyqtSignal(int, bool)
+    requestCalibration = pyqtSignal(int, str)
+    requestCloseTask = pyqtSignal()
+    requestBlock = pyqtSignal(int, object, float, object)
+    requestStream = pyqtSignal(int, object, object)
+    captureReady = pyqtSignal(str)  # 미리 읽기 스레드에서 파일 준비 완료
+
     def __init__(self):
         super().__init__()
         ui_path = os.path.join(os.path.dirname(__file__), "iepe_gui_with_calibration.ui")
         loadUi(ui_path, self)
 
-        self.task = None
+        self.acquisition = None  # 연속 측정 모드의 스트리밍 수집기
+        self.spectrum_engine = None  # 평균 스펙트럼 모드의 측정 간 평균 상태
+        self.waterfall = None  # 워터폴 표시용 기준 채널의 증분 STFT (측정 간 유지)
         self.measure_count = 0
         self.is_csv_mode = False
         self.last_csv_data = None
         self.last_csv_time = None
+        self.csv_sampling_rate = None
+        self.csv_source = None  # 로드한 파일의 (경로, 수정 시각): 캐시 키
         self.auto_measuring = False
 
         data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
@@ -52,6 +99,47 @@ class IEPEWindow(QMainWindow):
 
         self.config = self.load_config()
         self.sensitivity_per_channel = self.load_sensitivity_config()
+        # 처리 dtype (float32 이면 메모리 절반) 과 측정 한 번 처리의 작업 메모리 상한 (넘으면 구간별 처리)
+        self.processing_dtype = PROCESSING_DTYPES.get(self.config.get("processing_dtype", DEFAULT_PROCESSING_DTYPE),
+                                                      PROCESSING_DTYPES[DEFAULT_PROCESSING_DTYPE])
+        self.memory_budget = self.config.get("memory_budget_mb", DEFAULT_MEMORY_BUDGET_MB) * 1024 * 1024
+
+        # 측정 결과 저장은 백그라운드 스레드에서 (저장이 다음 측정을 지연시키지 않음)
+        self.writer = ShotWriter(self.config.get("save_format", DEFAULT_SAVE_FORMAT),
+                                 self.config.get("png_interval", DEFAULT_PNG_INTERVAL))
+        self.writer.start()
+
+        # DAQ 읽기/캘리브레이션과 신호 처리는 각각 전용 스레드에서 (GUI 스레드는 표시만 담당)
+        self.run_id = 0  # 측정 중단 시 증가: 진행 중이던 작업의 결과는 무시
+        self.acquisition_busy = False
+        self.processing_busy = False
+        self.calibrating = False
+        self.acquisition_thread = QThread(self)
+        self.acquisition_worker = AcquisitionWorker()
+        self.acquisition_worker.moveToThread(self.acquisition_thread)
+        self.processing_thread = QThread(self)
+        self.processing_worker = ProcessingWorker()
+        self.processing_worker.moveToThread(self.processing_thread)
+        self.requestShot.connect(self.acquisition_worker.read_shot)
+        self.requestCalibration.connect(self.acquisition_worker.calibrate)
+        self.requestCloseTask.connect(self.acquisition_worker.close_task)
+        self.requestBlock.connect(self.processing_worker.process_block)
+        self.requestStream.connect(self.processing_worker.process_stream)
+        self.acquisition_worker.blockReady.connect(self.on_block_ready)
+        self.acquisition_worker.calibrated.connect(self.on_calibrated)
+        self.acquisition_worker.failed.connect(self.on_acquisition_failed)
+        self.acquisition_worker.finished.connect(self.on_acquisition_finished)
+        self.processing_worker.shotReady.connect(self.on_shot_ready)
+        self.processing_worker.failed.connect(self.on_processing_failed)
+        self.acquisition_thread.start()
+        self.processing_thread.start()
+
+        self.trace_cache = TraceCache(self.config.get("trace_cache_mb", DEFAULT_TRACE_CACHE_MB) * 1024 * 1024,
+                                      self.memory_budget)
+        # 폴더 탐색 모드: 측정 파일 목록 + 이전/다음 파일을 스레드 풀에서 미리 읽기/전처리
+        self.prefetcher = CapturePrefetcher(self.trace_cache, dtype=self.processing_dtype)
+        self.captures = []
+        self.captureReady.connect(self.on_capture_ready)
 
         self.spinCutoffFrequency.setValue(self.config.get("filter_cutoff", DEFAULT_FILTER_CUTOFF))
 
@@ -59,16 +147,69 @@ class IEPEWindow(QMainWindow):
         self.canvas = FigureCanvas(self.figure)
         self.canvas.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         self.canvas.updateGeometry()
+        self.browseBar = QWidget()
+        browseLayout = QHBoxLayout(self.browseBar)
+        browseLayout.setContentsMargins(0, 0, 0, 0)
+        self.btnPrevCapture = QPushButton("◀ 이전")
+        self.btnPrevCapture.setShortcut(QKeySequence("PgUp"))
+        self.comboCapture = QComboBox()
+        self.comboCapture.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.btnNextCapture = QPushButton("다음 ▶")
+        self.btnNextCapture.setShortcut(QKeySequence("PgDown"))
+        for widget in (self.btnPrevCapture, self.comboCapture, self.btnNextCapture):
+            browseLayout.addWidget(widget)
+        self.btnPrevCapture.clicked.connect(lambda: self.step_capture(-1))
+        self.btnNextCapture.clicked.connect(lambda: self.step_capture(1))
+        self.comboCapture.currentIndexChanged.connect(self.show_capture)
+        self.browseBar.setVisible(False)
+        self.plotLayout.addWidget(self.browseBar)
         self.plotLayout.addWidget(self.canvas)
+        # 축/선은 한 번만 만들고 측정마다 데이터만 교체 (블리팅)
+        self.live_plot = LivePlot(self.figure, self.canvas)
+        # 확대/이동 시 보이는 구간만 화면 해상도로 다시 데시메이션
+        self.plotToolbar = PlotToolbar(self.canvas, self, self.live_plot)
+        self.plotLayout.addWidget(self.plotToolbar)
+        # 워터폴: 기준 채널의 STFT 행을 고정 크기 버퍼에 쌓아 이미지 하나로 표시
+        self.waterfallFigure = Figure(figsize=(10, 3))
+        self.waterfallCanvas = FigureCanvas(self.waterfallFigure)
+        self.waterfallCanvas.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.waterfall_plot = WaterfallPlot(self.waterfallFigure, self.waterfallCanvas)
+        self.plotLayout.addWidget(self.waterfallCanvas)
 
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.start_measurement)
 
+        # 연속 측정: 수집은 별도 스레드, 이 타이머는 최근 구간 표시만 담당
+        self.chkContinuous = QCheckBox("연속 측정")
+        self.chkContinuous.setChecked(self.config.get("continuous_mode", False))
+        self.controlLayout.addWidget(self.chkContinuous)
+        # 연속 측정 필터 방식: 화면 구간마다 영위상(filtfilt) / 블록 단위 상태 유지(sosfilt)
+        self.comboFilterMode = QComboBox()
+        self.comboFilterMode.addItems(FILTER_MODES)
+        self.comboFilterMode.setCurrentIndex(self.config.get("filter_mode", FILTER_MODE_ZERO_PHASE))
+        self.controlLayout.addWidget(self.comboFilterMode)
+        # 스펙트럼 방식: 블록 전체 단일 rfft / 윈도우 + Welch 세그먼트의 측정 간 평균 (피크 주파수 안정화)
+        self.comboSpectrumMode = QComboBox()
+        self.comboSpectrumMode.addItems(SPECTRUM_MODES)
+        self.comboSpectrumMode.setCurrentIndex(self.config.get("spectrum_mode", SPECTRUM_MODE_SINGLE))
+        self.comboSpectrumMode.currentIndexChanged.connect(self.reset_spectrum_average)
+        self.controlLayout.addWidget(self.comboSpectrumMode)
+        self.chkWaterfall = QCheckBox("워터폴")
+        self.chkWaterfall.setChecked(self.config.get("waterfall_enabled", False))
+        self.chkWaterfall.toggled.connect(self.toggle_waterfall)
+        self.controlLayout.addWidget(self.chkWaterfall)
+        self.waterfallCanvas.setVisible(self.chkWaterfall.isChecked())
+        self.stream_timer = QTimer(self)
+        self.stream_timer.timeout.connect(self.update_stream_display)
+
         self.btnStart.clicked.connect(self.start_auto_measurement)
         self.btnStop.clicked.connect(self.stop_auto_measurement)
         self.actionSelect_Directory.triggered.connect(self.select_directory)
         self.actionExit.triggered.connect(self.close)
         self.actionOpen_CSV.triggered.connect(self.open_csv_file)
+        self.actionBrowse_Directory = QAction("측정 폴더 탐색", self)
+        self.menuFile.insertAction(self.actionCalibrate_Channel, self.actionBrowse_Directory)
+        self.actionBrowse_Directory.triggered.connect(self.browse_directory)
         self.actionCalibrate_Channel.triggered.connect(self.calibrate_channel)
 
         initial_channels = self.config.get("initial_channels", DEFAULT_INITIAL_CHANNELS)
@@ -79,10 +220,16 @@ class IEPEWindow(QMainWindow):
 
         initial_combo_index = self.config.get("combo_index", DEFAULT_COMBO_INDEX)
         self.comboChannelSelect.setCurrentIndex(initial_combo_index)
+        self.comboChannelSelect.currentIndexChanged.connect(self.reset_waterfall)
 
+        # CSV 모드 재계산은 입력이 멈춘 뒤 한 번만 (스핀박스를 드래그해도 중간 값마다 계산하지 않음)
+        self.plot_debounce = QTimer(self)
+        self.plot_debounce.setSingleShot(True)
+        self.plot_debounce.setInterval(PLOT_DEBOUNCE_MS)
+        self.plot_debounce.timeout.connect(self.refresh_plot)
         for chk in [self.chkAi0, self.chkAi1, self.chkAi2, self.chkAi3]:
-            chk.stateChanged.connect(self.update_plot)
-        self.spinCutoffFrequency.valueChanged.connect(self.update_plot)
+            chk.stateChanged.connect(self.plot_debounce.start)
+        self.spinCutoffFrequency.valueChanged.connect(self.plot_debounce.start)
 
     def load_config(self):
         if os.path.exists(CONFIG_FILE):
@@ -105,30 +252,30 @@ class IEPEWindow(QMainWindow):
                 "ai3": self.chkAi3.isChecked()
             },
             "combo_index": self.comboChannelSelect.currentIndex(),
-            "ai3_scale": self.config.get("ai3_scale", DEFAULT_AI3_SCALE)
+            "ai3_scale": self.config.get("ai3_scale", DEFAULT_AI3_SCALE),
+            "continuous_mode": self.chkContinuous.isChecked(),
+            "filter_mode": self.comboFilterMode.currentIndex(),
+            "spectrum_mode": self.comboSpectrumMode.currentIndex(),
+            "spectrum": self.config.get("spectrum", DEFAULT_SPECTRUM),
+            "waterfall_enabled": self.chkWaterfall.isChecked(),
+            "waterfall": self.config.get("waterfall", DEFAULT_WATERFALL),
+            "save_format": self.writer.save_format,
+            "png_interval": self.writer.png_interval,
+            "trace_cache_mb": self.trace_cache.max_bytes // (1024 * 1024),
+            "processing_dtype": np.dtype(self.processing_dtype).name,
+            "memory_budget_mb": self.memory_budget // (1024 * 1024)
         }
         with open(CONFIG_FILE, 'w') as f:
             json.dump(config_data, f, indent=4)
 
     def open_csv_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "CSV 파일 열기", "", "CSV Files (*.csv)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "CSV 파일 열기", "", "측정 파일 (*.csv *.npz)")
         if not file_path:
             return
         try:
-            df = pd.read_csv(file_path)
-            if "Time(s)" not in df.columns or df.shape[1] < 2:
-                raise ValueError("CSV에 Time(s) 열과 하나 이상의 데이터 열이 필요합니다.")
-
-            t = df["Time(s)"].values
-            data_dict = {}
-            sampling_rate = None
-            if "Sampling Rate (Hz)" in df.columns:
-                sampling_rate = df["Sampling Rate (Hz)"].iloc[0]
-                df = df.drop(columns=["Sampling Rate (Hz)"])
-
-            for col in df.columns[1:]:
-                ch_name = col.replace(" (g)", "").strip()
-                data_dict[ch_name] = df[col].values
+            self.csv_source = source_key(file_path)
+            # IEPE CSV / FTP_Send(ESP32) CSV / npz 형식을 판별해 열별로 한 번에 파싱
+            t, data_dict, sampling_rate = load_capture(file_path, self.processing_dtype)
 
             self.last_csv_time = t
             self.last_csv_data = data_dict
@@ -136,11 +283,87 @@ class IEPEWindow(QMainWindow):
             self.is_csv_mode = True
 
             self.update_plot()
-            self.lblStatus.setText("✅ CSV 파일 로드 완료")
+            self.lblStatus.setText("✅ 측정 파일 로드 완료")
         except Exception as e:
             QMessageBox.critical(self, "파일 읽기 오류", str(e))
             self.lblStatus.setText("❌ CSV 파일 로드 실패")
 
+    def browse_directory(self):
+        path = QFileDialog.getExistingDirectory(self, "측정 폴더 선택", self.save_directory)
+        if not path:
+            return
+        try:
+            captures = list_captures(path)
+        except OSError as e:
+            QMessageBox.critical(self, "폴더 읽기 오류", str(e))
+            return
+        if not captures:
+            QMessageBox.information(self, "측정 폴더 탐색", "폴더에 iepe_*.csv / iepe_*.npz 측정 파일이 없습니다.")
+            return
+        self.captures = captures
+        self.comboCapture.blockSignals(True)
+        self.comboCapture.clear()
+        self.comboCapture.addItems([c.label for c in captures])
+        self.comboCapture.setCurrentIndex(len(captures) - 1)  # 가장 최근 측정부터
+        self.comboCapture.blockSignals(False)
+        self.browseBar.setVisible(True)
+        self.lblStatus.setText(f"📂 측정 파일 {len(captures)}개")
+        self.show_capture(len(captures) - 1)
+
+    def step_capture(self, step):
+        index = self.comboCapture.currentIndex() + step
+        if 0 <= index < len(self.captures):
+            self.comboCapture.setCurrentIndex(index)
+
+    def show_capture(self, index):
+        if not 0 <= index < len(self.captures):
+            return
+        cutoff = self.spinCutoffFrequency.value()
+        path = self.captures[index].path
+        if not self.prefetcher.request(path, cutoff).done():
+            self.lblStatus.setText(f"⏳ {self.captures[index].name} 불러오는 중...")
+        self.watch_capture(path, cutoff)
+        neighbours = [self.captures[i].path for i in range(index - PREFETCH_RADIUS, index + PREFETCH_RADIUS + 1)
+                      if 0 <= i < len(self.captures) and i != index]
+        self.prefetcher.prefetch(neighbours, cutoff)
+
+    def watch_capture(self, path, cutoff):
+        # 준비되면 GUI 스레드에서 on_capture_ready (이미 준비됐으면 바로 호출)
+        future = self.prefetcher.request(path, cutoff)
+        future.add_done_callback(lambda f, p=path: self.captureReady.emit(p))
+
+    def on_capture_ready(self, path):
+        index = self.comboCapture.currentIndex()
+        if not 0 <= index < len(self.captures) or self.captures[index].path != path:
+            return  # 그 사이 다른 파일을 선택함
+        future = self.prefetcher.request(path, self.spinCutoffFrequency.value())
+        if future.cancelled() or not future.done():
+            # 캐시에서 밀려나 다시 요청됨: 완료되면 다시 호출됨
+            self.watch_capture(path, self.spinCutoffFrequency.value())
+            return
+        try:
+            capture = future.result()
+        except Exception as e:
+            QMessageBox.critical(self, "파일 읽기 오류", f"{os.path.basename(path)}: {e}")
+            self.lblStatus.setText("❌ 측정 파일 로드 실패")
+            return
+        self.csv_source = capture.source
+        self.last_csv_time = capture.t
+        self.last_csv_data = capture.data
+        self.csv_sampling_rate = capture.sample_rate
+        self.is_csv_mode = True
+        self.update_plot()
+        self.lblStatus.setText(f"✅ {self.captures[index].name} ({index + 1}/{len(self.captures)})")
+
+    def refresh_plot(self):
+        # 폴더 탐색 중인 파일이면 새 cutoff 의 필터링(현재 + 이웃 파일)을 스레드 풀에서 (GUI 스레드에서 필터링하지 않음)
+        index = self.comboCapture.currentIndex()
+        if (self.is_csv_mode and 0 <= index < len(self.captures) and self.csv_source is not None
+                and self.csv_source[0] == self.captures[index].path):
+            self.show_capture(index)
+        else:
+            self.update_plot()
+
     def update_plot(self):
         try:
             if self.is_csv_mode and self.last_csv_data and self.last_csv_time is not None:
@@ -148,48 +371,20 @@ class IEPEWindow(QMainWindow):
                 data_dict = self.last_csv_data
                 sampling_rate = self.csv_sampling_rate
 
-                self.figure.clear()
-                ax1 = self.figure.add_subplot(211)
-                ax2 = self.figure.add_subplot(212)
-
-                for ch, chk in zip(["ai0", "ai1", "ai2", "ai3"],
-                                    [self.chkAi0, self.chkAi1, self.chkAi2, self.chkAi3]):
+                fs = self.csv_sample_rate()
+                cutoff = self.spinCutoffFrequency.value()
+                traces = {}
+                spectra = {}
+                freqs = None
+                for ch, chk in zip(CHANNEL_NAMES, [self.chkAi0, self.chkAi1, self.chkAi2, self.chkAi3]):
                     if chk.isChecked() and ch in data_dict:
-                        y = data_dict[ch]
-                        if sampling_rate is not None:
-                            cutoff = self.spinCutoffFrequency.value()
-                            y_filtered = butter_lowpass_filter(y, cutoff, sampling_rate)
-                            ax1.plot(t, y_filtered, label=ch)
-                            fft_vals = np.abs(rfft(y_filtered)) / len(y_filtered)
-                            freqs = rfftfreq(len(y_filtered), 1 / sampling_rate)
-                            ax2.plot(freqs, fft_vals, label=ch)
-                        elif len(t) >= 2:
-                            fs = 1 / (t[1] - t[0])
-                            cutoff = self.spinCutoffFrequency.value()
-                            y_filtered = butter_lowpass_filter(y, cutoff, fs)
-                            ax1.plot(t, y_filtered, label=ch)
-                            fft_vals = np.abs(rfft(y_filtered)) / len(y_filtered)
-                            freqs = rfftfreq(len(y_filtered), 1 / fs)
-                            ax2.plot(freqs, fft_vals, label=ch)
-                        else:
-                            ax1.plot(t, y, label=ch)
-                            fft_vals = np.abs(rfft(y)) / len(y)
-                            freqs = rfftfreq(len(y), 1.0) # Default frequency if no time info
-                            ax2.plot(freqs, fft_vals, label=ch)
-
-                ax1.set_title("Time Domain")
-                ax1.set_ylabel("Acceleration (g) / Other Units")
-                ax1.grid(True)
-                ax1.legend()
-
-                ax2.set_title("Frequency Domain")
-                ax2.set_xlabel("Frequency (Hz)")
-                ax2.set_ylabel("Amplitude")
-                ax2.grid(True)
-                ax2.legend()
-
-                self.figure.tight_layout()
-                self.canvas.draw()
+                        # (파일, 채널, cutoff) 별 캐시: 이미 계산한 조합은 필터링/rfft 생략
+                        entry = self.trace_cache.get(self.csv_source, ch, data_dict[ch], fs, cutoff)
+                        traces[ch] = entry.trace
+                        spectra[ch] = entry.spectrum
+                        freqs = entry.freqs # 시간 정보가 없으면 1 Hz 기준 축
+                self.live_plot.update(t, traces, freqs, spectra)
+                self.update_file_waterfall(data_dict, fs, cutoff)
 
                 self.update_statistics(data_dict, t, sampling_rate)
 
@@ -198,7 +393,21 @@ class IEPEWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "CSV 업데이트 오류", str(e))
 
-    def update_statistics(self, data_dict, t, sample_rate):
+    def update_file_waterfall(self, data_dict, fs, cutoff):
+        # 불러온 파일: 파일 전체(필터링된 기준 채널)의 STFT 로 워터폴을 다시 채움
+        ref_ch = self.waterfall_channel()
+        stft = self.get_waterfall(fs) if fs is not None else None
+        if stft is None or ref_ch not in data_dict:
+            return
+        stft.reset()
+        stft.add_block(self.trace_cache.get(self.csv_source, ref_ch, data_dict[ref_ch], fs, cutoff).trace)
+        self.waterfall_plot.update(stft)
+
+    def csv_sample_rate(self):
+        """CSV 모드의 샘플링 주파수. 파일에 없으면 시간 열 간격으로 추정, 그것도 없으면 None."""
+        return effective_sample_rate(self.last_csv_time, self.csv_sampling_rate)
+
+    def update_statistics(self, data_dict, t, sample_rate, shot=None):
         ref_ch = self.comboChannelSelect.currentText().strip()
         enabled_channels = [ch for ch, chk in zip(["ai0", "ai1", "ai2", "ai3"],
                                                     [self.chkAi0, self.chkAi1, self.chkAi2, self.chkAi3]) if chk.isChecked()]
@@ -207,32 +416,26 @@ class IEPEWindow(QMainWindow):
 
         if ref_ch in data_dict:
             ref_data = data_dict[ref_ch]
-            min_val = np.min(ref_data)
-            max_val = np.max(ref_data)
-            rms_val = np.sqrt(np.mean(ref_data ** 2))
+            min_val, max_val, rms_val = signal_statistics(ref_data)
 
             self.editMin.setText(f"{min_val:.3f}")
             self.editMax.setText(f"{max_val:.3f}")
             self.editRMS.setText(f"{rms_val:.3f}")
 
-            if sample_rate is not None:
-                fft_vals = np.abs(rfft(ref_data)) / len(ref_data)
-                freqs = rfftfreq(len(ref_data), 1 / sample_rate)
-                top_indices = np.argsort(fft_vals)[-10:][::-1]
-                top_freqs = freqs[top_indices]
-            elif len(t) >= 2:
-                fs = 1 / (t[1] - t[0])
-                fft_vals = np.abs(rfft(ref_data)) / len(ref_data)
-                freqs = rfftfreq(len(ref_data), 1 / fs)
-                top_indices = np.argsort(fft_vals)[-10:][::-1]
-                top_freqs = freqs[top_indices]
+            if shot is not None:
+                # 측정 처리에서 계산한 스펙트럼 재사용 (rfft 중복 계산 없음)
+                top_freqs = shot.top_frequencies(ref_ch)
+            elif sample_rate is not None or len(t) >= 2:
+                # 필터링 전 원본 스펙트럼과 피크도 캐시에서 (cutoff=None)
+                entry = self.trace_cache.get(self.csv_source, ref_ch, ref_data, self.csv_sample_rate())
+                top_freqs, _ = entry.peaks(TOP_PEAK_COUNT)
             else:
                 for i in range(10):
                     getattr(self, f"peakFreq{i+1}").setText("-")
                 return
 
             for i in range(10):
-                value = f"{top_freqs[i]:.1f}" if i < len(top_freqs) else ""
+                value = f"{top_freqs[i]:.1f}" if i < len(top_freqs) and not np.isnan(top_freqs[i]) else ""
                 getattr(self, f"peakFreq{i+1}").setText(value)
         else:
             self.editMin.setText("-")
@@ -243,228 +446,232 @@ class IEPEWindow(QMainWindow):
 
     def start_auto_measurement(self):
         self.is_csv_mode = False
+        if self.auto_measuring:
+            self.lblStatus.setText("⚠️ 이미 자동 측정 중입니다.")
+            return
         self.measure_count = 0
         self.update_measure_count_label()
-        if not self.auto_measuring:
-            try:
-                if self.task:  # 현재 활성화된 Task가 있다면 닫음
-                    try:
-                        self.task.control(nidaqmx.constants.TaskMode.TASK_STOP)
-                        self.task.close()
-                    except nidaqmx.errors.DaqError as e:
-                        print(f"[DAQ Error] 기존 Task 종료 오류 (자동 측정): {e}")
-                    self.task = None
-                self.task = nidaqmx.system.storage.persisted_task.PersistedTask("MyTask3").load()
-                self.auto_measuring = True
-                self.start_measurement()
-                self.timer.start(self.spinInterval.value() * 1000)
-                self.lblStatus.setText("🟢 자동 측정 시작")
-            except nidaqmx.errors.DaqError as e:
-                QMessageBox.critical(self, "DAQ Task 오류", f"Task 로드 실패 (자동 측정): {e}")
-                self.lblStatus.setText("❌ 자동 측정 시작 실패")
-                self.auto_measuring = False
+        # 감도는 측정 시작 시 한 번만 읽음 (캘리브레이션 결과는 메모리에 바로 반영됨)
+        self.sensitivity_per_channel = self.load_sensitivity_config()
+        self.reset_spectrum_average()
+        self.reset_waterfall()
+        if self.chkContinuous.isChecked():
+            self.start_continuous_measurement()
         else:
-            self.lblStatus.setText("⚠️ 이미 자동 측정 중입니다.")
+            self.auto_measuring = True
+            self.start_measurement()
+            self.timer.start(self.spinInterval.value() * 1000)
+            self.lblStatus.setText("🟢 자동 측정 시작")
+
+    def start_continuous_measurement(self):
+        if self.acquisition_busy:
+            self.lblStatus.setText("⚠️ 진행 중인 측정/캘리브레이션이 끝난 뒤 다시 시도하세요.")
+            return
+        # 단발 측정 Task 가 남아 있으면 닫음 (같은 장치를 사용) - 작업 스레드가 유휴 상태이므로 바로 끝남
+        QMetaObject.invokeMethod(self.acquisition_worker, "close_task", Qt.ConnectionType.BlockingQueuedConnection)
+        self.acquisition = StreamingAcquisition()
+        try:
+            self.acquisition.start()
+        except nidaqmx.errors.DaqError as e:
+            self.acquisition = None
+            QMessageBox.critical(self, "DAQ Task 오류", f"Task 시작 실패 (연속 측정): {e}")
+            self.lblStatus.setText("❌ 연속 측정 시작 실패")
+            return
+        self.auto_measuring = True
+        self.stream_timer.start(self.spinInterval.value() * 1000)
+        self.lblStatus.setText(f"🟢 연속 측정 시작 ({self.acquisition.sample_rate:.0f} Hz)")
+
+    def update_stream_display(self):
+        acquisition = self.acquisition
+        if acquisition is None:
+            return
+        if acquisition.error is not None:
+            error = acquisition.error
+            self.stop_auto_measurement()
+            QMessageBox.critical(self, "DAQ Task 오류", f"연속 측정 읽기 오류: {error}")
+            self.lblStatus.setText("❌ 연속 측정 실패")
+            return
+        max_count = self.spinMaxCount.value()
+        if max_count > 0 and self.measure_count >= max_count:
+            self.stop_auto_measurement()
+            self.lblStatus.setText("✅ 설정된 최대 측정 횟수에 도달하였습니다.")
+            return
+        if self.processing_busy:
+            return  # 이전 화면을 아직 처리 중 (타이머 틱이 쌓이지 않도록 건너뜀)
+
+        streaming_filter = self.comboFilterMode.currentIndex() == FILTER_MODE_STREAMING
+        params = self.shot_params(acquisition.sample_rate, acquisition.samples_per_shot, streaming_filter)
+        self.processing_busy = True
+        self.requestStream.emit(self.run_id, acquisition, params)
+
+    def reset_spectrum_average(self):
+        self.spectrum_engine = None
+
+    def get_spectrum_engine(self, sample_rate, n_samples):
+        """평균 스펙트럼 모드이면 설정에 맞는 SpectrumEngine (설정이 같으면 평균 상태 유지), 아니면 None."""
+        if self.comboSpectrumMode.currentIndex() != SPECTRUM_MODE_AVERAGED:
+            self.spectrum_engine = None
+            return None
+        params = {**DEFAULT_SPECTRUM, **self.config.get("spectrum", {})}
+        params["segment"] = min(int(params["segment"]), n_samples)
+        engine = self.spectrum_engine
+        if engine is None or not engine.matches(sample_rate, **params):
+            engine = self.spectrum_engine = SpectrumEngine(sample_rate, **params)
+        return engine
+
+    def toggle_waterfall(self, enabled):
+        self.waterfallCanvas.setVisible(enabled)
+        self.reset_waterfall()
+        if enabled and self.is_csv_mode:
+            self.update_plot()
+
+    def reset_waterfall(self):
+        # 처리 스레드가 이전 객체를 쓰고 있을 수 있으므로 비우지 않고 새로 만들도록 참조만 끊음
+        self.waterfall = None
+
+    def waterfall_channel(self):
+        ref_ch = self.comboChannelSelect.currentText().strip()
+        return ref_ch if ref_ch in CHANNEL_NAMES else CHANNEL_NAMES[0]
+
+    def get_waterfall(self, sample_rate):
+        """워터폴이 켜져 있으면 설정에 맞는 StreamingSTFT (설정이 같으면 이전 행 유지), 아니면 None."""
+        if not self.chkWaterfall.isChecked():
+            self.waterfall = None
+            return None
+        params = {**DEFAULT_WATERFALL, **self.config.get("waterfall", {})}
+        stft = self.waterfall
+        if stft is None or not stft.matches(sample_rate, **params):
+            stft = self.waterfall = StreamingSTFT(sample_rate, **params)
+        return stft
+
+    def shot_params(self, sample_rate, n_samples, streaming_filter=False):
+        return ShotParams(self.spinCutoffFrequency.value(), self.sensitivity_per_channel,
+                          self.config.get("ai3_scale", DEFAULT_AI3_SCALE),
+                          self.get_spectrum_engine(sample_rate, n_samples), streaming_filter,
+                          self.get_waterfall(sample_rate), CHANNEL_NAMES.index(self.waterfall_channel()),
+                          self.processing_dtype, self.memory_budget)
 
     def stop_auto_measurement(self):
+        # 진행 중인 작업의 결과는 run_id 로 걸러내고, 캘리브레이션 반복은 취소
+        self.run_id += 1
+        self.acquisition_worker.cancel()
+        if self.stream_timer.isActive():
+            self.stream_timer.stop()
+        if self.acquisition:
+            self.acquisition.stop()
+            self.acquisition = None
         if self.timer.isActive():
             self.timer.stop()
-        if self.task:
-            try:
-                self.task.control(nidaqmx.constants.TaskMode.TASK_STOP)
-                self.task.close()
-            except nidaqmx.errors.DaqError as e:
-                print(f"[DAQ Error] Task close skipped: {e}")
-            self.task = None
+        self.processing_busy = False
+        self.requestCloseTask.emit()
         self.auto_measuring = False
         self.lblStatus.setText("🛑 측정 중단됨")
 
     def calibrate_channel(self):
-        target_rms = 0.7071  # 1g 진동 캘리브레이터의 이론 RMS
-        rms_values = []
-
         selected_index = self.comboChannelSelect.currentIndex()
         selected_channel_name = self.comboChannelSelect.currentText()
 
         if selected_channel_name == "ai3":
             QMessageBox.warning(self, "경고", "ai3은 캘리브레이션 대상이 아닙니다.")
             return
+        if self.acquisition:
+            QMessageBox.warning(self, "경고", "연속 측정 중에는 캘리브레이션할 수 없습니다. 측정을 중단하세요.")
+            return
+        if self.acquisition_busy:
+            QMessageBox.warning(self, "경고", "측정이 진행 중입니다. 잠시 후 다시 시도하세요.")
+            return
 
-        try:
-            if self.task: # 현재 활성화된 Task가 있다면 닫음
-                try:
-                    self.task.control(nidaqmx.constants.TaskMode.TASK_STOP)
-                    self.task.close()
-                except nidaqmx.errors.DaqError as e:
-                    print(f"[DAQ Error] 기존 캘리브레이션 Task 종료 오류: {e}")
-                self.task = None
-
-            self.task = nidaqmx.system.storage.persisted_task.PersistedTask("MyTask3").load()
-            # ... (기존 캘리브레이션 로직) ...
-            sample_rate = self.task.timing.samp_clk_rate
-            samples = self.task.timing.samp_quant_samp_per_chan
-
-            selected_index = self.comboChannelSelect.currentIndex()
-            selected_channel_name = self.comboChannelSelect.currentText()
-
-            if selected_channel_name == "ai3":
-                QMessageBox.warning(self, "경고", "ai3은 캘리브레이션 대상이 아닙니다.")
-                return
-
-            for _ in range(10):
-                data = self.task.read(number_of_samples_per_channel=samples)
-                data = np.array(data)
-                if data.ndim == 2:
-                    data_ch = data[selected_index]
-                else:
-                    data_ch = data
-                data_ch = data_ch - np.mean(data_ch)
-                rms = np.sqrt(np.mean(data_ch ** 2))
-                rms_values.append(rms)
-
-            avg_rms_voltage = np.mean(rms_values)
-            new_sensitivity = avg_rms_voltage / target_rms
-
-            self.sensitivity_per_channel[selected_channel_name] = round(new_sensitivity, 5)
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(self.sensitivity_per_channel, f, indent=4)
-
-            QMessageBox.information(self, "캘리브레이션 완료",
-                                    f"{selected_channel_name} 감도: {new_sensitivity:.5f} V/g (10회 평균) 저장됨")
-            self.task.close()
-            self.task = None
-
+        # 10회 읽기는 작업 스레드에서 (창이 멈추지 않으며 측정 중단으로 취소 가능)
+        self.acquisition_busy = True
+        self.calibrating = True
+        self.requestCalibration.emit(selected_index, selected_channel_name)
+        self.lblStatus.setText(f"⏳ {selected_channel_name} 캘리브레이션 중...")
 
-
-        except nidaqmx.errors.DaqError as e:
-            QMessageBox.critical(self, "DAQ Task 오류", f"캘리브레이션 Task 오류: {e}")
-        except Exception as e:
-            QMessageBox.critical(self, "캘리브레이션 오류", str(e))
-        finally:
-            if self.task and not self.auto_measuring:
-                try:
-                    self.task.control(nidaqmx.constants.TaskMode.TASK_STOP)
-                    self.task.close()
-                except nidaqmx.errors.DaqError as e:
-                    print(f"[DAQ Error] 캘리브레이션 Task close 오류 (finally): {e}")
-                self.task = None
+    def on_calibrated(self, channel, sensitivity):
+        self.sensitivity_per_channel[channel] = round(sensitivity, 5)
+        self.save_sensitivity_config()
+        self.lblStatus.setText(f"✅ {channel} 캘리브레이션 완료")
+        QMessageBox.information(self, "캘리브레이션 완료",
+                                f"{channel} 감도: {sensitivity:.5f} V/g (10회 평균) 저장됨")
 
     def start_measurement(self):
-        try:
-            self.sensitivity_per_channel = self.load_sensitivity_config()
-            max_count = self.spinMaxCount.value()
-            if max_count > 0 and self.measure_count >= max_count and self.auto_measuring:
-                if self.timer.isActive():
-                    self.timer.stop()
-                self.lblStatus.setText("✅ 설정된 최대 측정 횟수에 도달하였습니다.")
-                self.auto_measuring = False
-                return
-            elif max_count > 0 and self.measure_count >= max_count and not self.auto_measuring:
-                return # 자동 측정이 아닐 때는 최대 횟수 도달 시 추가 측정 안함
-
-            if not self.task:
-                try:
-                    self.task = nidaqmx.system.storage.persisted_task.PersistedTask("MyTask3").load()
-                except nidaqmx.errors.DaqError as e:
-                    QMessageBox.critical(self, "DAQ Task 오류", f"Task 로드 실패 (측정): {e}")
-                    self.lblStatus.setText("❌ 측정 실패")
-                    return
-
-            sample_rate = self.task.timing.samp_clk_rate
-            samples = self.task.timing.samp_quant_samp_per_chan
-            data = self.task.read(number_of_samples_per_channel=samples)
-            data = np.array(data)
-            if data.ndim == 1:
-                data = data.reshape((1, -1))
-
-            self.measure_count += 1
-            self.update_measure_count_label()
-            self.process_and_display_all_channels(data, sample_rate)
-
-        except nidaqmx.errors.DaqError as e:
-            QMessageBox.critical(self, "DAQ Task 오류", f"측정 Task 읽기 오류: {e}")
-            self.lblStatus.setText("❌ 측정 실패")
-            if self.task and not self.auto_measuring:
-                try:
-                    self.task.control(nidaqmx.constants.TaskMode.TASK_STOP)
-                    self.task.close()
-                except nidaqmx.errors.DaqError as e:
-                    print(f"[DAQ Error] 측정 Task close 오류 (start_measurement): {e}")
-                self.task = None
+        max_count = self.spinMaxCount.value()
+        if max_count > 0 and self.measure_count >= max_count and self.auto_measuring:
+            if self.timer.isActive():
+                self.timer.stop()
+            self.lblStatus.setText("✅ 설정된 최대 측정 횟수에 도달하였습니다.")
             self.auto_measuring = False
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+            self.requestCloseTask.emit()
+            return
+        elif max_count > 0 and self.measure_count >= max_count and not self.auto_measuring:
+            return # 자동 측정이 아닐 때는 최대 횟수 도달 시 추가 측정 안함
+        if self.acquisition_busy or self.processing_busy:
+            return  # 이전 측정이 아직 끝나지 않음 (타이머 틱이 쌓이지 않도록 건너뜀)
+
+        # 읽기는 작업 스레드에서, 결과는 on_block_ready 로 전달됨. 자동 측정 중에는 Task 를 열어 둠
+        self.acquisition_busy = True
+        self.requestShot.emit(self.run_id, self.auto_measuring)
+
+    def on_block_ready(self, run_id, data, sample_rate):
+        if run_id != self.run_id:
+            return  # 중단된 측정의 결과
+        self.processing_busy = True
+        self.requestBlock.emit(run_id, data, sample_rate, self.shot_params(sample_rate, data.shape[1]))
+
+    def on_acquisition_finished(self):
+        self.acquisition_busy = False
+        self.calibrating = False
+
+    def on_acquisition_failed(self, title, message):
+        if self.calibrating:
+            self.lblStatus.setText("❌ 캘리브레이션 실패")
+        else:
+            self.stop_auto_measurement()
             self.lblStatus.setText("❌ 측정 실패")
-            if self.task and not self.auto_measuring:
-                try:
-                    self.task.control(nidaqmx.constants.TaskMode.TASK_STOP)
-                    self.task.close()
-                except nidaqmx.errors.DaqError as e:
-                    print(f"[DAQ Error] 측정 Task close 오류 (start_measurement - general): {e}")
-                self.task = None
-            self.auto_measuring = False
-        finally:
-            if not self.auto_measuring and self.task:
-                try:
-                    self.task.control(nidaqmx.constants.TaskMode.TASK_STOP)
-                    self.task.close()
-                    self.task = None
-                except nidaqmx.errors.DaqError as e:
-                    print(f"[DAQ Error] 측정 Task close 오류 (finally): {e}")
-
-    def process_and_display_all_channels(self, data, sample_rate):
-        t = np.arange(data.shape[1]) / sample_rate
-        proc_data = {}
-        cutoff = self.spinCutoffFrequency.value()
+        QMessageBox.critical(self, title, message)
+
+    def on_shot_ready(self, run_id, shot):
+        if run_id != self.run_id:
+            return
+        self.processing_busy = False
+        if shot is None:
+            return
+        self.measure_count += 1
+        self.update_measure_count_label()
+        self.display_shot(shot)
 
-        ai3_scale = self.config.get("ai3_scale", DEFAULT_AI3_SCALE)
+    def on_processing_failed(self, run_id, message):
+        if run_id != self.run_id:
+            return
+        self.processing_busy = False
+        self.stop_auto_measurement()
+        QMessageBox.critical(self, "Error", message)
+        self.lblStatus.setText("❌ 측정 실패")
 
-        for i, ch in enumerate(["ai0", "ai1", "ai2", "ai3"]):
-            filtered = butter_lowpass_filter(data[i], cutoff, sample_rate)
-            if ch == "ai3":
-                current_mA = (filtered / CAL_RESISTOR) * 1000
-                proc_data[ch] = (current_mA - ai3_scale["offset"]) / ai3_scale["gain"] * ai3_scale["range"]
-            else:
-                proc_data[ch] = (filtered - np.mean(filtered)) / self.sensitivity_per_channel.get(ch, 1.0)
+    def display_shot(self, shot):
+        # 처리 스레드에서 완성된 결과를 그래프, 통계, 저장에 공유
+        t = shot.t
+        proc_data = shot.as_dict()
+        sample_rate = shot.sample_rate
 
         self.last_csv_time = t
         self.last_csv_data = proc_data
         self.csv_sampling_rate = sample_rate # Store for potential CSV save
         self.is_csv_mode = False
 
-        self.figure.clear()
-        ax1 = self.figure.add_subplot(211)
-        ax2 = self.figure.add_subplot(212)
-
-        for ch, chk in zip(["ai0", "ai1", "ai2", "ai3"], [self.chkAi0, self.chkAi1, self.chkAi2, self.chkAi3]):
-            if chk.isChecked():
-                ax1.plot(t, proc_data[ch], label=ch)
-                fft_vals = np.abs(rfft(proc_data[ch])) / len(proc_data[ch])
-                freqs = rfftfreq(len(proc_data[ch]), 1 / sample_rate)
-                ax2.plot(freqs, fft_vals, label=ch)
-
-        ax1.set_title("Time Domain")
-        ax1.set_ylabel("Acceleration (g) / Other Units")
-        ax1.grid(True)
-        ax1.legend()
-
-        ax2.set_title("Frequency Domain")
-        ax2.set_xlabel("Frequency (Hz)")
-        ax2.set_ylabel("Amplitude")
-        ax2.grid(True)
-        ax2.legend()
-
-        self.figure.tight_layout(pad=3.0)
-        self.canvas.draw()
+        visible = [ch for ch, chk in zip(CHANNEL_NAMES, [self.chkAi0, self.chkAi1, self.chkAi2, self.chkAi3])
+                   if chk.isChecked() and ch in proc_data]
+        self.live_plot.update(t, {ch: proc_data[ch] for ch in visible}, shot.freqs,
+                              {ch: shot.spectrum(ch) for ch in visible})
+        if self.waterfall is not None:
+            self.waterfall_plot.update(self.waterfall)
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base = os.path.join(self.save_directory, f"iepe_{timestamp}")
-        save_df = pd.DataFrame({"Time(s)": t, **{f"{k} (g)": v for k, v in proc_data.items()}})
-        save_df["Sampling Rate (Hz)"] = sample_rate
-        save_df.to_csv(f"{base}.csv", index=False)
-        self.figure.savefig(f"{base}.png")
+        now = datetime.now()
+        base = os.path.join(self.save_directory, f"iepe_{now.strftime('%Y%m%d_%H%M%S')}")
+        if not self.writer.submit(base, shot, now):
+            self.lblStatus.setText(f"⚠️ 저장 대기열이 가득 차 측정 결과를 저장하지 못했습니다. (누락 {self.writer.dropped})")
 
-        self.update_statistics(proc_data, t, sample_rate)
+        self.update_statistics(proc_data, t, sample_rate, shot)
 
     def update_measure_count_label(self):
         self.labelCurrentCount.setText(f"현재 측정 횟수: {self.measure_count}")
@@ -488,12 +695,20 @@ class IEPEWindow(QMainWindow):
 
     def closeEvent(self, event):
         self.save_config()
-        if self.task:
-            try:
-                self.task.control(nidaqmx.constants.TaskMode.TASK_STOP)
-                self.task.close()
-            except nidaqmx.errors.DaqError as e:
-                print(f"[DAQ Error] 어플리케이션 종료 중 Task close 오류: {e}")
+        self.run_id += 1
+        self.acquisition_worker.cancel()
+        self.timer.stop()
+        self.stream_timer.stop()
+        if self.acquisition:
+            self.acquisition.stop()
+            self.acquisition = None
+        # 진행 중인 읽기가 끝나면 Task 를 닫고 작업 스레드 종료
+        QMetaObject.invokeMethod(self.acquisition_worker, "close_task", Qt.ConnectionType.BlockingQueuedConnection)
+        for thread in (self.acquisition_thread, self.processing_thread):
+            thread.quit()
+            thread.wait()
+        self.writer.stop()
+        self.prefetcher.shutdown()
         event.accept()
 
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+import numpy as np
+
+from processing import CHANNEL_NAMES
+
+AXIS_MARGIN = 0.05  # 자동 축 범위 여유 (데이터 범위 대비)
+RESCALE_SHRINK = 0.5  # 데이터 범위가 현재 축 범위의 이 비율보다 작아지면 축을 다시 맞춤
+LAYOUT_PAD = 3.0
+
+
+def minmax_decimate(x, y, n_bins):
+    """
+    y 를 n_bins 개 구간으로 나눠 구간마다 최솟값/최댓값 두 점만 남깁니다 (원래 순서 유지).
+    화면 픽셀 수 정도로 줄여도 피크와 포락선이 그대로 보입니다. 줄일 필요가 없으면 그대로 반환.
+    """
+    n = len(y)
+    n_bins = int(n_bins)
+    if n_bins < 1 or n <= 2 * n_bins:
+        return x, y
+    k = n // n_bins
+    m = k * n_bins
+    blocks = y[:m].reshape(n_bins, k)
+    i_min = blocks.argmin(axis=1)
+    i_max = blocks.argmax(axis=1)
+    base = np.arange(0, m, k)
+    idx = np.empty(2 * n_bins + (n - m), dtype=np.intp)
+    idx[0:2 * n_bins:2] = base + np.minimum(i_min, i_max)
+    idx[1:2 * n_bins:2] = base + np.maximum(i_min, i_max)
+    idx[2 * n_bins:] = np.arange(m, n)  # 나머지 (k 개 미만)
+    return x[idx], y[idx]
+
+
+class LivePlot:
+    """
+    시간/주파수 영역 두 축과 채널별 Line2D 를 한 번만 만들고, 갱신 때는 set_data 와 블리팅만 수행합니다.
+    축 범위가 바뀌거나 표시 채널이 바뀔 때만 전체를 다시 그리고(배경 캐시 갱신), 그 외에는
+    캐시한 배경 위에 선만 다시 그립니다.
+
+    선에는 현재 보이는 x 구간만 축의 픽셀 폭에 맞춰 min/max 데시메이션해 넣습니다. 원본 배열은
+    참조로 보관하고 확대/이동(xlim 변경) 때마다 보이는 구간을 다시 데시메이션하므로, 긴 측정도 확대하면
+    원본 해상도까지 볼 수 있습니다. 사용자가 확대/이동한 축은 reset_view() 전까지 자동 범위 조정을 하지 않습니다.
+    """
+    def __init__(self, figure, canvas, channels=CHANNEL_NAMES):
+        self.figure = figure
+        self.canvas = canvas
+        self.channels = list(channels)
+        self.ax_time = figure.add_subplot(211)
+        self.ax_freq = figure.add_subplot(212)
+        self.ax_time.set_title("Time Domain")
+        self.ax_time.set_ylabel("Acceleration (g) / Other Units")
+        self.ax_time.grid(True)
+        self.ax_freq.set_title("Frequency Domain")
+        self.ax_freq.set_xlabel("Frequency (Hz)")
+        self.ax_freq.set_ylabel("Amplitude")
+        self.ax_freq.grid(True)
+
+        self.time_lines = {}
+        self.freq_lines = {}
+        for i, ch in enumerate(self.channels):
+            color = f"C{i}"  # 채널별 색 고정 (표시 채널이 바뀌어도 유지)
+            self.time_lines[ch], = self.ax_time.plot([], [], color=color, label=ch, animated=True, visible=False)
+            self.freq_lines[ch], = self.ax_freq.plot([], [], color=color, label=ch, animated=True, visible=False)
+        self._lines = {self.ax_time: self.time_lines, self.ax_freq: self.freq_lines}
+        self._data = {self.ax_time: (None, {}), self.ax_freq: (None, {})}  # 축별 원본 (x, {채널: y})
+        self._zoomed = {self.ax_time: False, self.ax_freq: False}
+        self._setting_limits = False
+
+        self._visible = ()
+        self._background = None
+        self._needs_redraw = True
+        canvas.mpl_connect("draw_event", self._on_draw)
+        canvas.mpl_connect("resize_event", self._on_resize)
+        for ax in self._lines:
+            ax.callbacks.connect("xlim_changed", self._on_xlim_changed)
+        figure.tight_layout(pad=LAYOUT_PAD)
+
+    def update(self, t, traces, freqs, spectra):
+        """
+        traces / spectra: {채널: 1차원 배열}. 포함되지 않은 채널은 숨깁니다.
+        배열은 복사하지 않고 참조로 보관하므로 다음 update 전까지 내용이 바뀌지 않아야 합니다.
+        """
+        visible = tuple(ch for ch in self.channels if ch in traces)
+        if visible != self._visible:
+            self._set_visible(visible)
+        self._data[self.ax_time] = (t, traces)
+        self._data[self.ax_freq] = (freqs, spectra)
+        for ax in self._lines:
+            self._refresh_axis(ax)
+
+        if self._needs_redraw or self._background is None:
+            self.redraw()
+        else:
+            self._blit()
+
+    def reset_view(self):
+        """확대/이동을 해제하고 전체 데이터 범위로 되돌립니다."""
+        for ax in self._lines:
+            self._zoomed[ax] = False
+            self._refresh_axis(ax)
+        self.redraw()
+
+    def redraw(self):
+        """전체 다시 그리기. draw_event 에서 배경을 캐시하고 선을 그립니다."""
+        self._needs_redraw = False
+        self.canvas.draw()
+
+    def _refresh_axis(self, ax):
+        x, data = self._data[ax]
+        if x is None or not len(x):
+            return
+        if self._zoomed[ax]:
+            self._decimate_visible(ax, *ax.get_xlim())
+            return
+        y_range = self._decimate_visible(ax, x[0], x[-1])
+        if y_range is not None:
+            self._fit_limits(ax, float(x[0]), float(x[-1]), *y_range)
+
+    def _decimate_visible(self, ax, x_lo, x_hi):
+        """[x_lo, x_hi] 구간(양 끝 한 점씩 포함)을 데시메이션해 선에 넣고 (y 최솟값, y 최댓값) 을 반환."""
+        x, data = self._data[ax]
+        if x is None:
+            return None
+        lines = self._lines[ax]
+        i0 = max(int(np.searchsorted(x, x_lo)) - 1, 0)
+        i1 = min(int(np.searchsorted(x, x_hi, side="right")) + 1, len(x))
+        n_bins = max(1, int(ax.bbox.width))
+        lo = hi = None
+        for ch in self._visible:
+            xd, yd = minmax_decimate(x[i0:i1], data[ch][i0:i1], n_bins)
+            lines[ch].set_data(xd, yd)
+            if len(yd):
+                y_min, y_max = float(yd.min()), float(yd.max())
+                lo = y_min if lo is None else min(lo, y_min)
+                hi = y_max if hi is None else max(hi, y_max)
+        return None if lo is None else (lo, hi)
+
+    def _set_visible(self, visible):
+        self._visible = visible
+        for ch in self.channels:
+            self.time_lines[ch].set_visible(ch in visible)
+            self.freq_lines[ch].set_visible(ch in visible)
+        for ax, lines in self._lines.items():
+            legend = ax.get_legend()
+            if legend is not None:
+                legend.remove()
+            if visible:
+                ax.legend(handles=[lines[ch] for ch in visible])
+        self._needs_redraw = True
+
+    def _fit_limits(self, ax, x_lo, x_hi, y_lo, y_hi):
+        self._setting_limits = True
+        try:
+            if x_hi > x_lo and ax.get_xlim() != (x_lo, x_hi):
+                ax.set_xlim(x_lo, x_hi)
+                self._needs_redraw = True
+            cur_lo, cur_hi = ax.get_ylim()
+            span = y_hi - y_lo
+            if y_lo < cur_lo or y_hi > cur_hi or span < (cur_hi - cur_lo) * RESCALE_SHRINK:
+                margin = span * AXIS_MARGIN if span > 0 else max(abs(y_hi), 1.0) * AXIS_MARGIN
+                ax.set_ylim(y_lo - margin, y_hi + margin)
+                self._needs_redraw = True
+        finally:
+            self._setting_limits = False
+
+    def _on_xlim_changed(self, ax):
+        # 툴바 확대/이동: 보이는 구간만 다시 데시메이션 (그리기는 툴바의 draw_idle 이 수행)
+        if self._setting_limits:
+            return
+        self._zoomed[ax] = True
+        self._decimate_visible(ax, *ax.get_xlim())
+
+    def _draw_lines(self):
+        for ch in self._visible:
+            self.figure.draw_artist(self.time_lines[ch])
+            self.figure.draw_artist(self.freq_lines[ch])
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_lines()
+
+    def _on_resize(self, event):
+        self._background = None
+        self.figure.tight_layout(pad=LAYOUT_PAD)
+        for ax in self._lines:
+            self._decimate_visible(ax, *ax.get_xlim())
+
+    def _blit(self):
+        self.canvas.restore_region(self._background)
+        self._draw_lines()
+        self.canvas.blit(self.figure.bbox)
@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+
+from device_csv import read_device_csv
+from processing import CHANNEL_NAMES, time_axis
+from writer import load_shot_npz
+
+TIME_COLUMN = "Time(s)"
+SAMPLE_RATE_COLUMN = "Sampling Rate (Hz)"
+DEVICE_HEADER_PREFIX = b"Location"  # FTP_Send 파일의 첫 줄 "Location : ..."
+DEVICE_SAMPLE_RATE = 10000.0  # 펌웨어 샘플링 주파수 (30000 샘플 / 3초)
+# 펌웨어 채널 라벨 -> IEPE 툴 채널 (CH0 = Vibration, CH1~CH3 = Current R/S/T)
+DEVICE_CHANNELS = {"Vibration": "ai0", "Current R": "ai1", "Current S": "ai2", "Current T": "ai3"}
+
+
+def source_key(path):
+    """캐시 키로 쓰는 (경로, 수정 시각). 같은 이름으로 다시 저장된 파일은 다른 키가 됩니다."""
+    return path, os.path.getmtime(path)
+
+
+def effective_sample_rate(t, sample_rate):
+    """파일의 샘플링 주파수. 없으면 시간 열 간격으로 추정하고, 그것도 없으면 None."""
+    if sample_rate is not None:
+        return float(sample_rate)
+    if t is not None and len(t) >= 2:
+        return float(1 / (t[1] - t[0]))
+    return None
+
+
+def load_capture(path, dtype=None):
+    """
+    측정 파일 -> (t, {채널: 값}, sample_rate). 확장자/첫 줄로 형식을 판별합니다.
+    - .npz: ShotWriter 저장 형식
+    - FTP_Send(ESP32) CSV: 4줄 텍스트 헤더 + 줄당 ADC 코드 1개
+    - IEPE CSV: Time(s), aiN (g) ..., [Sampling Rate (Hz)]
+    dtype 을 주면 채널 값을 그 dtype 으로 변환합니다 (시간 축은 정밀도를 위해 float64 유지).
+    """
+    if path.lower().endswith(".npz"):
+        t, data, sample_rate = load_shot_npz(path)
+    else:
+        with open(path, 'rb') as f:
+            first = f.read(len(DEVICE_HEADER_PREFIX))
+        if first == DEVICE_HEADER_PREFIX:
+            t, data, sample_rate = load_device_csv(path)
+        else:
+            t, data, sample_rate = load_iepe_csv(path, dtype)
+    if dtype is not None:
+        data = {ch: values.astype(dtype, copy=False) for ch, values in data.items()}
+    return t, data, sample_rate
+
+
+def load_iepe_csv(path, dtype=None):
+    """
+    IEPE CSV 를 열 이름으로 dtype 추론 없이 float64 로 한 번에 파싱합니다.
+    샘플링 주파수는 첫 행에서만 읽고, 나머지 행의 Sampling Rate 열(중복 또는 빈 칸)은 읽지 않습니다.
+    dtype 을 주면 채널 열을 연속 배열로 꺼낼 때 바로 변환합니다 (float64 채널 복사본을 따로 만들지 않음).
+    """
+    with open(path, 'r', newline='') as f:
+        columns = [c.strip() for c in f.readline().split(",")]
+        if not columns or columns[0] != TIME_COLUMN or len(columns) < 2:
+            raise ValueError("CSV에 Time(s) 열과 하나 이상의 데이터 열이 필요합니다.")
+        rate_index = columns.index(SAMPLE_RATE_COLUMN) if SAMPLE_RATE_COLUMN in columns else None
+        usecols = [i for i in range(len(columns)) if i != rate_index]
+        columns = [columns[i] for i in usecols]
+        if len(columns) < 2:
+            raise ValueError("CSV에 Time(s) 열과 하나 이상의 데이터 열이 필요합니다.")
+
+        first_row = f.readline()
+        if not first_row.strip():
+            raise ValueError("CSV에 데이터 행이 없습니다.")
+        fields = first_row.rstrip("\r\n").split(",")
+        sample_rate = None
+        if rate_index is not None and rate_index < len(fields) and fields[rate_index].strip():
+            sample_rate = float(fields[rate_index])
+        body = np.loadtxt(f, delimiter=",", dtype=np.float64, usecols=usecols, ndmin=2)
+
+    table = np.empty((len(body) + 1, len(columns)), dtype=np.float64)
+    table[0] = [float(fields[i]) for i in usecols]
+    table[1:] = body
+    columns_data = table.T  # 열별 뷰 (채널 x 샘플)
+    data = {}
+    for name, values in zip(columns[1:], columns_data[1:]):
+        data[name.replace(" (g)", "").strip()] = np.ascontiguousarray(values, dtype=dtype)
+    return np.ascontiguousarray(columns_data[0]), data, sample_rate
+
+
+def load_device_csv(path, sample_rate=DEVICE_SAMPLE_RATE):
+    """
+    FTP_Send(ESP32) CSV: FTP 서버와 같은 파서(device_csv)로 본문을 uint16 으로 한 번에 파싱한 뒤 float32 로 변환합니다.
+    값은 ADC 코드 그대로이며 채널은 헤더의 라벨(Vibration, Current R/S/T)로 정합니다.
+    """
+    header, codes = read_device_csv(path)
+    channel = DEVICE_CHANNELS.get(header["label"], CHANNEL_NAMES[0])
+    values = codes.astype(np.float32)  # 통계(제곱 등)에서 uint16 오버플로 방지
+    return time_axis(len(values), float(sample_rate)), {channel: values}, float(sample_rate)
@@ -0,0 +1,139 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy.fft import rfft, rfftfreq
+
+from filters import lowpass_within_budget
+from peaks import find_peaks
+
+CHANNEL_NAMES = ["ai0", "ai1", "ai2", "ai3"]
+CURRENT_CHANNEL = "ai3"  # 4-20mA 전류 채널 (CAL_RESISTOR 로 환산)
+CAL_RESISTOR = 230.9
+TOP_PEAK_COUNT = 10
+PROCESSING_DTYPES = {"float64": np.float64, "float32": np.float32}
+DEFAULT_PROCESSING_DTYPE = "float64"
+DEFAULT_MEMORY_BUDGET_MB = 256  # 측정 한 번 처리의 작업 메모리 상한 (넘으면 구간/채널별 처리)
+SPECTRUM_WORK_BYTES = 2 * 8  # rfft 의 샘플당 작업 메모리 (복소 결과, float64 기준)
+STATS_CHUNK = 1 << 16  # 제곱합을 float64 로 누적하는 구간 길이
+
+
+@lru_cache(maxsize=8)
+def frequency_axis(n_samples, sample_rate):
+    freqs = rfftfreq(n_samples, 1 / sample_rate)
+    freqs.flags.writeable = False  # 캐시 공유 배열
+    return freqs
+
+
+@lru_cache(maxsize=8)
+def time_axis(n_samples, sample_rate):
+    t = np.arange(n_samples) / sample_rate
+    t.flags.writeable = False
+    return t
+
+
+class ShotResult:
+    """
+    한 번의 측정(모든 채널)을 처리한 결과. values / amplitude 는 (채널 x 샘플) 2차원 배열이며
+    채널별 값은 그 행(뷰)입니다. 그래프, 통계, 피크 검출이 같은 스펙트럼을 공유합니다.
+    """
+    __slots__ = ("channels", "sample_rate", "t", "values", "freqs", "amplitude")
+
+    def __init__(self, channels, sample_rate, t, values, freqs, amplitude):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.t = t
+        self.values = values
+        self.freqs = freqs
+        self.amplitude = amplitude
+
+    def as_dict(self):
+        return dict(zip(self.channels, self.values))
+
+    def spectrum(self, channel):
+        return self.amplitude[self.channels.index(channel)]
+
+    def peaks(self, count=TOP_PEAK_COUNT):
+        """전 채널 상위 피크 (주파수, 진폭), 각각 (채널 x count). peaks.find_peaks 참고."""
+        return find_peaks(self.amplitude, self.freqs, count)
+
+    def top_frequencies(self, channel, count=TOP_PEAK_COUNT):
+        peak_freqs, _ = find_peaks(self.spectrum(channel), self.freqs, count)
+        return peak_freqs
+
+
+def channel_scaling(channels, sensitivity, ai3_scale):
+    """
+    채널별 환산을 value = raw * gain + offset 형태의 벡터로 반환합니다.
+    진동 채널: 1 / 감도 (평균 제거 대상), 전류 채널: CAL_RESISTOR 와 ai3_scale 환산.
+    """
+    gain = np.empty(len(channels))
+    offset = np.zeros(len(channels))
+    remove_mean = np.ones(len(channels), dtype=bool)
+    for i, ch in enumerate(channels):
+        if ch == CURRENT_CHANNEL:
+            gain[i] = 1000.0 / CAL_RESISTOR / ai3_scale["gain"] * ai3_scale["range"]
+            offset[i] = -ai3_scale["offset"] / ai3_scale["gain"] * ai3_scale["range"]
+            remove_mean[i] = False
+        else:
+            gain[i] = 1.0 / sensitivity.get(ch, 1.0)
+    return gain, offset, remove_mean
+
+
+def signal_statistics(values, chunk=STATS_CHUNK):
+    """
+    (min, max, rms). 제곱 배열(values ** 2)을 만들지 않고 구간별 np.dot 으로 제곱합을 구해
+    float64 로 누적합니다 (float32 값도 긴 캡처에서 누적 오차가 커지지 않음).
+    """
+    if len(values) == 0:
+        return np.nan, np.nan, np.nan
+    sum_squares = 0.0
+    for start in range(0, len(values), chunk):
+        part = values[start:start + chunk]
+        sum_squares += float(np.dot(part, part))
+    return float(np.min(values)), float(np.max(values)), np.sqrt(sum_squares / len(values))
+
+
+def rfft_amplitude(values, memory_budget=None):
+    """|rfft| / n (채널 x bins). 복소 중간 배열이 memory_budget 을 넘으면 채널별로 변환합니다."""
+    n_samples = values.shape[-1]
+    if memory_budget is None or values.size * SPECTRUM_WORK_BYTES <= memory_budget:
+        amplitude = np.abs(rfft(values, axis=-1))
+    else:
+        amplitude = np.empty((values.shape[0], n_samples // 2 + 1), dtype=values.dtype)
+        for i, row in enumerate(values):
+            np.abs(rfft(row), out=amplitude[i])
+    amplitude /= n_samples
+    return amplitude
+
+
+def process_shot(data, sample_rate, cutoff, sensitivity, ai3_scale, prefiltered=False, spectrum=None,
+                 spectrum_buffer=None, dtype=np.float64, memory_budget=None):
+    """
+    data (채널 x 샘플) 전체를 한 번에 필터링(axis=-1), 환산(브로드캐스트), rfft(2차원) 합니다.
+    spectrum(SpectrumEngine) 을 주면 단일 rfft 대신 윈도우/Welch 평균 스펙트럼을 사용하며,
+    spectrum_buffer(RingBuffer, 환산 전 값) 를 함께 주면 이 블록 대신 버퍼에 새로 들어온 세그먼트만 평균에 반영합니다.
+    dtype(float64/float32) 배열 하나에 필터링 결과를 받고 환산/평균 제거는 그 배열에서 바로 수행하며,
+    작업 메모리가 memory_budget(바이트) 를 넘으면 필터링은 시간 구간별, rfft 는 채널별로 나눠 처리합니다.
+    """
+    n_channels, n_samples = data.shape
+    channels = CHANNEL_NAMES[:n_channels]
+    if prefiltered:
+        values = np.array(data, dtype=dtype)
+    else:
+        values = lowpass_within_budget(data, cutoff, sample_rate, memory_budget, dtype)
+    gain, offset, remove_mean = channel_scaling(channels, sensitivity, ai3_scale)
+    values *= gain[:, None]
+    values += offset[:, None]
+    for i in np.flatnonzero(remove_mean):
+        row = values[i]
+        np.subtract(row, row.mean(dtype=np.float64), out=row)
+
+    t = time_axis(n_samples, float(sample_rate))
+    if spectrum is not None:
+        amplitude = spectrum.update_from(spectrum_buffer, gain, memory_budget) if spectrum_buffer is not None else None
+        if amplitude is None:
+            amplitude = spectrum.add_block(values, memory_budget=memory_budget)
+        return ShotResult(channels, sample_rate, t, values, spectrum.freqs, amplitude)
+
+    amplitude = rfft_amplitude(values, memory_budget)
+    return ShotResult(channels, sample_rate, t, values, frequency_axis(n_samples, float(sample_rate)), amplitude)
@@ -0,0 +1,61 @@
+import threading
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    채널 x capacity 크기의 고정 링 버퍼. 모든 샘플을 두 번(미러) 기록하므로
+    어떤 구간이든 복사 없이 연속된 읽기 전용 뷰로 꺼낼 수 있습니다.
+
+    샘플 위치는 시작 이후의 절대 인덱스(0, 1, 2, ...)로 표현합니다.
+    뷰는 이후 capacity 개 샘플이 더 기록되면 덮어써지므로, 오래 보관할 데이터는 복사해야 합니다.
+    """
+    def __init__(self, channels, capacity, dtype=np.float64):
+        self.channels = int(channels)
+        self.capacity = int(capacity)
+        self._data = np.zeros((self.channels, 2 * self.capacity), dtype=dtype)
+        self._lock = threading.Lock()
+        self.total_written = 0  # 지금까지 기록된 샘플 수 (= 다음 샘플의 절대 인덱스)
+
+    @property
+    def available(self):
+        return min(self.total_written, self.capacity)
+
+    @property
+    def oldest(self):
+        """아직 덮어써지지 않은 가장 오래된 샘플의 절대 인덱스."""
+        return max(0, self.total_written - self.capacity)
+
+    def write(self, block):
+        """block (channels x k) 을 버퍼에 복사합니다. 할당 없음."""
+        k = block.shape[1]
+        if k > self.capacity:
+            block = block[:, -self.capacity:]
+            skipped = k - self.capacity
+            k = self.capacity
+        else:
+            skipped = 0
+        with self._lock:
+            start = (self.total_written + skipped) % self.capacity
+            first = min(k, self.capacity - start)
+            for src, dst in ((block[:, :first], start), (block[:, first:], 0)):
+                n = src.shape[1]
+                if n:
+                    self._data[:, dst:dst + n] = src
+                    self._data[:, dst + self.capacity:dst + self.capacity + n] = src
+            self.total_written += skipped + k
+
+    def read(self, start, n_samples):
+        """절대 인덱스 start 부터 n_samples 개 구간의 읽기 전용 뷰. 범위를 벗어나면 None."""
+        with self._lock:
+            if n_samples > self.capacity or start < self.oldest or start + n_samples > self.total_written:
+                return None
+            offset = start % self.capacity
+            view = self._data[:, offset:offset + n_samples]
+        view.flags.writeable = False
+        return view
+
+    def latest(self, n_samples):
+        """가장 최근 n_samples 개 구간의 읽기 전용 뷰. 아직 모이지 않았으면 None."""
+        return self.read(self.total_written - n_samples, n_samples)
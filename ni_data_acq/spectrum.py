@@ -0,0 +1,185 @@
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft, rfftfreq
+from scipy.signal import ZoomFFT, get_window
+
+WINDOWS = ("hann", "flattop", "boxcar")
+AVERAGING_MODES = ("exponential", "linear")
+DEFAULT_WINDOW = "hann"
+DEFAULT_SEGMENT = 4096
+DEFAULT_OVERLAP = 0.5
+DEFAULT_AVERAGING = "exponential"
+DEFAULT_AVERAGE_DEPTH = 16  # 지수 평균의 유효 세그먼트 수 (alpha = 1 / depth)
+WINDOW_CACHE_SIZE = 16
+SEGMENT_WORK_BYTES = 4 * 8  # 세그먼트 샘플당 작업 메모리 (프레임, 복소 스펙트럼, 파워)
+
+
+@lru_cache(maxsize=WINDOW_CACHE_SIZE)
+def window_coefficients(name, n):
+    """주기(periodic) 윈도우 계수와 진폭 정규화 계수(1 / sum(w)). 캐시 공유 배열 - 수정 금지."""
+    w = get_window(name, n, fftbins=True)
+    w.flags.writeable = False
+    return w, 1.0 / w.sum()
+
+
+@lru_cache(maxsize=WINDOW_CACHE_SIZE)
+def zoom_transform(n, f_lo, f_hi, points, fs):
+    return ZoomFFT(n, (f_lo, f_hi), points, fs=fs, endpoint=True)
+
+
+def segment_view(values, segment, hop):
+    """values (channels x n) -> 복사 없는 세그먼트 뷰 (channels x segments x segment)."""
+    return sliding_window_view(values, segment, axis=-1)[..., ::hop, :]
+
+
+class SpectrumAverager:
+    """
+    세그먼트 파워 스펙트럼의 평균. 세그먼트 하나가 평균 한 단위입니다.
+    linear: reset 이후 모든 세그먼트의 산술 평균, exponential: alpha = 1 / depth 인 지수 평균.
+    측정마다 스펙트럼을 저장하지 않고 누적 배열 하나만 유지합니다.
+    """
+    def __init__(self, mode=DEFAULT_AVERAGING, depth=DEFAULT_AVERAGE_DEPTH):
+        if mode not in AVERAGING_MODES:
+            raise ValueError(f"averaging 은 {AVERAGING_MODES} 중 하나여야 합니다: {mode}")
+        self.mode = mode
+        self.depth = max(1, int(depth))
+        self.power = None  # (channels x bins)
+        self.count = 0
+
+    def reset(self):
+        self.power = None
+        self.count = 0
+
+    def add(self, segment_power):
+        """segment_power (channels x segments x bins) 를 시간 순서대로 반영합니다."""
+        k = segment_power.shape[1]
+        if k == 0:
+            return
+        if self.power is not None and self.power.shape != segment_power[:, 0].shape:
+            self.reset()
+        if self.mode == "linear":
+            total = segment_power.sum(axis=1)
+            if self.power is None:
+                self.power = total / k
+            else:
+                self.power *= self.count / (self.count + k)
+                self.power += total / (self.count + k)
+        else:
+            alpha = 1.0 / self.depth
+            if self.power is None:
+                # 첫 세그먼트로 시작 (0 에서 시작하면 초기 진폭이 작게 보임)
+                self.power = segment_power[:, 0].copy()
+                self.count = 1
+                segment_power = segment_power[:, 1:]
+                k -= 1
+            # 세그먼트 j 의 가중치 alpha * (1 - alpha)^(k-1-j) 를 한 번에 적용
+            weights = alpha * (1.0 - alpha) ** np.arange(k - 1, -1, -1)
+            self.power *= (1.0 - alpha) ** k
+            self.power += np.tensordot(segment_power, weights, axes=([1], [0]))
+        self.count += k
+
+    @property
+    def amplitude(self):
+        return None if self.power is None else np.sqrt(self.power)
+
+
+class SpectrumEngine:
+    """
+    윈도우(캐시) + 중첩 세그먼트(Welch) 스펙트럼을 계산해 SpectrumAverager 로 측정 간 평균합니다.
+    진폭 스케일은 기존 단일 rfft 표시와 같은 |X| / sum(w) (boxcar, 세그먼트 = 블록 길이이면 동일).
+    band=(f_lo, f_hi, points) 를 주면 rfft 대신 해당 대역만 ZoomFFT 로 세밀하게 계산합니다.
+
+    add_block(): 측정 한 번(블록)의 세그먼트를 평균에 반영.
+    update_from(): RingBuffer 를 따라가며 지난 호출 이후 완성된 세그먼트만 처리 (연속 측정).
+    """
+    def __init__(self, sample_rate, segment=DEFAULT_SEGMENT, overlap=DEFAULT_OVERLAP, window=DEFAULT_WINDOW,
+                 averaging=DEFAULT_AVERAGING, depth=DEFAULT_AVERAGE_DEPTH, band=None):
+        if window not in WINDOWS:
+            raise ValueError(f"window 는 {WINDOWS} 중 하나여야 합니다: {window}")
+        if not 0.0 <= overlap < 1.0:
+            raise ValueError(f"overlap 은 0 이상 1 미만이어야 합니다: {overlap}")
+        self.sample_rate = float(sample_rate)
+        self.segment = int(segment)
+        self.hop = max(1, int(round(self.segment * (1.0 - overlap))))
+        self.window = window
+        self.band = tuple(band) if band else None
+        self.averager = SpectrumAverager(averaging, depth)
+        self.position = None  # update_from() 이 다음에 처리할 원본 샘플의 절대 인덱스
+        self._source = None
+        if self.band:
+            f_lo, f_hi, points = self.band
+            self.freqs = np.linspace(f_lo, f_hi, int(points))
+        else:
+            self.freqs = rfftfreq(self.segment, 1 / self.sample_rate)
+
+    @property
+    def amplitude(self):
+        return self.averager.amplitude
+
+    def matches(self, sample_rate, segment, overlap, window, averaging, depth, band):
+        return (self.sample_rate, self.segment, self.hop, self.window, self.averager.mode, self.averager.depth,
+                self.band) == (float(sample_rate), int(segment), max(1, int(round(int(segment) * (1.0 - overlap)))),
+                               window, averaging, max(1, int(depth)), tuple(band) if band else None)
+
+    def reset(self):
+        self.averager.reset()
+        self.position = None
+        self._source = None
+
+    def segment_power(self, segments):
+        """segments (channels x k x segment) -> 세그먼트별 파워 (channels x k x bins)."""
+        w, norm = window_coefficients(self.window, self.segment)
+        frames = segments - segments.mean(axis=-1, keepdims=True)  # 세그먼트별 DC 제거 (detrend='constant')
+        frames *= w
+        if self.band:
+            f_lo, f_hi, points = self.band
+            spec = zoom_transform(self.segment, float(f_lo), float(f_hi), int(points), self.sample_rate)(frames, axis=-1)
+        else:
+            spec = rfft(frames, axis=-1)
+        power = spec.real ** 2
+        power += spec.imag ** 2
+        power *= norm * norm
+        return power
+
+    def add_block(self, values, gain=None, memory_budget=None):
+        """
+        values (channels x n) 의 중첩 세그먼트를 평균에 반영하고 현재 평균 진폭 (channels x bins) 을 반환.
+        """
+        if values.shape[-1] < self.segment:
+            raise ValueError(f"블록 길이({values.shape[-1]})가 세그먼트 길이({self.segment})보다 짧습니다.")
+        self._add_segments(segment_view(values, self.segment, self.hop), gain, memory_budget)
+        return self.amplitude
+
+    def update_from(self, buffer, gain=None, memory_budget=None):
+        """RingBuffer 에 새로 완성된 세그먼트만 평균에 반영합니다. 처리가 밀려 덮어써진 구간은 건너뜁니다."""
+        if buffer is not self._source:
+            self._source = buffer
+            self.position = None
+        if self.position is None or self.position < buffer.oldest:
+            self.position = buffer.oldest
+        available = buffer.total_written - self.position
+        if available < self.segment:
+            return self.amplitude
+        n_segments = (available - self.segment) // self.hop + 1
+        span = (n_segments - 1) * self.hop + self.segment
+        data = buffer.read(self.position, span)
+        if data is not None:
+            self._add_segments(segment_view(data, self.segment, self.hop), gain, memory_budget)
+            self.position += n_segments * self.hop
+        return self.amplitude
+
+    def _add_segments(self, segments, gain, memory_budget=None):
+        # 세그먼트 프레임/복소 스펙트럼이 memory_budget 을 넘지 않도록 시간 순서대로 나눠 평균에 반영
+        n_segments = segments.shape[1]
+        batch = n_segments
+        if memory_budget is not None:
+            per_segment = segments.shape[0] * self.segment * SEGMENT_WORK_BYTES
+            batch = max(1, int(memory_budget) // per_segment)
+        for start in range(0, n_segments, batch):
+            power = self.segment_power(segments[:, start:start + batch])
+            if gain is not None:
+                # 환산 계수 (value = raw * gain + offset): offset 은 DC 제거로 사라지므로 파워에 gain^2 만 곱함
+                power *= (np.asarray(gain, dtype=np.float64) ** 2)[:, None, None]
+            self.averager.add(power)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# IEPE 툴 모듈은 패키지가 아니라 ni_data_acq 폴더에서 스크립트로 실행되므로 같은 방식으로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
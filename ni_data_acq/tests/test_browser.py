@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")  # browser -> loaders -> writer
+
+import browser  # noqa: E402
+from browser import CapturePrefetcher, list_captures  # noqa: E402
+from trace_cache import TraceCache  # noqa: E402
+
+FS = 1000.0
+
+
+def _save(directory, name, n=2000):
+    values = np.random.default_rng(len(name)).standard_normal((2, n))
+    np.savez(os.path.join(directory, name), values=values, channels=np.array(["ai0", "ai1"]),
+             sample_rate=np.float64(FS), timestamp=np.array("2025-01-01T12:00:00"))
+
+
+def test_list_captures_sorts_by_time_and_prefers_npz(tmp_path):
+    _save(tmp_path, "iepe_20250101_120500.npz")
+    _save(tmp_path, "iepe_20250101_120000.npz")
+    (tmp_path / "iepe_20250101_120500.csv").write_text("Time(s),ai0 (g)\n0,1\n")
+    (tmp_path / "iepe_20250101_121000.csv").write_text("Time(s),ai0 (g)\n0,1\n")
+    (tmp_path / "notes.txt").write_text("")
+    names = [entry.name for entry in list_captures(str(tmp_path))]
+    assert names == ["iepe_20250101_120000.npz", "iepe_20250101_120500.npz", "iepe_20250101_121000.csv"]
+
+
+def test_cutoff_change_reuses_the_loaded_file(tmp_path, monkeypatch):
+    _save(tmp_path, "iepe_20250101_120000.npz")
+    path = str(tmp_path / "iepe_20250101_120000.npz")
+    loads = []
+    load_capture = browser.load_capture
+    monkeypatch.setattr(browser, "load_capture", lambda *args: loads.append(args) or load_capture(*args))
+
+    cache = TraceCache()
+    prefetcher = CapturePrefetcher(cache)
+    try:
+        first = prefetcher.request(path, 100.0).result(5)
+        assert prefetcher.request(path, 100.0).result(5) is first
+        second = prefetcher.request(path, 200.0).result(5)
+        assert second is first and len(loads) == 1
+        # 원본 + cutoff 2개, 채널 2개
+        assert len(cache) == 6
+    finally:
+        prefetcher.shutdown()
+
+
+def test_old_requests_are_evicted(tmp_path):
+    for i in range(4):
+        _save(tmp_path, f"iepe_20250101_12000{i}.npz")
+    prefetcher = CapturePrefetcher(TraceCache(), cache_size=2)
+    try:
+        paths = [entry.path for entry in list_captures(str(tmp_path))]
+        prefetcher.prefetch(paths, 100.0)
+        assert len(prefetcher._futures) == 2
+        assert list(prefetcher._futures) == [(paths[2], 100.0), (paths[3], 100.0)]
+    finally:
+        prefetcher.shutdown()
@@ -0,0 +1,67 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import filters
+from filters import lowpass_within_budget, filter_chunk_length, filter_margin
+
+FS = 51200.0
+CUTOFF = 1000.0
+MB = 2**20
+
+
+@pytest.fixture
+def data():
+    return np.random.default_rng(0).standard_normal((4, 200_000))
+
+
+def _peak(func, *args):
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_chunked_result_matches_one_pass(data, dtype):
+    reference = lowpass_within_budget(data, CUTOFF, FS)
+    result = lowpass_within_budget(data, CUTOFF, FS, 8 * MB, dtype)
+    assert result.dtype == dtype
+    np.testing.assert_allclose(result, reference, atol=1e-5 if dtype == np.float32 else 1e-10)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_peak_memory_stays_within_budget(data, dtype):
+    budget = 8 * MB
+    assert filter_chunk_length(data, CUTOFF, FS, budget, dtype) is not None
+    _, peak = _peak(lowpass_within_budget, data, CUTOFF, FS, budget, dtype)
+    assert peak <= budget
+
+
+def test_float32_single_pass_counts_the_float64_temporary(data):
+    # float64 작업 배열만으로는 예산 안이지만 float32 결과 배열까지 더하면 넘는 경우
+    budget = data.size * filters.FILTER_WORK_BYTES + data.size * 2
+    assert filter_chunk_length(data, CUTOFF, FS, budget, np.float64) is None
+    assert filter_chunk_length(data, CUTOFF, FS, budget, np.float32) is not None
+
+
+def test_small_budget_uses_minimum_chunk_and_warns_once(data, capsys, monkeypatch):
+    monkeypatch.setattr(filters, "_budget_warnings", set())
+    budget = MB // 4
+    margin = filter_margin(CUTOFF, FS)
+    assert filter_chunk_length(data, CUTOFF, FS, budget) == margin
+    assert filter_chunk_length(data, CUTOFF, FS, budget) == margin
+    assert capsys.readouterr().out.count("[Filter Warning]") == 1
+
+    result, peak = _peak(lowpass_within_budget, data, CUTOFF, FS, budget)
+    minimum = data.nbytes + data.shape[0] * 3 * margin * filters.FILTER_WORK_BYTES
+    assert peak <= 1.1 * minimum  # 경고에 표시한 최소 작업 메모리 (근사값)
+    np.testing.assert_allclose(result, lowpass_within_budget(data, CUTOFF, FS), atol=1e-10)
+
+
+def test_no_budget_filters_in_one_pass(data):
+    assert filter_chunk_length(data, CUTOFF, FS, None) is None
+    assert filter_chunk_length(data, CUTOFF, FS, 1024 * MB) is None
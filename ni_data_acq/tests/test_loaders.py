@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from device_csv import read_device_csv
+
+DEVICE_CSV = (b"Location : Plant A\r\nPosition : Main FAN\r\nDate & Time : 20250101_120000\r\n"
+              b"Current S\r\n" + b"".join(b"%d\r\n" % v for v in range(100)))
+
+
+@pytest.fixture
+def loaders():
+    pytest.importorskip("matplotlib")  # loaders -> writer 가 PNG 저장에 matplotlib 사용
+    import loaders
+    return loaders
+
+
+def test_device_csv_parser_is_shared_with_the_server(tmp_path):
+    path = tmp_path / "[Main FAN]_CH2_20250101_120000.csv"
+    path.write_bytes(DEVICE_CSV)
+    header, codes = read_device_csv(str(path))
+    assert header["label"] == "Current S"
+    np.testing.assert_array_equal(codes, np.arange(100))
+
+
+def test_load_device_csv(tmp_path, loaders):
+    path = tmp_path / "[Main FAN]_CH2_20250101_120000.csv"
+    path.write_bytes(DEVICE_CSV)
+    t, data, sample_rate = loaders.load_capture(str(path))
+    assert sample_rate == loaders.DEVICE_SAMPLE_RATE
+    assert list(data) == ["ai2"]
+    assert data["ai2"].dtype == np.float32
+    np.testing.assert_array_equal(data["ai2"], np.arange(100))
+    assert len(t) == 100 and t[1] == pytest.approx(1 / sample_rate)
+
+
+@pytest.mark.parametrize("rate_on_every_row", [False, True])
+def test_load_iepe_csv(tmp_path, loaders, rate_on_every_row):
+    rows = ["Time(s),ai0 (g),ai1 (g),Sampling Rate (Hz)", "0.0,1.0,2.0,1000"]
+    rows += [f"{i / 1000},{i},{-i},{1000 if rate_on_every_row else ''}" for i in range(1, 5)]
+    path = tmp_path / "shot.csv"
+    path.write_text("\n".join(rows) + "\n")
+
+    t, data, sample_rate = loaders.load_capture(str(path), dtype=np.float32)
+    assert sample_rate == 1000.0
+    np.testing.assert_allclose(t, np.arange(5) / 1000)
+    np.testing.assert_array_equal(data["ai0"], [1, 1, 2, 3, 4])
+    np.testing.assert_array_equal(data["ai1"], [2, -1, -2, -3, -4])
+    assert data["ai0"].dtype == np.float32
+
+
+def test_effective_sample_rate(loaders):
+    assert loaders.effective_sample_rate(None, 500) == 500.0
+    assert loaders.effective_sample_rate(np.array([0.0, 0.002]), None) == pytest.approx(500.0)
+    assert loaders.effective_sample_rate(None, None) is None
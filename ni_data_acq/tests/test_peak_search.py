@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from peaks import find_peaks
+
+
+def test_shot_peaks_per_channel():
+    fs, n = 51200.0, 8192
+    t = np.arange(n) / fs
+    signals = np.vstack([np.sin(2 * np.pi * 1000.3 * t), np.sin(2 * np.pi * 4321.9 * t) + 0.1])
+    spectrum = np.abs(np.fft.rfft(signals * np.hanning(n), axis=-1))
+    freqs = np.fft.rfftfreq(n, 1 / fs)
+
+    peak_freqs, peak_amps = find_peaks(spectrum, freqs, 5)
+    assert peak_freqs.shape == (2, 5)
+    assert peak_freqs[0, 0] == pytest.approx(1000.3, abs=1.0)
+    assert peak_freqs[1, 0] == pytest.approx(4321.9, abs=1.0)
+    assert np.all(np.diff(peak_amps, axis=-1) <= 0)
+
+
+def test_missing_peaks_are_nan():
+    spectrum = np.array([0.0, 3.0, 0.0, 0.0, 0.0])
+    peak_freqs, peak_amps = find_peaks(spectrum, np.linspace(0, 40, 5), 2)
+    assert peak_freqs[0] == pytest.approx(10.0)
+    assert peak_amps[0] == pytest.approx(3.0)
+    assert np.isnan(peak_freqs[1]) and peak_amps[1] == 0
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from ring_buffer import RingBuffer
+
+
+def _block(start, n, channels=2):
+    samples = np.arange(start, start + n, dtype=np.float64)
+    return np.vstack([samples + 1000 * ch for ch in range(channels)])
+
+
+def test_wraparound_keeps_order():
+    ring = RingBuffer(2, 10)
+    for start in range(0, 25, 5):
+        ring.write(_block(start, 5))
+
+    assert ring.total_written == 25
+    assert ring.available == 10
+    assert ring.oldest == 15
+    np.testing.assert_array_equal(ring.latest(10), _block(15, 10))
+    np.testing.assert_array_equal(ring.latest(3), _block(22, 3))
+    # 버퍼 끝을 가로지르는 구간
+    np.testing.assert_array_equal(ring.read(18, 5), _block(18, 5))
+
+
+def test_partial_fill():
+    ring = RingBuffer(2, 10)
+    ring.write(_block(0, 4))
+    assert ring.available == 4
+    assert ring.oldest == 0
+    assert ring.latest(10) is None  # 아직 모이지 않음
+    np.testing.assert_array_equal(ring.latest(4), _block(0, 4))
+
+
+def test_overwritten_and_future_reads_return_none():
+    ring = RingBuffer(2, 10)
+    ring.write(_block(0, 8))
+    ring.write(_block(8, 8))
+
+    assert ring.read(5, 3) is None  # 덮어쓴 구간
+    assert ring.read(14, 5) is None  # 아직 기록되지 않은 구간
+    np.testing.assert_array_equal(ring.read(6, 10), _block(6, 10))
+
+
+def test_block_larger_than_capacity_keeps_the_tail():
+    ring = RingBuffer(2, 10)
+    ring.write(_block(0, 3))
+    ring.write(_block(3, 27))
+
+    assert ring.total_written == 30
+    np.testing.assert_array_equal(ring.latest(10), _block(20, 10))
+
+
+def test_views_are_read_only():
+    ring = RingBuffer(1, 8, dtype=np.float32)
+    ring.write(np.ones((1, 4), dtype=np.float32))
+    view = ring.latest(4)
+    assert view.dtype == np.float32
+    with pytest.raises(ValueError):
+        view[0, 0] = 5.0
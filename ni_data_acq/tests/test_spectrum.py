@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from ring_buffer import RingBuffer
+from spectrum import SpectrumAverager, SpectrumEngine, segment_view
+
+FS = 8192.0
+
+
+def _tone(freq, amplitude, n, channels=1):
+    t = np.arange(n) / FS
+    return np.tile(amplitude * np.sin(2 * np.pi * freq * t), (channels, 1))
+
+
+def test_boxcar_over_the_whole_block_matches_the_plain_rfft():
+    values = _tone(256.0, 2.0, 4096) + 0.5
+    engine = SpectrumEngine(FS, segment=4096, window="boxcar", averaging="linear")
+    amplitude = engine.add_block(values)
+    expected = np.abs(np.fft.rfft(values - values.mean(axis=-1, keepdims=True), axis=-1)) / 4096
+    np.testing.assert_allclose(amplitude, expected, atol=1e-12)
+
+
+@pytest.mark.parametrize("window", ["hann", "flattop"])
+def test_tone_amplitude_is_window_independent(window):
+    engine = SpectrumEngine(FS, segment=1024, window=window)
+    amplitude = engine.add_block(_tone(512.0, 2.0, 8192))
+    assert engine.freqs[np.argmax(amplitude[0])] == pytest.approx(512.0)
+    assert amplitude.max() == pytest.approx(1.0, rel=0.01)  # 단측 진폭 = A / 2
+
+
+def test_linear_average_is_the_mean_of_segment_powers():
+    values = np.random.default_rng(0).standard_normal((2, 4096))
+    engine = SpectrumEngine(FS, segment=512, overlap=0.5, averaging="linear")
+    engine.add_block(values[:, :2048])
+    engine.add_block(values[:, 2048:])
+    powers = np.concatenate([engine.segment_power(segment_view(block, 512, 256))
+                             for block in (values[:, :2048], values[:, 2048:])], axis=1)
+    np.testing.assert_allclose(engine.averager.power, powers.mean(axis=1))
+    assert engine.averager.count == powers.shape[1]
+
+
+def test_exponential_average_matches_the_recursive_update():
+    powers = np.random.default_rng(1).random((1, 7, 5))
+    averager = SpectrumAverager("exponential", depth=4)
+    averager.add(powers[:, :3])
+    averager.add(powers[:, 3:])
+    expected = powers[:, 0]
+    for j in range(1, 7):
+        expected = 0.75 * expected + 0.25 * powers[:, j]
+    np.testing.assert_allclose(averager.power, expected)
+
+
+def test_ring_updates_and_memory_budget_match_one_block():
+    values = np.random.default_rng(2).standard_normal((2, 6144))
+    reference = SpectrumEngine(FS, segment=1024).add_block(values)
+
+    ring = RingBuffer(2, 4096)
+    streamed = SpectrumEngine(FS, segment=1024)
+    for start in range(0, 6144, 512):
+        ring.write(values[:, start:start + 512])
+        streamed.update_from(ring, memory_budget=2 * 1024 * 8 * 4)
+    np.testing.assert_allclose(streamed.amplitude, reference)
+
+
+def test_zoom_band():
+    engine = SpectrumEngine(FS, segment=2048, band=(400.0, 600.0, 401))
+    amplitude = engine.add_block(_tone(503.3, 1.0, 8192))
+    assert engine.freqs[np.argmax(amplitude[0])] == pytest.approx(503.3, abs=0.5)
+
+
+def test_short_block_is_rejected():
+    with pytest.raises(ValueError):
+        SpectrumEngine(FS, segment=1024).add_block(np.zeros((1, 100)))
@@ -0,0 +1,57 @@
+import numpy as np
+from scipy.signal import sosfilt, sosfilt_zi
+
+from filters import FilteredRing, StreamingLowpass, butter_lowpass_filter, lowpass_sos
+from ring_buffer import RingBuffer
+
+FS = 10000.0
+CUTOFF = 500.0
+
+
+def _signal(n=5000, channels=2):
+    rng = np.random.default_rng(1)
+    return rng.standard_normal((channels, n)) + np.arange(channels)[:, None]
+
+
+def _one_pass(data):
+    sos = lowpass_sos(CUTOFF, FS)
+    zi = sosfilt_zi(sos)[:, None, :] * data[:, 0][None, :, None]
+    return sosfilt(sos, data, axis=-1, zi=zi)[0]
+
+
+def test_filter_design_is_cached():
+    assert lowpass_sos(CUTOFF, FS) is lowpass_sos(CUTOFF, FS)
+    assert lowpass_sos(CUTOFF, FS) is not lowpass_sos(CUTOFF * 2, FS)
+
+
+def test_streaming_blocks_match_one_pass():
+    data = _signal()
+    lowpass = StreamingLowpass(CUTOFF, FS)
+    blocks = [lowpass.process(data[:, start:start + size])
+              for start, size in zip((0, 7, 1007, 1500, 4999), (7, 1000, 493, 3499, 1))]
+    np.testing.assert_allclose(np.hstack(blocks), _one_pass(data), atol=1e-12)
+
+
+def test_reset_restarts_from_steady_state():
+    lowpass = StreamingLowpass(CUTOFF, FS)
+    constant = np.full((1, 100), 3.0)
+    np.testing.assert_allclose(lowpass.process(constant), constant)
+    lowpass.reset()
+    np.testing.assert_allclose(lowpass.process(-constant), -constant)
+
+
+def test_zero_phase_filter_keeps_channels_apart():
+    data = _signal(channels=3)
+    both = butter_lowpass_filter(data, CUTOFF, FS)
+    np.testing.assert_allclose(both[1], butter_lowpass_filter(data[1], CUTOFF, FS))
+
+
+def test_filtered_ring_follows_the_source():
+    data = _signal(n=3000)
+    source = RingBuffer(2, 1000)
+    filtered = FilteredRing(source, CUTOFF, FS)
+    for start in range(0, 3000, 250):
+        source.write(data[:, start:start + 250])
+        filtered.update()
+    np.testing.assert_allclose(filtered.latest(1000), _one_pass(data)[:, -1000:], atol=1e-12)
+    assert filtered.matches(CUTOFF, FS) and not filtered.matches(CUTOFF + 1, FS)
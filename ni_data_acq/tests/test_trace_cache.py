@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+
+from filters import butter_lowpass_filter
+from trace_cache import TraceCache
+
+FS = 10000.0
+
+
+def _trace(n=4000, seed=0, dtype=np.float64):
+    return np.random.default_rng(seed).standard_normal(n).astype(dtype)
+
+
+def test_entries_are_reused_per_file_channel_and_cutoff():
+    cache = TraceCache()
+    y = _trace()
+    filtered = cache.get("a.csv", "ai0", y, FS, 500.0)
+    assert cache.get("a.csv", "ai0", y, FS, 500.0) is filtered
+    assert cache.get("a.csv", "ai0", y, FS, 800.0) is not filtered
+    assert cache.get("b.csv", "ai0", y, FS, 500.0) is not filtered
+    assert len(cache) == 3
+
+    np.testing.assert_allclose(filtered.trace, butter_lowpass_filter(y, 500.0, FS))
+    np.testing.assert_allclose(filtered.spectrum, np.abs(np.fft.rfft(filtered.trace)) / len(y))
+
+
+def test_unfiltered_entries_share_the_caller_array():
+    cache = TraceCache()
+    y = _trace()
+    entry = cache.get("a.csv", "ai0", y, FS)
+    assert entry.trace is y
+    assert entry.nbytes == entry.spectrum.nbytes
+    assert cache.get("a.csv", "ai0", y, None, 500.0).trace is y  # 샘플링 주파수를 모르면 필터링 안 함
+
+
+def test_float32_traces_stay_float32():
+    entry = TraceCache().get("a.csv", "ai0", _trace(dtype=np.float32), FS, 500.0)
+    assert entry.trace.dtype == np.float32 and entry.spectrum.dtype == np.float32
+
+
+def test_least_recently_used_entries_are_evicted():
+    y = _trace()
+    per_entry = TraceCache().get("x", "ai0", y, FS, 500.0).nbytes
+    cache = TraceCache(max_bytes=2 * per_entry)
+    first = cache.get("a", "ai0", y, FS, 500.0)
+    cache.get("b", "ai0", y, FS, 500.0)
+    cache.get("a", "ai0", y, FS, 500.0)  # a 를 최근 사용으로
+    cache.get("c", "ai0", y, FS, 500.0)
+    assert len(cache) == 2 and cache.nbytes <= cache.max_bytes
+    assert cache.get("a", "ai0", y, FS, 500.0) is first
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_peaks_are_computed_once():
+    t = np.arange(4096) / FS
+    entry = TraceCache().get("a", "ai0", np.sin(2 * np.pi * 1000 * t), FS)
+    assert entry.peaks(3) is entry.peaks(3)
+    assert abs(entry.peaks(3)[0][0] - 1000) < 5
+
+
+def test_concurrent_gets_return_one_entry():
+    cache = TraceCache()
+    y = _trace(20000)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("a", "ai0", y, FS, 500.0)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache) == 1 and all(entry is results[0] for entry in results)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from ring_buffer import RingBuffer
+from waterfall import EMPTY_DB, SpectrogramBuffer, StreamingSTFT
+
+FS = 8192.0
+
+
+def test_spectrogram_buffer_keeps_the_latest_rows_in_order():
+    buffer = SpectrogramBuffer(depth=4, bins=3)
+    assert np.all(buffer.snapshot() == EMPTY_DB)
+    buffer.append(np.arange(3.0)[:, None] * np.ones((1, 3)))
+    buffer.append(np.arange(3.0, 6.0)[:, None] * np.ones((1, 3)))
+    snapshot = buffer.snapshot()
+    np.testing.assert_array_equal(snapshot[:, 0], [2, 3, 4, 5])
+    assert buffer.rows_written == 6
+
+    buffer.append(np.arange(10.0, 20.0)[:, None] * np.ones((1, 3)))  # depth 보다 많은 행
+    np.testing.assert_array_equal(buffer.snapshot()[:, 0], [16, 17, 18, 19])
+    buffer.clear()
+    assert buffer.rows_written == 0 and np.all(buffer.snapshot() == EMPTY_DB)
+
+
+def test_rows_follow_a_frequency_step():
+    t = np.arange(8192) / FS
+    values = np.where(t < 0.5, np.sin(2 * np.pi * 1024 * t), np.sin(2 * np.pi * 2048 * t))
+    stft = StreamingSTFT(FS, segment=512, overlap=0.5, depth=64)
+    stft.add_block(values)
+    rows = stft.buffer.snapshot()
+    assert stft.buffer.rows_written == (8192 - 512) // 256 + 1
+    assert stft.freqs[np.argmax(rows[-stft.buffer.rows_written])] == pytest.approx(1024)
+    assert stft.freqs[np.argmax(rows[-1])] == pytest.approx(2048)
+    # 단측 진폭 A / 2 = 0.5 -> 약 -6 dB
+    assert rows[-1].max() == pytest.approx(20 * np.log10(0.5), abs=0.1)
+
+
+def test_ring_updates_match_one_block():
+    values = np.random.default_rng(0).standard_normal((2, 6000))
+    reference = StreamingSTFT(FS, segment=256, depth=100)
+    reference.add_block(values[1], gain=2.0)
+
+    ring = RingBuffer(2, 2048)
+    streamed = StreamingSTFT(FS, segment=256, depth=100)
+    for start in range(0, 6000, 300):
+        ring.write(values[:, start:start + 300])
+        streamed.update_from(ring, 1, gain=2.0)
+    assert streamed.buffer.rows_written == reference.buffer.rows_written
+    np.testing.assert_allclose(streamed.buffer.snapshot(), reference.buffer.snapshot(), atol=1e-3)
@@ -0,0 +1,62 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")  # PNG 저장용
+
+from writer import ShotWriter, load_shot_npz  # noqa: E402
+
+FS = 1000.0
+
+
+def _shot(n=50):
+    values = np.vstack([np.arange(n, dtype=np.float64), -np.arange(n, dtype=np.float64) / 3])
+    return SimpleNamespace(channels=["ai0", "ai1"], values=values, t=np.arange(n) / FS, sample_rate=FS)
+
+
+@pytest.mark.parametrize("save_format", ["npz", "csv"])
+def test_saved_shots_load_back(tmp_path, save_format):
+    from loaders import load_capture
+    writer = ShotWriter(save_format, png_interval=-1)
+    writer.start()
+    shot = _shot()
+    base = str(tmp_path / "iepe_20250101_120000")
+    assert writer.submit(base, shot, datetime(2025, 1, 1, 12))
+    writer.stop()
+    assert writer.written == 1 and writer.last_error is None
+
+    t, data, sample_rate = load_capture(f"{base}.{save_format}")
+    assert sample_rate == FS
+    np.testing.assert_allclose(t, shot.t)
+    np.testing.assert_allclose(data["ai0"], shot.values[0])
+    np.testing.assert_allclose(data["ai1"], shot.values[1])
+
+
+def test_npz_metadata(tmp_path):
+    writer = ShotWriter("npz", png_interval=-1)
+    writer.start()
+    writer.submit(str(tmp_path / "shot"), _shot(), datetime(2025, 1, 1, 12))
+    writer.stop()
+    with np.load(tmp_path / "shot.npz") as f:
+        assert str(f["timestamp"]) == "2025-01-01T12:00:00"
+    assert list(load_shot_npz(str(tmp_path / "shot.npz"))[1]) == ["ai0", "ai1"]
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    writer = ShotWriter("npz", png_interval=-1, max_queue=2)  # 스레드를 시작하지 않아 큐가 비지 않음
+    results = [writer.submit(str(tmp_path / f"shot{i}"), _shot(), datetime.now()) for i in range(4)]
+    assert results == [True, True, False, False]
+    assert writer.dropped == 2 and writer.pending == 2
+
+
+def test_nothing_to_save_is_not_queued(tmp_path):
+    writer = ShotWriter("none", png_interval=-1, max_queue=1)
+    assert all(writer.submit(str(tmp_path / "shot"), _shot(), datetime.now()) for _ in range(3))
+    assert writer.pending == 0
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        ShotWriter("xlsx")
@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy.fft import rfft
+
+from filters import lowpass_within_budget
+from peaks import find_peaks
+from processing import frequency_axis
+
+DEFAULT_TRACE_CACHE_MB = 256
+
+
+class CachedTrace:
+    """채널 하나의 (필터링된) 파형과 스펙트럼. peaks() 는 처음 요청할 때 한 번만 계산합니다."""
+    __slots__ = ("trace", "spectrum", "freqs", "nbytes", "_peaks")
+
+    def __init__(self, trace, spectrum, freqs, nbytes):
+        self.trace = trace
+        self.spectrum = spectrum
+        self.freqs = freqs
+        self.nbytes = nbytes
+        self._peaks = {}
+
+    def peaks(self, count):
+        if count not in self._peaks:
+            self._peaks[count] = find_peaks(self.spectrum, self.freqs, count)
+        return self._peaks[count]
+
+
+class TraceCache:
+    """
+    CSV 모드의 필터링 파형/스펙트럼을 (파일, 채널, 샘플링 주파수, cutoff) 별로 보관하는 LRU 캐시.
+    체크박스/cutoff 를 바꿔도 이미 계산한 조합은 다시 필터링/rfft 하지 않습니다.
+    보관 중인 배열의 합이 max_bytes 를 넘으면 가장 오래 사용하지 않은 항목부터 버립니다.
+    cutoff=None 은 필터링하지 않은 원본 (통계용). 필터링 파형은 원본과 같은 dtype 으로 보관하며,
+    memory_budget(바이트) 을 넘는 긴 파형은 구간별로 필터링합니다.
+    미리 읽기 스레드와 GUI 스레드가 함께 사용하므로 계산은 잠금 밖에서, 조회/추가만 잠금 안에서 합니다.
+    """
+    def __init__(self, max_bytes=DEFAULT_TRACE_CACHE_MB * 1024 * 1024, memory_budget=None):
+        self.max_bytes = int(max_bytes)
+        self.memory_budget = memory_budget
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def get(self, source, channel, y, fs, cutoff=None):
+        """source: 로드한 파일을 구분하는 키 (예: 경로와 수정 시각). fs 가 None 이면 필터링 없이 1 Hz 축 사용."""
+        if fs is None:
+            cutoff = None
+        key = (source, channel, fs, cutoff)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        if cutoff is not None:
+            trace = lowpass_within_budget(y, cutoff, fs, self.memory_budget, y.dtype)
+        else:
+            trace = y
+        spectrum = np.abs(rfft(trace))  # float32 파형이면 complex64 -> float32
+        spectrum /= len(trace)
+        freqs = frequency_axis(len(trace), float(fs) if fs is not None else 1.0)
+        # 원본(y) 은 호출자가 보관하므로 새로 만든 배열만 계산
+        nbytes = spectrum.nbytes + (trace.nbytes if trace is not y else 0)
+        entry = CachedTrace(trace, spectrum, freqs, nbytes)
+        with self._lock:
+            if key in self._entries:  # 다른 스레드가 먼저 계산함
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self._entries[key] = entry
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                _, old = self._entries.popitem(last=False)
+                self.nbytes -= old.nbytes
+        return entry
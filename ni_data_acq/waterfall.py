@@ -0,0 +1,170 @@
+import threading
+
+import numpy as np
+from scipy.fft import rfft, rfftfreq
+
+from spectrum import window_coefficients, segment_view
+
+DEFAULT_WATERFALL_SEGMENT = 1024
+DEFAULT_WATERFALL_OVERLAP = 0.5
+DEFAULT_WATERFALL_DEPTH = 300  # 보관할 STFT 행(세그먼트) 수
+DEFAULT_WATERFALL_WINDOW = "hann"
+DYNAMIC_RANGE_DB = 80.0
+CLIM_STEP_DB = 10.0  # 색 범위 상한은 이 단위로만 바꿈 (매 갱신마다 바뀌지 않도록)
+_DB_FLOOR = 1e-12
+EMPTY_DB = -240.0  # 아직 채워지지 않은 행 (= 20 * log10(_DB_FLOOR))
+
+
+class SpectrogramBuffer:
+    """
+    깊이(depth) x 주파수 bin 크기의 고정 2차원 dB 버퍼. 행을 두 번(미러) 기록하므로
+    오래된 행 -> 최근 행 순서의 연속 구간을 np.roll 이나 재할당 없이 꺼낼 수 있습니다.
+    """
+    def __init__(self, depth, bins):
+        self.depth = int(depth)
+        self.bins = int(bins)
+        self._data = np.full((2 * self.depth, self.bins), EMPTY_DB, dtype=np.float32)
+        self._head = 0  # 다음 행을 기록할 위치
+        self._lock = threading.Lock()
+        self.rows_written = 0
+
+    def append(self, rows_db):
+        """rows_db (k x bins) 를 시간 순서대로 추가합니다."""
+        rows_db = rows_db[-self.depth:]
+        with self._lock:
+            for row in rows_db:
+                self._data[self._head] = row
+                self._data[self._head + self.depth] = row
+                self._head = (self._head + 1) % self.depth
+            self.rows_written += len(rows_db)
+
+    def snapshot(self):
+        """오래된 행 -> 최근 행 순서의 (depth x bins) 복사본 (다른 스레드가 계속 추가해도 안전)."""
+        with self._lock:
+            return self._data[self._head:self._head + self.depth].copy()
+
+    def clear(self):
+        with self._lock:
+            self._data.fill(EMPTY_DB)
+            self._head = 0
+            self.rows_written = 0
+
+
+class StreamingSTFT:
+    """
+    한 채널의 STFT 를 증분 계산해 SpectrogramBuffer 에 행으로 추가합니다.
+    update_from(): RingBuffer 에서 지난 호출 이후 완성된 세그먼트만 처리 (연속 측정).
+    add_block(): 측정 한 번(또는 불러온 파일)의 세그먼트를 추가.
+    """
+    def __init__(self, sample_rate, segment=DEFAULT_WATERFALL_SEGMENT, overlap=DEFAULT_WATERFALL_OVERLAP,
+                 depth=DEFAULT_WATERFALL_DEPTH, window=DEFAULT_WATERFALL_WINDOW):
+        self.sample_rate = float(sample_rate)
+        self.segment = int(segment)
+        self.hop = max(1, int(round(self.segment * (1.0 - overlap))))
+        self.window = window
+        self.freqs = rfftfreq(self.segment, 1 / self.sample_rate)
+        self.buffer = SpectrogramBuffer(depth, len(self.freqs))
+        self.position = None
+        self._source = None
+
+    @property
+    def row_duration(self):
+        return self.hop / self.sample_rate
+
+    def matches(self, sample_rate, segment, overlap, depth, window):
+        return (self.sample_rate, self.segment, self.hop, self.buffer.depth, self.window) == (
+            float(sample_rate), int(segment), max(1, int(round(int(segment) * (1.0 - overlap)))), int(depth), window)
+
+    def reset(self):
+        self.buffer.clear()
+        self.position = None
+        self._source = None
+
+    def add_block(self, values, gain=1.0):
+        """values: 1차원 (한 채널) 배열."""
+        if len(values) >= self.segment:
+            self._append(segment_view(values, self.segment, self.hop), gain)
+
+    def update_from(self, ring, channel_index, gain=1.0):
+        if ring is not self._source:
+            self._source = ring
+            self.position = None
+        if self.position is None or self.position < ring.oldest:
+            self.position = ring.oldest
+        available = ring.total_written - self.position
+        if available < self.segment:
+            return
+        n_segments = (available - self.segment) // self.hop + 1
+        span = (n_segments - 1) * self.hop + self.segment
+        data = ring.read(self.position, span)
+        if data is not None:
+            self._append(segment_view(data[channel_index], self.segment, self.hop), gain)
+            self.position += n_segments * self.hop
+
+    def _append(self, segments, gain):
+        w, norm = window_coefficients(self.window, self.segment)
+        frames = segments - segments.mean(axis=-1, keepdims=True)
+        frames *= w
+        magnitude = np.abs(rfft(frames, axis=-1))
+        magnitude *= norm * abs(gain)
+        self.buffer.append(20.0 * np.log10(np.maximum(magnitude, _DB_FLOOR)))
+
+
+class WaterfallPlot:
+    """
+    StreamingSTFT 버퍼를 imshow 이미지 하나로 표시합니다. 이미지는 한 번만 만들고 set_data 로 내용만 교체하며,
+    축 범위가 바뀔 때만 전체를 다시 그리고 그 외에는 캐시한 배경 위에 이미지만 블리팅합니다.
+    """
+    def __init__(self, figure, canvas):
+        self.figure = figure
+        self.canvas = canvas
+        self.ax = figure.add_subplot(111)
+        self.ax.set_title("Waterfall")
+        self.ax.set_xlabel("Frequency (Hz)")
+        self.ax.set_ylabel("Time (s)")
+        self.image = None
+        self._extent = None
+        self._clim_top = None
+        self._background = None
+        canvas.mpl_connect("draw_event", self._on_draw)
+        canvas.mpl_connect("resize_event", self._on_resize)
+
+    def update(self, stft):
+        rows = stft.buffer.snapshot()
+        extent = (float(stft.freqs[0]), float(stft.freqs[-1]), -stft.buffer.depth * stft.row_duration, 0.0)
+        peak = float(rows.max())
+        top = float(np.ceil(peak / CLIM_STEP_DB) * CLIM_STEP_DB) if peak > EMPTY_DB else 0.0
+        if self.image is None:
+            self.image = self.ax.imshow(rows, origin="lower", aspect="auto", extent=extent, cmap="viridis",
+                                        interpolation="nearest", animated=True)
+            self.image.set_clim(top - DYNAMIC_RANGE_DB, top)
+            self._clim_top = top
+            self._extent = extent
+            self.redraw()
+            return
+
+        self.image.set_data(rows)
+        if top != self._clim_top:
+            self.image.set_clim(top - DYNAMIC_RANGE_DB, top)
+            self._clim_top = top
+        if extent != self._extent:
+            self.image.set_extent(extent)
+            self._extent = extent
+            self.redraw()
+        elif self._background is None:
+            self.redraw()
+        else:
+            self.canvas.restore_region(self._background)
+            self.ax.draw_artist(self.image)
+            self.canvas.blit(self.ax.bbox)
+
+    def redraw(self):
+        self.canvas.draw()
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        if self.image is not None:
+            self.ax.draw_artist(self.image)
+
+    def _on_resize(self, event):
+        self._background = None
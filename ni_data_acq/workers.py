@@ -0,0 +1,190 @@
+import threading
+
+import numpy as np
+import nidaqmx
+from nidaqmx.stream_readers import AnalogMultiChannelReader
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from acquisition import TASK_NAME
+from filters import FilteredRing
+from processing import process_shot, channel_scaling
+
+CALIBRATION_READS = 10
+CALIBRATION_TARGET_RMS = 0.7071  # 1g 진동 캘리브레이터의 이론 RMS
+
+
+class ShotParams:
+    """측정 처리 설정의 스냅샷. GUI 스레드에서 만들어 작업 스레드로 넘깁니다."""
+    __slots__ = ("cutoff", "sensitivity", "ai3_scale", "spectrum", "streaming_filter", "waterfall",
+                 "waterfall_channel", "dtype", "memory_budget")
+
+    def __init__(self, cutoff, sensitivity, ai3_scale, spectrum=None, streaming_filter=False, waterfall=None,
+                 waterfall_channel=0, dtype=np.float64, memory_budget=None):
+        self.cutoff = cutoff
+        self.sensitivity = dict(sensitivity)
+        self.ai3_scale = dict(ai3_scale)
+        self.spectrum = spectrum  # SpectrumEngine: 처리 스레드만 갱신
+        self.streaming_filter = streaming_filter
+        self.waterfall = waterfall  # StreamingSTFT: 처리 스레드만 행을 추가
+        self.waterfall_channel = waterfall_channel
+        self.dtype = dtype  # 처리 결과 배열의 dtype (float64 / float32)
+        self.memory_budget = memory_budget  # 바이트, None 이면 제한 없음
+
+
+class AcquisitionWorker(QObject):
+    """
+    단발 측정과 캘리브레이션의 DAQ 읽기를 전용 QThread 에서 수행합니다. Task 는 이 스레드만 사용합니다.
+    슬롯은 GUI 의 시그널로 큐잉되어 순서대로 실행되며, cancel() 은 진행 중인 캘리브레이션 반복을 중단시킵니다.
+    """
+    blockReady = pyqtSignal(int, object, float)  # run_id, data (channels x samples), sample_rate
+    calibrated = pyqtSignal(str, float)  # channel, sensitivity (V/g)
+    failed = pyqtSignal(str, str)  # 제목, 메시지
+    finished = pyqtSignal()  # read_shot / calibrate 종료 (성공, 실패, 취소 모두)
+
+    def __init__(self):
+        super().__init__()
+        self.task = None
+        self.reader = None
+        self.buffer = None  # 재사용 버퍼: GUI 는 처리 완료 전에는 다음 측정을 요청하지 않음
+        self.calibration_buffer = None  # 캘리브레이션 반복 읽기용 재사용 버퍼 (측정 버퍼와 분리)
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        # GUI 스레드에서 직접 호출 (스레드 안전)
+        self._cancel.set()
+
+    def _load_task(self):
+        if self.task is None:
+            self.task = nidaqmx.system.storage.persisted_task.PersistedTask(TASK_NAME).load()
+            self.reader = AnalogMultiChannelReader(self.task.in_stream)
+        return self.task
+
+    @pyqtSlot(int, bool)
+    def read_shot(self, run_id, keep_open):
+        try:
+            self._read_shot(run_id, keep_open)
+        finally:
+            self.finished.emit()
+
+    def _read_shot(self, run_id, keep_open):
+        self._cancel.clear()
+        try:
+            task = self._load_task()
+            sample_rate = task.timing.samp_clk_rate
+            samples = task.timing.samp_quant_samp_per_chan
+            shape = (task.number_of_channels, samples)
+            if self.buffer is None or self.buffer.shape != shape:
+                self.buffer = np.empty(shape, dtype=np.float64)
+            self.reader.read_many_sample(self.buffer, number_of_samples_per_channel=samples)
+        except nidaqmx.errors.DaqError as e:
+            self.close_task()
+            self.failed.emit("DAQ Task 오류", f"측정 Task 읽기 오류: {e}")
+            return
+        if not keep_open:
+            self.close_task()
+        if not self._cancel.is_set():
+            self.blockReady.emit(run_id, self.buffer, float(sample_rate))
+
+    @pyqtSlot(int, str)
+    def calibrate(self, channel_index, channel_name):
+        try:
+            self._calibrate(channel_index, channel_name)
+        finally:
+            self.finished.emit()
+
+    def _calibrate(self, channel_index, channel_name):
+        self._cancel.clear()
+        self.close_task()
+        rms_values = []
+        try:
+            task = self._load_task()
+            samples = task.timing.samp_quant_samp_per_chan
+            shape = (task.number_of_channels, samples)
+            if self.calibration_buffer is None or self.calibration_buffer.shape != shape:
+                self.calibration_buffer = np.empty(shape, dtype=np.float64)
+            block = self.calibration_buffer
+            for _ in range(CALIBRATION_READS):
+                if self._cancel.is_set():
+                    return
+                # task.read() 의 리스트 변환 없이 스트림 리더가 재사용 버퍼에 바로 기록
+                self.reader.read_many_sample(block, number_of_samples_per_channel=samples)
+                data_ch = block[channel_index] if block.shape[0] > 1 else block[0]
+                data_ch = data_ch - np.mean(data_ch)
+                rms_values.append(np.sqrt(np.mean(data_ch ** 2)))
+        except nidaqmx.errors.DaqError as e:
+            self.failed.emit("DAQ Task 오류", f"캘리브레이션 Task 오류: {e}")
+            return
+        finally:
+            self.close_task()
+        self.calibrated.emit(channel_name, float(np.mean(rms_values) / CALIBRATION_TARGET_RMS))
+
+    @pyqtSlot()
+    def close_task(self):
+        if self.task:
+            try:
+                self.task.control(nidaqmx.constants.TaskMode.TASK_STOP)
+                self.task.close()
+            except nidaqmx.errors.DaqError as e:
+                print(f"[DAQ Error] 측정 Task close 오류 (worker): {e}")
+            self.task = None
+            self.reader = None
+
+
+class ProcessingWorker(QObject):
+    """
+    필터링/환산/FFT(process_shot) 를 전용 QThread 에서 수행하고 완성된 ShotResult 만 GUI 로 보냅니다.
+    연속 측정은 링 버퍼에서 최근 구간을 꺼내는 것(스트리밍 필터 갱신 포함)도 이 스레드에서 합니다.
+    """
+    shotReady = pyqtSignal(int, object)  # run_id, ShotResult (아직 데이터가 모이지 않았으면 None)
+    failed = pyqtSignal(int, str)
+
+    def __init__(self):
+        super().__init__()
+        self.filtered_stream = None  # 연속 측정 + 스트리밍 필터 모드의 필터링된 링 버퍼
+
+    @pyqtSlot(int, object, float, object)
+    def process_block(self, run_id, data, sample_rate, params):
+        try:
+            shot = process_shot(data, sample_rate, params.cutoff, params.sensitivity, params.ai3_scale,
+                                spectrum=params.spectrum, dtype=params.dtype, memory_budget=params.memory_budget)
+            if params.waterfall is not None and params.waterfall_channel < len(shot.values):
+                params.waterfall.add_block(shot.values[params.waterfall_channel])
+        except Exception as e:
+            self.failed.emit(run_id, str(e))
+            return
+        self.shotReady.emit(run_id, shot)
+
+    @pyqtSlot(int, object, object)
+    def process_stream(self, run_id, acquisition, params):
+        try:
+            spectrum_buffer = None
+            if params.streaming_filter:
+                # 지난 표시 이후 새로 들어온 샘플만 채널별 필터 상태를 이어서 필터링
+                stream = self.filtered_stream
+                if (stream is None or stream.source is not acquisition.buffer
+                        or not stream.matches(params.cutoff, acquisition.sample_rate)):
+                    stream = self.filtered_stream = FilteredRing(acquisition.buffer, params.cutoff,
+                                                                 acquisition.sample_rate)
+                stream.update()
+                data = stream.latest(acquisition.samples_per_shot)
+                # 필터링된 링 버퍼에서 새 세그먼트만 평균에 반영 (겹치는 화면 구간 중복 없음)
+                spectrum_buffer = stream.buffer
+            else:
+                self.filtered_stream = None
+                data = acquisition.latest(acquisition.samples_per_shot)
+            if data is None:
+                self.shotReady.emit(run_id, None)  # 아직 한 화면 분량이 모이지 않음
+                return
+            shot = process_shot(data, acquisition.sample_rate, params.cutoff, params.sensitivity, params.ai3_scale,
+                                prefiltered=params.streaming_filter, spectrum=params.spectrum,
+                                spectrum_buffer=spectrum_buffer, dtype=params.dtype,
+                                memory_budget=params.memory_budget)
+            if params.waterfall is not None and params.waterfall_channel < len(shot.values):
+                # 화면 구간이 아니라 링 버퍼의 새 세그먼트만 STFT (영위상 모드는 필터링 전 원본)
+                ring = spectrum_buffer if spectrum_buffer is not None else acquisition.buffer
+                gain, _, _ = channel_scaling(shot.channels, params.sensitivity, params.ai3_scale)
+                params.waterfall.update_from(ring, params.waterfall_channel, gain[params.waterfall_channel])
+        except Exception as e:
+            self.failed.emit(run_id, str(e))
+            return
+        self.shotReady.emit(run_id, shot)
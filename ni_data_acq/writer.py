@@ -0,0 +1,142 @@
+import queue
+import threading
+import time
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+SAVE_FORMATS = ("npz", "csv", "none")
+DEFAULT_SAVE_FORMAT = "npz"
+DEFAULT_PNG_INTERVAL = 0.0  # PNG 저장 최소 간격 (초). 0: 매 측정, 음수: 저장 안 함
+DEFAULT_WRITER_QUEUE_SIZE = 8
+
+_STOP = object()
+
+
+class ShotWriter:
+    """
+    측정 결과(ShotResult)를 백그라운드 스레드에서 저장합니다. 큐가 가득 차면 해당 측정은 저장하지 않고
+    dropped 를 증가시키므로 저장이 측정/화면 갱신을 지연시키지 않습니다.
+    npz: 채널별 배열 + 샘플링 주파수/채널 이름/시작 시각 메타데이터 (압축 없음, 가장 빠름)
+    csv: 기존 형식 (Time(s), <ch> (g) ..., Sampling Rate (Hz) 는 첫 행에만 기록)
+    PNG 는 별도 Figure(Agg)로 그리며 png_interval 로 저장 간격을 제한합니다.
+    """
+    def __init__(self, save_format=DEFAULT_SAVE_FORMAT, png_interval=DEFAULT_PNG_INTERVAL,
+                 max_queue=DEFAULT_WRITER_QUEUE_SIZE):
+        if save_format not in SAVE_FORMATS:
+            raise ValueError(f"save_format 은 {SAVE_FORMATS} 중 하나여야 합니다: {save_format}")
+        self.save_format = save_format
+        self.png_interval = png_interval
+        self.dropped = 0
+        self.written = 0
+        self.last_error = None
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._last_png = None
+        self._figure = None
+        self._thread = None
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="shot-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, base_path, shot, timestamp):
+        """base_path 에 확장자를 붙여 저장합니다. 대기열이 가득 차면 False."""
+        if self.save_format == "none" and not self._png_due():
+            return True
+        try:
+            self._queue.put_nowait((base_path, shot, timestamp))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def stop(self, timeout=10.0):
+        """대기 중인 저장을 마친 뒤 스레드를 종료합니다."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _png_due(self):
+        if self.png_interval < 0:
+            return False
+        return self._last_png is None or time.monotonic() - self._last_png >= self.png_interval
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            base_path, shot, timestamp = item
+            try:
+                if self.save_format == "npz":
+                    save_shot_npz(f"{base_path}.npz", shot, timestamp)
+                elif self.save_format == "csv":
+                    save_shot_csv(f"{base_path}.csv", shot)
+                if self._png_due():
+                    self._last_png = time.monotonic()
+                    self._render_png(f"{base_path}.png", shot)
+                self.written += 1
+            except Exception as e:
+                self.last_error = e
+                print(f"[Writer Error] {base_path}: {e}")
+
+    def _render_png(self, path, shot):
+        # GUI 캔버스와 별개인 Agg Figure 를 이 스레드에서만 사용
+        if self._figure is None:
+            self._figure = Figure(figsize=(10, 6))
+            FigureCanvasAgg(self._figure)
+        fig = self._figure
+        fig.clear()
+        ax1 = fig.add_subplot(211)
+        ax2 = fig.add_subplot(212)
+        for ch, values, amplitude in zip(shot.channels, shot.values, shot.amplitude):
+            ax1.plot(shot.t, values, label=ch)
+            ax2.plot(shot.freqs, amplitude, label=ch)
+        ax1.set_title("Time Domain")
+        ax1.set_ylabel("Acceleration (g) / Other Units")
+        ax1.grid(True)
+        ax1.legend()
+        ax2.set_title("Frequency Domain")
+        ax2.set_xlabel("Frequency (Hz)")
+        ax2.set_ylabel("Amplitude")
+        ax2.grid(True)
+        ax2.legend()
+        fig.tight_layout(pad=3.0)
+        fig.savefig(path)
+
+
+def save_shot_npz(path, shot, timestamp):
+    np.savez(path, values=shot.values, channels=np.array(shot.channels),
+             sample_rate=np.float64(shot.sample_rate), timestamp=np.array(timestamp.isoformat()))
+
+
+def load_shot_npz(path):
+    """npz 측정 파일 -> (t, {채널: 값}, sample_rate)"""
+    with np.load(path) as f:
+        values = f["values"]
+        channels = [str(ch) for ch in f["channels"]]
+        sample_rate = float(f["sample_rate"])
+    t = np.arange(values.shape[1]) / sample_rate
+    return t, dict(zip(channels, values)), sample_rate
+
+
+def save_shot_csv(path, shot):
+    header = ",".join(["Time(s)", *[f"{ch} (g)" for ch in shot.channels], "Sampling Rate (Hz)"])
+    table = np.column_stack([shot.t, shot.values.T])
+    with open(path, 'w', newline='') as f:
+        f.write(header + "\n")
+        if len(table):
+            # 샘플링 주파수는 첫 행에만 기록 (나머지 행은 빈 칸)
+            f.write(",".join(repr(float(v)) for v in table[0]) + f",{shot.sample_rate}\n")
+            np.savetxt(f, table[1:], fmt="%.15g", delimiter=",")